@@ -2,10 +2,18 @@ import streamlit as st
 import pandas as pd
 import numpy as np
 import os
-import json
 import base64
 from pathlib import Path
-from utils.data_processor import get_initial_dataframe_info
+from utils.data_processor import describe_dataframe, get_summary_statistics, get_missing_value_counts, count_duplicates
+from utils.data_loader import SUPPORTED_EXTENSIONS, EXCEL_EXTENSIONS, list_excel_sheets
+from utils.ingest_jobs import submit_upload, submit_local_file, get_job, cancel_job, track_job, collect_finished_jobs
+from utils.out_of_core import is_out_of_core
+from utils.dataset_cache import is_appended
+from utils.workspace import add_dataset
+from utils.sampling import SAMPLING_METHODS, init_sampling
+from utils.folder_watch import DEFAULT_POLL_SECONDS, follow_folder, stop_following_folder, show_folder_watch
+from utils.shared_datasets import get_shared_datasets
+from utils.session_memory import show_session_memory
 from streamlit_extras.stylable_container import stylable_container
 from streamlit_extras.app_logo import add_logo
 from streamlit_extras.colored_header import colored_header
@@ -202,6 +210,8 @@ if 'upload_status' not in st.session_state:
     st.session_state.upload_status = None
 if 'data_cleaned' not in st.session_state:
     st.session_state.data_cleaned = False
+init_sampling()
+collect_finished_jobs()
 
 # Theme toggle
 if 'theme' not in st.session_state:
@@ -214,31 +224,35 @@ def toggle_theme():
         st.session_state.theme = "light"
 
 # Function to process uploaded file
-def process_uploaded_file(uploaded_file):
+def process_uploaded_file(uploaded_file, out_of_core=False, sheet_names=None, union_sheets=False, append=False):
     if uploaded_file is not None:
-        try:
-            file_extension = uploaded_file.name.split('.')[-1].lower()
-            
-            if file_extension == 'csv':
-                data = pd.read_csv(uploaded_file)
-            elif file_extension in ['xls', 'xlsx']:
-                data = pd.read_excel(uploaded_file)
-            elif file_extension == 'json':
-                data = pd.json_normalize(json.loads(uploaded_file.read()))
-            else:
-                st.error(f"Unsupported file format: {file_extension}. Please upload a CSV, Excel, or JSON file.")
-                return None
-            
-            st.session_state.data = data
-            st.session_state.uploaded_file_name = uploaded_file.name
-            st.session_state.upload_status = "success"
-            st.session_state.data_cleaned = False
-            return data
-        except Exception as e:
-            st.error(f"Error processing file: {str(e)}")
-            st.session_state.upload_status = "error"
-            return None
-    return None
+        # Parsed by a background worker; the dataset becomes active when the job finishes
+        append_to = (st.session_state.uploaded_file_name, st.session_state.data) if append else None
+        track_job(submit_upload(uploaded_file, out_of_core, sheet_names, union_sheets, append_to))
+        st.session_state.upload_status = None
+        # Rerun so the progress fragment is declared with its refresh timer
+        st.rerun()
+
+# Progress of this session's background loads, refreshed every second while any is running
+@st.fragment(run_every=1 if st.session_state.ingest_jobs else None)
+def show_ingest_jobs():
+    if collect_finished_jobs():
+        st.rerun()
+    
+    for job_id in st.session_state.ingest_jobs:
+        job = get_job(job_id)
+        if job is None:
+            continue
+        
+        details = f"{job.rows_parsed:,} rows parsed"
+        if job.total_bytes:
+            details = f"{job.bytes_read / 1024 ** 2:.1f} of {job.total_bytes / 1024 ** 2:.1f} MB read, " + details
+        
+        st.write(f"⏳ **{job.name}** ({job.status})")
+        st.progress(job.progress or 0.0, text=details)
+        
+        if st.button("Cancel", key=f"cancel_ingest_{job.id}"):
+            cancel_job(job.id)
 
 # Main Application Layout
 st.markdown('<h1 class="main-title">📊 Data Analysis Dashboard</h1>', unsafe_allow_html=True)
@@ -260,21 +274,128 @@ with st.sidebar:
     st.subheader("1. Upload Your Data")
     uploaded_file = st.file_uploader(
         "Choose a CSV, Excel, or JSON file",
-        type=['csv', 'xlsx', 'xls', 'json'],
-        help="Upload your data file here. Supported formats: CSV, Excel, JSON"
+        type=SUPPORTED_EXTENSIONS,
+        help="Upload your data file here. Supported formats: CSV, Excel, JSON, JSON Lines (.jsonl, .ndjson), also compressed (.gz, .zst) or zipped; the files in a zip archive are stacked"
     )
     
+    # Workbooks: choose the sheets to load
+    selected_sheets = None
+    union_sheets = False
+    if uploaded_file is not None and uploaded_file.name.split('.')[-1].lower() in EXCEL_EXTENSIONS:
+        try:
+            sheet_names = list_excel_sheets(uploaded_file)
+        except Exception as e:
+            st.error(f"Error reading workbook: {str(e)}")
+            sheet_names = []
+        
+        if len(sheet_names) > 1:
+            selected_sheets = st.multiselect("Sheets to load:", options=sheet_names, default=sheet_names[:1])
+            if len(selected_sheets) > 1:
+                union_sheets = st.checkbox(
+                    "Union sheets with matching columns",
+                    value=True,
+                    help="Stack the selected sheets into one dataset with a 'sheet' column; sheets with different columns are loaded separately"
+                )
+    
+    # Out-of-core mode keeps the data in partitioned Parquet files on disk
+    out_of_core = st.checkbox(
+        "Out-of-core mode",
+        help="Store the data on disk and process it chunk by chunk, for datasets larger than memory"
+    )
+    
+    # Append mode adds the file's rows to the active dataset as a new version
+    append_mode = False
+    if st.session_state.data is not None:
+        append_mode = st.checkbox(
+            "Append to the active dataset",
+            help="Add the rows of a file with the same columns (e.g. an hourly delta) to the active dataset; its statistics, profiles and indexes are updated from the new rows only"
+        )
+    
     if st.button("Process Data", key="process_data"):
-        with st.spinner("Processing data..."):
-            if uploaded_file is not None:
-                process_uploaded_file(uploaded_file)
-            else:
-                st.error("Please upload a file first!")
+        if uploaded_file is not None:
+            process_uploaded_file(uploaded_file, out_of_core, selected_sheets, union_sheets, append_mode)
+        else:
+            st.error("Please upload a file first!")
+    
+    if out_of_core:
+        local_path = st.text_input("Or open a local CSV/Parquet file:", placeholder="/path/to/data.parquet", help="CSV files may be compressed (.gz, .zst) or zipped")
+        
+        if st.button("Open File", key="open_local_file") and local_path:
+            track_job(submit_local_file(local_path))
+            st.session_state.upload_status = None
+            st.rerun()
+    
+    # A followed folder is loaded as one dataset that refreshes as files arrive
+    with st.expander("Follow a folder"):
+        if st.session_state.get('folder_watch'):
+            st.write(f"Following {st.session_state.folder_watch['path']}")
+            if st.button("Stop Following", key="stop_following_folder"):
+                stop_following_folder()
+                st.rerun()
+        else:
+            folder_path = st.text_input("Folder path:", placeholder="/path/to/exports", help="CSV, Excel, JSON and Parquet files in the folder are stacked; new files are appended and changed files are reloaded (uses the out-of-core setting above)")
+            poll_seconds = st.number_input("Check every (seconds):", min_value=1, value=DEFAULT_POLL_SECONDS)
+            if st.button("Follow Folder", key="follow_folder") and folder_path:
+                try:
+                    follow_folder(folder_path, out_of_core, int(poll_seconds))
+                    st.rerun()
+                except ValueError as e:
+                    st.error(str(e))
+    
+    show_ingest_jobs()
+    show_folder_watch()
+    show_session_memory()
     
     if st.session_state.upload_status == "success":
         st.success(f"✅ File '{st.session_state.uploaded_file_name}' successfully loaded!")
     elif st.session_state.upload_status == "error":
         st.error("❌ Error processing file. Please check the file format and try again.")
+        if st.session_state.get('upload_error'):
+            st.caption(st.session_state.upload_error)
+    
+    # Files are parsed once per server and shared by every session that loads them
+    shared = get_shared_datasets().summary()
+    if shared['sources']:
+        st.caption(
+            f"🗂️ Shared cache: {shared['sources']} files loaded ({shared['spilled']} on disk), "
+            f"{shared['memory_bytes'] / 1024 ** 2:.0f} of {shared['budget_bytes'] / 1024 ** 2:.0f} MB in memory"
+        )
+    
+    st.divider()
+    
+    # Global sampling mode: pages explore a sample, final actions use the full data
+    st.subheader("2. Sampling")
+    sampling = st.session_state.sampling
+    
+    # Widget state is dropped on other pages, so restore it from the stored settings
+    for setting in ['enabled', 'method', 'size', 'strata_column']:
+        if f"sampling_{setting}" not in st.session_state:
+            st.session_state[f"sampling_{setting}"] = sampling[setting]
+    
+    st.checkbox(
+        "Explore on a sample",
+        key="sampling_enabled",
+        help="Interactive pages work on a sample; saved cleaning steps, exports and model training use the full data"
+    )
+    
+    if st.session_state.sampling_enabled:
+        st.radio("Sampling method:", SAMPLING_METHODS, key="sampling_method", format_func=str.title, horizontal=True)
+        st.number_input("Sample size (rows):", min_value=1000, step=1000, key="sampling_size")
+        
+        if st.session_state.sampling_method == 'stratified':
+            strata_options = []
+            if st.session_state.data is not None:
+                strata_options = st.session_state.data.select_dtypes(include=['object', 'category', 'bool']).columns.tolist()
+            
+            if strata_options:
+                if st.session_state.sampling_strata_column not in strata_options:
+                    st.session_state.sampling_strata_column = strata_options[0]
+                st.selectbox("Stratify by:", strata_options, key="sampling_strata_column")
+            else:
+                st.info("Load a dataset with a categorical column to stratify by; reservoir sampling is used meanwhile.")
+    
+    for setting in ['enabled', 'method', 'size', 'strata_column']:
+        sampling[setting] = st.session_state[f"sampling_{setting}"]
 
 # Main Content
 if st.session_state.data is not None:
@@ -297,7 +418,10 @@ if st.session_state.data is not None:
     with col2:
         st.subheader("Summary Statistics")
         numeric_data = st.session_state.data.select_dtypes(include=[np.number])
-        if not numeric_data.empty:
+        if (is_out_of_core(st.session_state.data) or is_appended(st.session_state.data)) and not numeric_data.columns.empty:
+            # Chunked one-pass (or, after appends, incremental) statistics instead of describe() on the full table
+            st.write(get_summary_statistics(st.session_state.data).T)
+        elif not numeric_data.empty:
             st.write(numeric_data.describe())
         else:
             st.info("No numeric columns found for summary statistics.")
@@ -308,7 +432,7 @@ if st.session_state.data is not None:
     col3, col4 = st.columns(2)
     
     with col3:
-        missing_values = st.session_state.data.isnull().sum()
+        missing_values = get_missing_value_counts(st.session_state.data)
         st.subheader("Missing Values")
         if missing_values.sum() > 0:
             st.write(missing_values[missing_values > 0])
@@ -317,7 +441,7 @@ if st.session_state.data is not None:
     
     with col4:
         st.subheader("Duplicate Rows")
-        duplicate_count = st.session_state.data.duplicated().sum()
+        duplicate_count = count_duplicates(st.session_state.data)
         if duplicate_count > 0:
             st.write(f"Number of duplicate rows: {duplicate_count}")
         else:
@@ -336,7 +460,7 @@ if st.session_state.data is not None:
     """)
     
     # Initial data info for other pages
-    get_initial_dataframe_info(st.session_state.data)
+    st.session_state.update(describe_dataframe(st.session_state.data))
     
 else:
     # Landing page when no data is loaded
@@ -392,6 +516,7 @@ else:
                     st.session_state.uploaded_file_name = "sample_data.csv"
                     st.session_state.upload_status = "success"
                     st.session_state.data_cleaned = False
+                    add_dataset("sample_data.csv", sample_data)
                     st.rerun()
                 except Exception as e:
                     st.error(f"Error loading sample data: {str(e)}")
@@ -1,7 +1,18 @@
 import streamlit as st
 import pandas as pd
 import numpy as np
-from utils.data_processor import handle_missing_values, handle_duplicates, convert_data_types
+from utils.data_processor import (
+    handle_missing_values, handle_duplicates, convert_data_types, filter_dataframe,
+    get_missing_value_counts, count_duplicates
+)
+from utils.out_of_core import is_out_of_core
+from utils.sampling import get_exploration_data, sampling_badge
+from utils.ingest_jobs import collect_finished_jobs
+from utils.folder_watch import show_folder_watch
+from utils.session_memory import show_session_memory
+from utils.schema_registry import get_pinned_schema, pin_schema, forget_schema
+from utils.dataset_cache import get_dataset_version
+from utils.pipeline import build_pipeline, pipeline_to_json
 
 # Set page configuration
 st.set_page_config(
@@ -17,10 +28,27 @@ if 'data' not in st.session_state:
 if 'data_cleaned' not in st.session_state:
     st.session_state.data_cleaned = False
 
+# Pick up datasets from background loads that finished since the last run, and follow a watched folder
+collect_finished_jobs()
+show_folder_watch()
+
+# Account for the session's memory, moving cold objects to disk past the limit
+show_session_memory()
+
 # Function to check if a column has missing values
 def has_missing_values(df, column):
     return df[column].isnull().sum() > 0
 
+# Function to record an applied cleaning step, so the steps can be saved as a pipeline
+def record_cleaning_step(before, after, step):
+    recorded = st.session_state.get('cleaning_steps')
+    # The steps are replayable only while each applies to the result of the previous one
+    if recorded is None or recorded['version'] != get_dataset_version(before):
+        recorded = {'source': st.session_state.uploaded_file_name, 'steps': []}
+    recorded['steps'].append(step)
+    recorded['version'] = get_dataset_version(after)
+    st.session_state.cleaning_steps = recorded
+
 # Page title and description
 st.title("🧹 Data Cleaning")
 st.write("Clean and preprocess your data before analysis")
@@ -29,6 +57,12 @@ st.write("Clean and preprocess your data before analysis")
 if st.session_state.data is not None:
     df = st.session_state.data
     
+    # Previews run on the exploration sample; applied changes replay on the full data
+    preview_source = get_exploration_data(df)
+    badge = sampling_badge(df, preview_source)
+    if badge:
+        st.markdown(badge)
+    
     # Create tabs for different cleaning operations
     cleaning_tabs = st.tabs(["Missing Values", "Duplicates", "Data Types", "Filtering", "Preview"])
     
@@ -37,8 +71,8 @@ if st.session_state.data is not None:
         st.header("Handle Missing Values")
         
         # Display statistics about missing values
-        missing_vals = df.isnull().sum()
-        missing_percent = (df.isnull().sum() / len(df) * 100).round(2)
+        missing_vals = get_missing_value_counts(df)
+        missing_percent = (missing_vals / len(df) * 100).round(2)
         
         missing_df = pd.DataFrame({
             'Column': missing_vals.index,
@@ -91,27 +125,28 @@ if st.session_state.data is not None:
                 # Preview the result of the operation
                 if st.button("Preview Changes", key="preview_missing"):
                     with st.spinner("Processing..."):
-                        df_preview = handle_missing_values(df, strategy, selected_columns, custom_value)
+                        df_preview = handle_missing_values(preview_source, strategy, selected_columns, custom_value)
                         
                         # Show comparison before/after
                         col1, col2 = st.columns(2)
                         with col1:
                             st.subheader("Before")
-                            st.dataframe(df[selected_columns].head(10), use_container_width=True)
+                            st.dataframe(preview_source.head(10)[selected_columns], use_container_width=True)
                         
                         with col2:
                             st.subheader("After")
-                            st.dataframe(df_preview[selected_columns].head(10), use_container_width=True)
+                            st.dataframe(df_preview.head(10)[selected_columns], use_container_width=True)
                         
                         # Show statistics after cleaning
-                        missing_after = df_preview[selected_columns].isnull().sum()
+                        missing_after = get_missing_value_counts(df_preview)[selected_columns]
                         missing_percent_after = (missing_after / len(df_preview) * 100).round(2)
+                        missing_before = get_missing_value_counts(preview_source)
                         
                         st.subheader("Missing values after cleaning")
                         comparison_df = pd.DataFrame({
                             'Column': selected_columns,
-                            'Before (count)': [df[col].isnull().sum() for col in selected_columns],
-                            'Before (%)': [missing_percent[col] for col in selected_columns],
+                            'Before (count)': [missing_before[col] for col in selected_columns],
+                            'Before (%)': [(missing_before[col] / len(preview_source) * 100).round(2) for col in selected_columns],
                             'After (count)': [missing_after[col] for col in selected_columns],
                             'After (%)': missing_percent_after
                         })
@@ -121,10 +156,17 @@ if st.session_state.data is not None:
                 # Apply changes
                 if st.button("Apply Changes", key="apply_missing"):
                     with st.spinner("Applying changes..."):
-                        st.session_state.data = handle_missing_values(df, strategy, selected_columns, custom_value)
+                        cleaned = handle_missing_values(df, strategy, selected_columns, custom_value)
+                        record_cleaning_step(df, cleaned, {
+                            'step': 'handle_missing_values',
+                            'strategy': strategy,
+                            'columns': list(selected_columns),
+                            'custom_value': custom_value
+                        })
+                        st.session_state.data = cleaned
                         st.success("✅ Missing values handled successfully!")
                         st.session_state.data_cleaned = True
-                        st.experimental_rerun()
+                        st.rerun()
         else:
             st.success("✅ No missing values found in the dataset")
     
@@ -133,7 +175,7 @@ if st.session_state.data is not None:
         st.header("Handle Duplicate Rows")
         
         # Check for duplicates
-        duplicate_count = df.duplicated().sum()
+        duplicate_count = count_duplicates(df)
         
         if duplicate_count > 0:
             st.warning(f"Found {duplicate_count} duplicate rows in the dataset ({duplicate_count/len(df)*100:.2f}%)")
@@ -149,17 +191,19 @@ if st.session_state.data is not None:
                 }.get(x)
             )
             
-            # Preview duplicate rows
-            if st.button("Show Duplicate Rows", key="show_duplicates"):
+            # Preview duplicate rows (needs the whole table in memory)
+            if not is_out_of_core(df) and st.button("Show Duplicate Rows", key="show_duplicates"):
                 st.dataframe(df[df.duplicated(keep=False)].sort_values(by=df.columns[0]), use_container_width=True)
             
             # Apply changes
             if st.button("Apply Changes", key="apply_duplicates"):
                 with st.spinner("Removing duplicates..."):
-                    st.session_state.data = handle_duplicates(df, duplicate_strategy)
+                    cleaned = handle_duplicates(df, duplicate_strategy)
+                    record_cleaning_step(df, cleaned, {'step': 'handle_duplicates', 'strategy': duplicate_strategy})
+                    st.session_state.data = cleaned
                     st.success(f"✅ Duplicates handled successfully! {len(df) - len(st.session_state.data)} rows removed.")
                     st.session_state.data_cleaned = True
-                    st.experimental_rerun()
+                    st.rerun()
         else:
             st.success("✅ No duplicate rows found in the dataset")
     
@@ -189,19 +233,19 @@ if st.session_state.data is not None:
         
         if st.button("Preview Conversion", key="preview_convert"):
             try:
-                df_preview = convert_data_types(df, selected_column, target_type)
+                df_preview = convert_data_types(preview_source, selected_column, target_type)
                 
                 # Show comparison before/after
                 col1, col2 = st.columns(2)
                 with col1:
                     st.subheader("Before")
-                    st.write(f"Data type: {df[selected_column].dtype}")
-                    st.dataframe(df[[selected_column]].head(10), use_container_width=True)
+                    st.write(f"Data type: {df.dtypes[selected_column]}")
+                    st.dataframe(preview_source.head(10)[[selected_column]], use_container_width=True)
                 
                 with col2:
                     st.subheader("After")
-                    st.write(f"Data type: {df_preview[selected_column].dtype}")
-                    st.dataframe(df_preview[[selected_column]].head(10), use_container_width=True)
+                    st.write(f"Data type: {df_preview.dtypes[selected_column]}")
+                    st.dataframe(df_preview.head(10)[[selected_column]], use_container_width=True)
                 
             except Exception as e:
                 st.error(f"Error converting data type: {str(e)}")
@@ -209,12 +253,43 @@ if st.session_state.data is not None:
         if st.button("Apply Conversion", key="apply_convert"):
             try:
                 with st.spinner("Converting data type..."):
-                    st.session_state.data = convert_data_types(df, selected_column, target_type)
+                    cleaned = convert_data_types(df, selected_column, target_type)
+                    record_cleaning_step(df, cleaned, {'step': 'convert_data_types', 'column': selected_column, 'new_type': target_type})
+                    st.session_state.data = cleaned
                     st.success(f"✅ Column '{selected_column}' converted to {target_type} successfully!")
                     st.session_state.data_cleaned = True
-                    st.experimental_rerun()
+                    st.rerun()
             except Exception as e:
                 st.error(f"Error converting data type: {str(e)}")
+        
+        # Pin the current column types for later uploads with the same header
+        st.subheader("Schema Registry")
+        header = st.session_state.get('upload_headers', {}).get(st.session_state.uploaded_file_name)
+        
+        if header is None:
+            st.info("Column types can be pinned for CSV files uploaded or opened in this session.")
+        else:
+            pinned = get_pinned_schema(header['fingerprint'])
+            if pinned is not None:
+                st.write(
+                    f"Files with this header are parsed with the column types pinned on "
+                    f"{pinned['pinned_at'][:10]} from '{pinned['name']}', instead of inferring them."
+                )
+            else:
+                st.write(
+                    "Pin the current column types (including categories and datetime formats) "
+                    "so that later files with the same header are parsed with them instead of inferring them."
+                )
+            
+            col1, col2 = st.columns(2)
+            with col1:
+                if st.button("Pin Column Types" if pinned is None else "Update Pinned Types", key="pin_schema"):
+                    pin_schema(header['fingerprint'], df, header['sample'], st.session_state.uploaded_file_name)
+                    st.success("✅ Column types pinned for files with this header!")
+            with col2:
+                if pinned is not None and st.button("Forget Pinned Types", key="forget_schema"):
+                    forget_schema(header['fingerprint'])
+                    st.rerun()
     
     # Tab 4: Filtering
     with cleaning_tabs[3]:
@@ -228,7 +303,7 @@ if st.session_state.data is not None:
         
         with col2:
             # Different filter options based on column data type
-            if pd.api.types.is_numeric_dtype(df[filter_column]):
+            if pd.api.types.is_numeric_dtype(df.dtypes[filter_column]):
                 min_val = float(df[filter_column].min())
                 max_val = float(df[filter_column].max())
                 
@@ -271,41 +346,37 @@ if st.session_state.data is not None:
         if st.button("Apply Filter", key="apply_filter"):
             with st.spinner("Filtering data..."):
                 try:
-                    # Filtering logic based on filter type and column data type
-                    if pd.api.types.is_numeric_dtype(df[filter_column]):
-                        if filter_type == "range":
-                            filtered_df = df[(df[filter_column] >= filter_value[0]) & 
-                                            (df[filter_column] <= filter_value[1])]
-                        elif filter_type == "equals":
-                            filtered_df = df[df[filter_column] == filter_value]
-                        elif filter_type == "greater_than":
-                            filtered_df = df[df[filter_column] > filter_value]
-                        elif filter_type == "less_than":
-                            filtered_df = df[df[filter_column] < filter_value]
-                    else:
-                        if filter_type == "equals":
-                            filtered_df = df[df[filter_column] == filter_value]
-                        elif filter_type == "contains":
-                            filtered_df = df[df[filter_column].astype(str).str.contains(filter_value, na=False)]
-                        elif filter_type == "starts_with":
-                            filtered_df = df[df[filter_column].astype(str).str.startswith(filter_value, na=False)]
-                        elif filter_type == "ends_with":
-                            filtered_df = df[df[filter_column].astype(str).str.endswith(filter_value, na=False)]
+                    # The filter is previewed on the exploration sample and kept for saving
+                    st.session_state.pending_filter = {'column': filter_column, 'operator': filter_type, 'value': filter_value}
+                    
+                    # Out-of-core datasets are filtered chunk by chunk into a new partitioned file
+                    filtered_df = filter_dataframe(preview_source, [st.session_state.pending_filter])
                     
                     # Display filtered data
                     st.subheader("Filtered Data")
-                    st.write(f"Showing {len(filtered_df)} rows out of {len(df)} total rows")
-                    st.dataframe(filtered_df, use_container_width=True)
-                    
-                    # Option to save the filtered dataset
-                    if st.button("Save Filtered Data", key="save_filtered"):
-                        st.session_state.data = filtered_df
-                        st.success("✅ Filtered data saved as the current dataset!")
-                        st.session_state.data_cleaned = True
-                        st.experimental_rerun()
+                    st.write(f"Showing {len(filtered_df)} rows out of {len(preview_source)} total rows")
+                    st.dataframe(
+                        filtered_df.head(1000) if is_out_of_core(filtered_df) else filtered_df,
+                        use_container_width=True
+                    )
                     
                 except Exception as e:
                     st.error(f"Error applying filter: {str(e)}")
+        
+        # Option to save the filtered dataset (the filter is replayed on the full data)
+        if st.session_state.get('pending_filter') is not None:
+            if st.button("Save Filtered Data", key="save_filtered"):
+                with st.spinner("Filtering the full dataset..."):
+                    try:
+                        cleaned = filter_dataframe(df, [st.session_state.pending_filter])
+                        record_cleaning_step(df, cleaned, {'step': 'filter', 'filters': [st.session_state.pending_filter]})
+                        st.session_state.data = cleaned
+                        st.session_state.pending_filter = None
+                        st.success("✅ Filtered data saved as the current dataset!")
+                        st.session_state.data_cleaned = True
+                        st.rerun()
+                    except Exception as e:
+                        st.error(f"Error applying filter: {str(e)}")
     
     # Tab 5: Preview
     with cleaning_tabs[4]:
@@ -317,7 +388,9 @@ if st.session_state.data is not None:
         st.dataframe(df.head(100), use_container_width=True)
         
         # Download cleaned data
-        if st.session_state.data_cleaned:
+        if st.session_state.data_cleaned and is_out_of_core(df):
+            st.info(f"The cleaned dataset is stored out of core at `{df.path}`")
+        elif st.session_state.data_cleaned:
             @st.cache_data
             def convert_df_to_csv(df):
                 return df.to_csv(index=False).encode('utf-8')
@@ -341,6 +414,18 @@ if st.session_state.data is not None:
                         # We need to re-upload the file here
                         st.error("Since we can't access the original file, please re-upload your file from the main page.")
                         st.session_state.data_cleaned = False
+        
+        # The cleaning steps that produced the current dataset, replayable without the app
+        recorded = st.session_state.get('cleaning_steps')
+        if recorded is not None and recorded['version'] == get_dataset_version(df):
+            st.download_button(
+                label="Download Cleaning Pipeline",
+                data=pipeline_to_json(build_pipeline(recorded['steps'], recorded['source'])),
+                file_name="cleaning_pipeline.json",
+                mime="application/json",
+                key="download_pipeline",
+                help="Rerun these steps on another file: python run_pipeline.py cleaning_pipeline.json --input <file>"
+            )
 else:
     st.warning("⚠️ Please upload a data file first on the Home page")
     if st.button("Go to Home"):
@@ -1,7 +1,15 @@
 import streamlit as st
 import pandas as pd
 import numpy as np
-from utils.data_processor import get_summary_statistics, get_categorical_summary
+from utils.data_processor import get_summary_statistics, get_categorical_summary, group_by_aggregate, get_working_sample, GROUP_BY_FUNCTIONS
+from utils.out_of_core import is_out_of_core
+from utils.sampling import get_exploration_data, sampling_badge
+from utils.dataset_cache import get_dataset_version
+from utils.resampling import bootstrap_summary, bootstrap_correlation_ci
+from utils.correlation import compute_correlation_matrix, kendall_tau_sampled, iter_top_correlated_pairs
+from utils.ingest_jobs import collect_finished_jobs
+from utils.folder_watch import show_folder_watch
+from utils.session_memory import show_session_memory
 
 # Set page configuration
 st.set_page_config(
@@ -15,20 +23,35 @@ st.set_page_config(
 if 'data' not in st.session_state:
     st.session_state.data = None
 
+# Pick up datasets from background loads that finished since the last run, and follow a watched folder
+collect_finished_jobs()
+show_folder_watch()
+
+# Account for the session's memory, moving cold objects to disk past the limit
+show_session_memory()
+
 # Page title and description
 st.title("📊 Data Analysis")
 st.write("Analyze your data with descriptive statistics and insights")
 
 # Check if data is loaded
 if st.session_state.data is not None:
-    df = st.session_state.data
+    full_df = st.session_state.data
+    
+    # Analyses run on the exploration sample when sampling mode is on
+    df = get_exploration_data(full_df)
+    badge = sampling_badge(full_df, df)
+    if badge:
+        st.markdown(badge)
     
     # Create tabs for different analyses
     analysis_tabs = st.tabs([
         "Summary Statistics", 
         "Categorical Analysis",
         "Group By Analysis", 
-        "Correlation"
+        "Correlation",
+        "Hypothesis Testing",
+        "Time Series"
     ])
     
     # Tab 1: Summary Statistics
@@ -67,7 +90,7 @@ if st.session_state.data is not None:
                     )
                     skew_df = pd.DataFrame({
                         'Column': selected_num_columns,
-                        'Skewness': [df[col].skew() for col in selected_num_columns]
+                        'Skewness': stats_df.loc[selected_num_columns, 'skew'].values
                     })
                     st.dataframe(skew_df, use_container_width=True)
                 
@@ -81,9 +104,76 @@ if st.session_state.data is not None:
                     )
                     kurtosis_df = pd.DataFrame({
                         'Column': selected_num_columns,
-                        'Kurtosis': [df[col].kurtosis() for col in selected_num_columns]
+                        'Kurtosis': stats_df.loc[selected_num_columns, 'kurtosis'].values
                     })
                     st.dataframe(kurtosis_df, use_container_width=True)
+                
+                # Bootstrap confidence intervals
+                st.subheader("Bootstrap Confidence Intervals")
+                if st.checkbox("Estimate confidence intervals by bootstrapping", key="bootstrap_ci"):
+                    col1, col2, col3 = st.columns(3)
+                    
+                    with col1:
+                        bootstrap_stats = st.multiselect(
+                            "Statistics:",
+                            options=["mean", "median", "std", "skew"],
+                            default=["mean", "median"],
+                            key="bootstrap_stats"
+                        )
+                    
+                    with col2:
+                        n_resamples = st.select_slider(
+                            "Number of resamples:",
+                            options=[500, 1000, 2000, 5000, 10000],
+                            value=1000,
+                            key="bootstrap_resamples"
+                        )
+                    
+                    with col3:
+                        confidence = st.select_slider(
+                            "Confidence level:",
+                            options=[0.90, 0.95, 0.99],
+                            value=0.95,
+                            format_func=lambda x: f"{x:.0%}",
+                            key="bootstrap_confidence"
+                        )
+                    
+                    corr_pair = None
+                    if len(selected_num_columns) >= 2 and st.checkbox("Include correlation of a column pair", key="bootstrap_corr"):
+                        pair_col1, pair_col2 = st.columns(2)
+                        with pair_col1:
+                            corr_x = st.selectbox("First column:", options=selected_num_columns, key="bootstrap_corr_x")
+                        with pair_col2:
+                            corr_y = st.selectbox(
+                                "Second column:",
+                                options=[col for col in selected_num_columns if col != corr_x],
+                                key="bootstrap_corr_y"
+                            )
+                        corr_pair = (corr_x, corr_y)
+                    
+                    if st.button("Compute Confidence Intervals", key="compute_bootstrap"):
+                        with st.spinner(f"Running {n_resamples} bootstrap resamples..."):
+                            ci_df = bootstrap_summary(
+                                df, selected_num_columns, bootstrap_stats,
+                                n_resamples=n_resamples, confidence=confidence
+                            )
+                            
+                            if corr_pair is not None:
+                                corr_ci = bootstrap_correlation_ci(
+                                    df, corr_pair[0], corr_pair[1],
+                                    n_resamples=n_resamples, confidence=confidence
+                                )
+                                ci_df = pd.concat([ci_df, pd.DataFrame([{
+                                    'Column': f"{corr_pair[0]} & {corr_pair[1]}",
+                                    'Statistic': 'correlation',
+                                    'Estimate': corr_ci['estimate'],
+                                    'CI Lower': corr_ci['ci_low'],
+                                    'CI Upper': corr_ci['ci_high'],
+                                    'Std. Error': corr_ci['std_error']
+                                }])], ignore_index=True)
+                        
+                        st.dataframe(ci_df, use_container_width=True)
+                        st.caption(f"Percentile bootstrap intervals at {confidence:.0%} confidence from {n_resamples} resamples")
         else:
             st.warning("No numeric columns found in the dataset for summary statistics")
     
@@ -121,10 +211,16 @@ if st.session_state.data is not None:
                     st.subheader("Frequency Distribution")
                     
                     # Limit to top 20 categories if there are too many
-                    if len(value_counts) > 20:
-                        st.info(f"Showing top 20 categories out of {len(value_counts)}")
+                    if unique_count > 20:
+                        st.info(f"Showing top 20 categories out of {unique_count}")
                         value_counts = value_counts.head(20)
                     
+                    if cat_summary[selected_cat_column]['approximate']:
+                        st.caption(
+                            "High-cardinality column: the unique count is a HyperLogLog estimate "
+                            "and frequencies are heavy-hitter sketch estimates."
+                        )
+                    
                     st.dataframe(value_counts, use_container_width=True)
                     
                     # Cross tabulation
@@ -221,17 +317,14 @@ if st.session_state.data is not None:
                     # Select aggregation functions
                     agg_functions = st.multiselect(
                         "Select aggregation functions:",
-                        options=["mean", "median", "sum", "min", "max", "count", "std"],
+                        options=GROUP_BY_FUNCTIONS,
                         default=["mean", "sum", "count"]
                     )
                     
                     if agg_functions:
-                        # Create a dictionary for aggregation
-                        agg_dict = {col: agg_functions for col in agg_cols}
-                        
                         try:
-                            # Perform groupby
-                            grouped_df = df.groupby(group_by_cols).agg(agg_dict)
+                            # Perform groupby (merged chunk by chunk for out-of-core datasets)
+                            grouped_df = group_by_aggregate(df, group_by_cols, agg_cols, agg_functions)
                             
                             # Display results
                             st.subheader("Group By Results")
@@ -242,13 +335,31 @@ if st.session_state.data is not None:
                             def convert_df_to_csv(df):
                                 return df.to_csv().encode('utf-8')
                             
-                            csv = convert_df_to_csv(grouped_df)
-                            st.download_button(
-                                label="Download Grouped Data as CSV",
-                                data=csv,
-                                file_name="grouped_data.csv",
-                                mime="text/csv"
-                            )
+                            if df is not full_df:
+                                # Exports replay the aggregation on the full data
+                                selection = (get_dataset_version(full_df), tuple(group_by_cols), tuple(agg_cols), tuple(agg_functions))
+                                if st.button("Compute on Full Data for Export", key="group_full_export"):
+                                    with st.spinner("Aggregating the full dataset..."):
+                                        st.session_state.grouped_export = (selection, group_by_aggregate(
+                                            full_df, group_by_cols, agg_cols, agg_functions
+                                        ))
+                                
+                                export_selection, export_df = st.session_state.get('grouped_export', (None, None))
+                                if export_selection == selection:
+                                    st.download_button(
+                                        label="Download Grouped Data (full data) as CSV",
+                                        data=convert_df_to_csv(export_df),
+                                        file_name="grouped_data.csv",
+                                        mime="text/csv"
+                                    )
+                            else:
+                                csv = convert_df_to_csv(grouped_df)
+                                st.download_button(
+                                    label="Download Grouped Data as CSV",
+                                    data=csv,
+                                    file_name="grouped_data.csv",
+                                    mime="text/csv"
+                                )
                             
                             # Option to pivot the results
                             if len(group_by_cols) >= 2 and st.checkbox("Create pivot table"):
@@ -276,13 +387,18 @@ if st.session_state.data is not None:
                                 )
                                 
                                 # Create pivot table
-                                pivot_table = pd.pivot_table(
-                                    df,
-                                    values=pivot_values,
-                                    index=pivot_index,
-                                    columns=pivot_columns,
-                                    aggfunc=pivot_aggfunc
-                                )
+                                if is_out_of_core(df):
+                                    pivot_table = group_by_aggregate(
+                                        df, [pivot_index, pivot_columns], [pivot_values], [pivot_aggfunc]
+                                    )[(pivot_values, pivot_aggfunc)].unstack(pivot_columns)
+                                else:
+                                    pivot_table = pd.pivot_table(
+                                        df,
+                                        values=pivot_values,
+                                        index=pivot_index,
+                                        columns=pivot_columns,
+                                        aggfunc=pivot_aggfunc
+                                    )
                                 
                                 st.dataframe(pivot_table, use_container_width=True)
                                 
@@ -338,12 +454,45 @@ if st.session_state.data is not None:
                     )
                 )
                 
+                # Kendall on large datasets can be approximated on a sample
+                kendall_sample_size = None
+                if corr_method == "kendall" and len(df) > 10000:
+                    if st.checkbox("Approximate Kendall on a sample", key="kendall_approx"):
+                        kendall_sample_size = st.number_input(
+                            "Sample size:",
+                            min_value=1000,
+                            max_value=len(df),
+                            value=min(10000, len(df)),
+                            step=1000,
+                            key="kendall_sample_size"
+                        )
+                
                 # Calculate and display correlation matrix
-                corr_matrix = df[selected_corr_columns].corr(method=corr_method)
+                with st.spinner("Calculating correlations..."):
+                    corr_matrix = compute_correlation_matrix(
+                        df, selected_corr_columns, method=corr_method, sample_size=kendall_sample_size
+                    )
                 
                 st.subheader(f"Correlation Matrix ({corr_method.capitalize()})")
                 st.dataframe(corr_matrix.style.background_gradient(cmap='coolwarm'), use_container_width=True)
                 
+                # Confidence intervals for the sampled Kendall estimates
+                if kendall_sample_size is not None:
+                    st.subheader("Sampled Kendall Estimates (95% CI)")
+                    ci_rows = []
+                    for i, col_a in enumerate(selected_corr_columns):
+                        for col_b in selected_corr_columns[i + 1:]:
+                            estimate = kendall_tau_sampled(df[col_a], df[col_b], sample_size=kendall_sample_size)
+                            ci_rows.append({
+                                'Feature 1': col_a,
+                                'Feature 2': col_b,
+                                'Tau': estimate['tau'],
+                                'CI Lower': estimate['ci_low'],
+                                'CI Upper': estimate['ci_high'],
+                                'Sample Size': estimate['n']
+                            })
+                    st.dataframe(pd.DataFrame(ci_rows), use_container_width=True)
+                
                 # Interpretation guide
                 st.subheader("Interpretation")
                 st.info(
@@ -362,13 +511,39 @@ if st.session_state.data is not None:
                 # Show strongest correlations
                 st.subheader("Top Correlations")
                 
-                # Get upper triangle of correlation matrix
-                corr_upper = corr_matrix.where(np.triu(np.ones(corr_matrix.shape), k=1).astype(bool))
-                
-                # Stack and sort to find strongest correlations
-                corr_pairs = corr_upper.stack().sort_values(ascending=False)
+                # Top-k mode streams matrix blocks instead of sorting every pair
+                top_k_mode = st.checkbox(
+                    "Top-k mode (strongest pairs only)",
+                    value=len(numeric_columns) > 50,
+                    key="top_k_mode",
+                    help="Scans the correlation matrix block by block and keeps only the k strongest |r| pairs"
+                )
                 
-                if not corr_pairs.empty:
+                if top_k_mode:
+                    col1, col2 = st.columns(2)
+                    with col1:
+                        top_k = st.number_input("Number of pairs (k):", min_value=1, max_value=1000, value=20, key="top_k")
+                    with col2:
+                        scan_all = st.checkbox("Scan all numeric columns", value=False, key="top_k_scan_all")
+                    
+                    scan_columns = numeric_columns if scan_all else selected_corr_columns
+                    
+                    # Show results progressively as blocks are scanned
+                    progress_bar = st.progress(0.0)
+                    table_placeholder = st.empty()
+                    for top_corr_df, fraction in iter_top_correlated_pairs(
+                        df, scan_columns, k=int(top_k), method=corr_method
+                    ):
+                        progress_bar.progress(min(fraction, 1.0))
+                        table_placeholder.dataframe(top_corr_df, use_container_width=True)
+                    progress_bar.empty()
+                else:
+                    # Get upper triangle of correlation matrix
+                    corr_upper = corr_matrix.where(np.triu(np.ones(corr_matrix.shape), k=1).astype(bool))
+                    
+                    # Stack and sort to find strongest correlations
+                    corr_pairs = corr_upper.stack().sort_values(ascending=False)
+                    
                     # Convert to DataFrame for display
                     top_corr_df = pd.DataFrame({
                         'Feature 1': [idx[0] for idx in corr_pairs.index],
@@ -376,60 +551,318 @@ if st.session_state.data is not None:
                         'Correlation': corr_pairs.values
                     })
                     
-                    st.dataframe(top_corr_df, use_container_width=True)
-                    
+                    if not top_corr_df.empty:
+                        st.dataframe(top_corr_df, use_container_width=True)
+                
+                if not top_corr_df.empty:
                     # Select a pair for scatter plot
                     if st.checkbox("Show scatter plot for a correlation pair"):
                         # Allow user to select a pair from top correlations
                         scatter_pair = st.selectbox(
                             "Select a pair of variables:",
-                            options=[(row['Feature 1'], row['Feature 2']) for _, row in top_corr_df.iterrows()],
-                            format_func=lambda x: f"{x[0]} vs {x[1]} (r = {corr_matrix.loc[x[0], x[1]]:.2f})"
+                            options=[
+                                (row['Feature 1'], row['Feature 2'], row['Correlation'])
+                                for _, row in top_corr_df.iterrows()
+                            ],
+                            format_func=lambda x: f"{x[0]} vs {x[1]} (r = {x[2]:.2f})"
                         )
                         
                         if scatter_pair:
                             # Import visualization utilities
                             from utils.visualizer import create_scatter_plot
                             
+                            # Out-of-core datasets are plotted from a sample; the fit below uses every row
+                            plot_df = get_working_sample(df, columns=[scatter_pair[0], scatter_pair[1]])
+                            
                             fig = create_scatter_plot(
-                                df, 
+                                plot_df, 
                                 scatter_pair[0], 
                                 scatter_pair[1],
-                                title=f"Scatter Plot: {scatter_pair[0]} vs {scatter_pair[1]} (r = {corr_matrix.loc[scatter_pair[0], scatter_pair[1]]:.2f})"
+                                title=f"Scatter Plot: {scatter_pair[0]} vs {scatter_pair[1]} (r = {scatter_pair[2]:.2f})"
                             )
                             
                             st.pyplot(fig)
                             
                             # Add regression line option
                             if st.checkbox("Add regression line"):
-                                from utils.visualizer import create_plotly_scatter
-                                import plotly.express as px
+                                from utils.visualizer import create_plotly_scatter_with_trendline
+                                from utils.regression import fit_ols_by_group, get_coefficient_table
                                 
                                 # Create scatter plot with regression line
-                                fig = px.scatter(
-                                    df,
-                                    x=scatter_pair[0],
-                                    y=scatter_pair[1],
-                                    trendline="ols",
+                                fig = create_plotly_scatter_with_trendline(
+                                    plot_df,
+                                    scatter_pair[0],
+                                    scatter_pair[1],
                                     title=f"Scatter Plot with Regression Line: {scatter_pair[0]} vs {scatter_pair[1]}"
                                 )
                                 
                                 st.plotly_chart(fig, use_container_width=True)
                                 
-                                # Display regression stats
-                                import statsmodels.api as sm
-                                
-                                X = sm.add_constant(df[scatter_pair[0]])
-                                y = df[scatter_pair[1]]
+                                # Display regression stats from the same cached fit
+                                fit = fit_ols_by_group(df, scatter_pair[0], scatter_pair[1]).get('All')
                                 
-                                model = sm.OLS(y, X).fit()
-                                st.text(model.summary().tables[1].as_text())
+                                if fit is not None:
+                                    st.dataframe(get_coefficient_table(fit, scatter_pair[0]), use_container_width=True)
+                                    st.write(f"R²: {fit['r_squared']:.4f} (n = {fit['n']})")
+                                else:
+                                    st.warning("Not enough variation in the data to fit a regression line")
                 else:
                     st.warning("No correlation pairs found")
             else:
                 st.warning("Please select at least two columns for correlation analysis")
         else:
             st.warning("Need at least two numeric columns to calculate correlation")
+    
+    # Tab 5: Hypothesis Testing
+    with analysis_tabs[4]:
+        st.header("Hypothesis Testing")
+        st.write("Test whether numeric columns differ across the groups of a categorical column")
+        
+        numeric_columns = df.select_dtypes(include=[np.number]).columns.tolist()
+        group_columns = [col for col in df.columns if col not in numeric_columns or df[col].nunique() <= 20]
+        
+        if numeric_columns and group_columns:
+            from utils.hypothesis_tests import get_group_codes, run_group_tests
+            
+            col1, col2 = st.columns(2)
+            
+            with col1:
+                test_group_column = st.selectbox(
+                    "Select grouping column:",
+                    options=group_columns,
+                    key="test_group_column"
+                )
+            
+            with col2:
+                test_metrics = st.multiselect(
+                    "Select metric columns to test:",
+                    options=[col for col in numeric_columns if col != test_group_column],
+                    default=[col for col in numeric_columns if col != test_group_column][:3],
+                    key="test_metrics"
+                )
+            
+            _, group_labels = get_group_codes(df, test_group_column)
+            
+            test_groups = st.multiselect(
+                "Groups to compare (two-group tests use the first two):",
+                options=group_labels,
+                default=group_labels[:min(len(group_labels), 10)],
+                key="test_groups"
+            )
+            
+            test_names = {
+                "Welch's t-test": 't-test',
+                "Mann-Whitney U": 'mann-whitney',
+                "One-way ANOVA": 'anova',
+                "Kruskal-Wallis": 'kruskal',
+                "Permutation test": 'permutation'
+            }
+            
+            col1, col2 = st.columns(2)
+            
+            with col1:
+                selected_tests = st.multiselect(
+                    "Select tests:",
+                    options=list(test_names.keys()),
+                    default=["Welch's t-test", "One-way ANOVA"],
+                    key="selected_tests"
+                )
+            
+            with col2:
+                n_permutations = st.select_slider(
+                    "Number of permutations:",
+                    options=[500, 1000, 2000, 5000, 10000, 20000],
+                    value=1000,
+                    disabled="Permutation test" not in selected_tests
+                )
+            
+            if st.button("Run Tests"):
+                if not test_metrics or not selected_tests:
+                    st.warning("Please select at least one metric column and one test")
+                elif len(test_groups) < 2:
+                    st.warning("Please select at least two groups to compare")
+                else:
+                    try:
+                        with st.spinner("Running hypothesis tests..."):
+                            test_results = run_group_tests(
+                                df,
+                                test_metrics,
+                                test_group_column,
+                                [test_names[test] for test in selected_tests],
+                                groups=test_groups,
+                                n_permutations=n_permutations
+                            )
+                        
+                        test_results['Significant (p < 0.05)'] = test_results['p-value'] < 0.05
+                        st.dataframe(test_results, use_container_width=True)
+                        
+                        st.caption(
+                            "The permutation test reports the observed F statistic; its p-value is the share "
+                            "of label permutations with a between-group spread at least as large."
+                        )
+                        
+                        if test_results['p-value'].isnull().any():
+                            st.info("Tests without a result need at least two non-missing values in every group")
+                    except Exception as e:
+                        st.error(f"Error running hypothesis tests: {str(e)}")
+        else:
+            st.warning("Need numeric columns and a grouping column for hypothesis testing")
+    
+    # Tab 6: Time Series
+    with analysis_tabs[5]:
+        st.header("Time Series Analysis")
+        
+        datetime_columns = df.select_dtypes(include=['datetime64']).columns.tolist()
+        numeric_columns = df.select_dtypes(include=[np.number]).columns.tolist()
+        
+        if not datetime_columns:
+            st.info("No datetime columns found. Convert a column to datetime in Data Cleaning > Data Types.")
+        elif not numeric_columns:
+            st.warning("No numeric columns found in the dataset")
+        else:
+            from utils.time_series import (
+                RESAMPLE_FREQUENCIES, RESAMPLE_AGGREGATIONS, WINDOW_STATISTICS,
+                get_sorted_values, resample_series, rolling_window,
+                lag_features, autocorrelation, seasonal_decompose
+            )
+            from utils.visualizer import create_plotly_line, create_plotly_bar, create_plotly_decomposition
+            
+            col1, col2 = st.columns(2)
+            
+            with col1:
+                ts_time_column = st.selectbox("Select datetime column:", options=datetime_columns, key="ts_time_column")
+            
+            with col2:
+                ts_value_column = st.selectbox("Select value column:", options=numeric_columns, key="ts_value_column")
+            
+            # Resampling
+            st.subheader("Resampling")
+            
+            col1, col2 = st.columns(2)
+            
+            with col1:
+                ts_frequency = st.selectbox(
+                    "Resample frequency:",
+                    options=list(RESAMPLE_FREQUENCIES.keys()),
+                    index=2,
+                    key="ts_frequency"
+                )
+            
+            with col2:
+                ts_agg = st.selectbox("Aggregation:", options=RESAMPLE_AGGREGATIONS, key="ts_agg")
+            
+            try:
+                with st.spinner("Resampling..."):
+                    resampled = resample_series(
+                        df, ts_time_column, [ts_value_column], RESAMPLE_FREQUENCIES[ts_frequency], ts_agg
+                    )
+                
+                fig = create_plotly_line(
+                    resampled.rename_axis(ts_time_column).reset_index(),
+                    ts_time_column,
+                    ts_value_column,
+                    title=f"{ts_value_column} ({ts_agg} per {ts_frequency.lower()})"
+                )
+                st.plotly_chart(fig, use_container_width=True)
+                
+                with st.expander("Show resampled data"):
+                    st.dataframe(resampled, use_container_width=True)
+            except Exception as e:
+                st.error(f"Error resampling data: {str(e)}")
+                resampled = None
+            
+            # Rolling and expanding windows
+            st.subheader("Rolling & Expanding Windows")
+            
+            col1, col2, col3 = st.columns(3)
+            
+            with col1:
+                window_type = st.radio("Window type:", ["Rows", "Time", "Expanding"], horizontal=True)
+            
+            with col2:
+                if window_type == "Rows":
+                    window = st.number_input("Window length (rows):", min_value=2, value=7, step=1)
+                elif window_type == "Time":
+                    window = st.text_input("Window length (e.g. 7D, 12h):", value="7D")
+                else:
+                    window = None
+            
+            with col3:
+                window_statistic = st.selectbox("Window statistic:", options=WINDOW_STATISTICS)
+            
+            try:
+                # Window results come from cached prefix sums, so changing the length is cheap
+                windowed = rolling_window(df, ts_time_column, ts_value_column, window, window_statistic)
+                window_frame = pd.DataFrame({
+                    ts_value_column: get_sorted_values(df, ts_time_column, ts_value_column),
+                    windowed.name: windowed
+                })
+                
+                # Plot at most a few thousand points
+                stride = max(1, len(window_frame) // 5000)
+                fig = create_plotly_line(
+                    window_frame.iloc[::stride].rename_axis(ts_time_column).reset_index(),
+                    ts_time_column,
+                    [ts_value_column, windowed.name],
+                    title=f"{window_type} window {window_statistic} of {ts_value_column}"
+                )
+                st.plotly_chart(fig, use_container_width=True)
+                
+                if stride > 1:
+                    st.caption(f"Showing every {stride}th point of {len(window_frame):,} rows")
+            except Exception as e:
+                st.error(f"Error computing window statistics: {str(e)}")
+            
+            if resampled is not None and len(resampled) > 2:
+                series = resampled[ts_value_column]
+                
+                # Lags and autocorrelation
+                st.subheader("Lags & Autocorrelation")
+                st.write(f"Lags are measured in resampled periods ({ts_frequency.lower()}s)")
+                
+                max_lag = st.slider("Maximum lag:", min_value=1, max_value=min(100, len(series) - 1), value=min(24, len(series) - 1))
+                
+                acf = autocorrelation(series, max_lag)
+                fig = create_plotly_bar(acf, 'Lag', 'Autocorrelation', title=f"Autocorrelation of {ts_value_column}")
+                st.plotly_chart(fig, use_container_width=True)
+                
+                selected_lags = st.multiselect(
+                    "Show lagged values for:",
+                    options=acf['Lag'].tolist(),
+                    default=[1],
+                    key="ts_lags"
+                )
+                
+                if selected_lags:
+                    st.dataframe(lag_features(series, selected_lags), use_container_width=True)
+                
+                # Seasonal decomposition
+                st.subheader("Seasonal Decomposition")
+                
+                default_periods = {'Minute': 60, 'Hour': 24, 'Day': 7, 'Week': 52, 'Month': 12, 'Quarter': 4, 'Year': 2}
+                
+                col1, col2 = st.columns(2)
+                
+                with col1:
+                    period = st.number_input(
+                        "Seasonal period (resampled periods per cycle):",
+                        min_value=2,
+                        value=default_periods[ts_frequency],
+                        step=1
+                    )
+                
+                with col2:
+                    decomposition_model = st.radio("Model:", ["additive", "multiplicative"], horizontal=True)
+                
+                try:
+                    decomposition = seasonal_decompose(series, int(period), decomposition_model)
+                    fig = create_plotly_decomposition(
+                        decomposition,
+                        title=f"Seasonal Decomposition of {ts_value_column} ({decomposition_model})"
+                    )
+                    st.plotly_chart(fig, use_container_width=True)
+                except ValueError as e:
+                    st.warning(str(e))
 else:
     st.warning("⚠️ Please upload a data file first on the Home page")
     if st.button("Go to Home"):
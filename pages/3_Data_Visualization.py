@@ -6,8 +6,19 @@ from utils.visualizer import (
     set_plot_style, create_histogram, create_boxplot, create_scatter_plot,
     create_bar_chart, create_pie_chart, create_correlation_heatmap, create_line_chart,
     create_plotly_histogram, create_plotly_scatter, create_plotly_bar,
-    create_plotly_pie, create_plotly_line, create_plotly_heatmap, create_plotly_box
+    create_plotly_pie, create_plotly_line, create_plotly_heatmap, create_plotly_box,
+    create_plotly_scatter_with_trendline, create_plotly_sketch_box
 )
+from utils.correlation import compute_correlation_matrix
+from utils.regression import fit_ols_by_group, get_coefficient_table
+from utils.quantile_sketch import get_box_statistics
+from utils.data_processor import get_working_sample, WORKING_SAMPLE_ROWS
+from utils.dataset_cache import get_schema
+from utils.out_of_core import is_out_of_core
+from utils.sampling import get_exploration_data, sampling_badge
+from utils.ingest_jobs import collect_finished_jobs
+from utils.folder_watch import show_folder_watch
+from utils.session_memory import show_session_memory
 
 # Set page configuration
 st.set_page_config(
@@ -23,13 +34,33 @@ if 'data' not in st.session_state:
 if 'theme' not in st.session_state:
     st.session_state.theme = "light"
 
+# Pick up datasets from background loads that finished since the last run, and follow a watched folder
+collect_finished_jobs()
+show_folder_watch()
+
+# Account for the session's memory, moving cold objects to disk past the limit
+show_session_memory()
+
 # Page title and description
 st.title("📈 Data Visualization")
 st.write("Create various visualizations to explore and understand your data")
 
 # Check if data is loaded
 if st.session_state.data is not None:
-    df = st.session_state.data
+    full_df = st.session_state.data
+    
+    # Charts are drawn from the exploration sample when sampling mode is on
+    source = get_exploration_data(full_df)
+    badge = sampling_badge(full_df, source)
+    if badge:
+        st.markdown(badge)
+    
+    # Out-of-core datasets are represented by an in-memory sample on this page
+    if is_out_of_core(source):
+        st.info(f"Out-of-core dataset: charts are drawn from a random sample of {min(WORKING_SAMPLE_ROWS, len(source)):,} of {len(source):,} rows, loading only the plotted columns")
+    
+    # Column lists come from cached schema metadata; each chart loads only the columns it plots
+    schema = get_schema(source)
     
     # Set plot style based on theme
     plot_style = "darkgrid" if st.session_state.theme == "dark" else "whitegrid"
@@ -58,7 +89,7 @@ if st.session_state.data is not None:
         # Column selection and parameters based on visualization type
         if basic_viz_type == "Histogram":
             # Numeric columns for histogram
-            numeric_columns = df.select_dtypes(include=[np.number]).columns.tolist()
+            numeric_columns = schema['numeric']
             
             if numeric_columns:
                 col1, col2 = st.columns(2)
@@ -75,6 +106,7 @@ if st.session_state.data is not None:
                 st.subheader(f"Histogram of {hist_column}")
                 
                 if hist_column:
+                    df = get_working_sample(source, columns=[hist_column])
                     fig = create_histogram(
                         df, hist_column, bins=bins, kde=kde, 
                         title=f"Histogram of {hist_column}", color=hist_color
@@ -96,7 +128,7 @@ if st.session_state.data is not None:
         
         elif basic_viz_type == "Box Plot":
             # Numeric columns for box plot
-            numeric_columns = df.select_dtypes(include=[np.number]).columns.tolist()
+            numeric_columns = schema['numeric']
             
             if numeric_columns:
                 col1, col2 = st.columns(2)
@@ -106,32 +138,41 @@ if st.session_state.data is not None:
                 
                 with col2:
                     box_color = st.color_picker("Box plot color:", "#4CAF50")
+                    quantile_error = st.select_slider(
+                        "Quantile error bound:",
+                        options=[0.001, 0.005, 0.01, 0.02, 0.05],
+                        value=0.01,
+                        format_func=lambda x: f"{x:.1%}",
+                        help="Box plot quantiles come from a compact sketch with this rank error (exact for small columns)"
+                    )
                 
                 # Create and display the box plot
                 st.subheader(f"Box Plot of {box_column}")
                 
                 if box_column:
+                    df = get_working_sample(source, columns=[box_column])
                     fig = create_boxplot(
                         df, box_column, 
-                        title=f"Box Plot of {box_column}", color=box_color
+                        title=f"Box Plot of {box_column}", color=box_color, error=quantile_error
                     )
                     st.pyplot(fig)
                     
                     # Display outlier information
                     st.write("**Outlier Information:**")
                     
-                    # Calculate IQR and outlier boundaries
-                    q1 = df[box_column].quantile(0.25)
-                    q3 = df[box_column].quantile(0.75)
-                    iqr = q3 - q1
+                    # IQR and outlier boundaries from the cached quantile sketch
+                    box_stats = get_box_statistics(df, box_column, quantile_error)
+                    q1 = box_stats['q1']
+                    q3 = box_stats['q3']
+                    iqr = box_stats['iqr']
                     
-                    lower_bound = q1 - 1.5 * iqr
-                    upper_bound = q3 + 1.5 * iqr
+                    lower_bound = box_stats['lower_bound']
+                    upper_bound = box_stats['upper_bound']
                     
                     outliers = df[(df[box_column] < lower_bound) | (df[box_column] > upper_bound)][box_column]
                     
                     st.write(f"Q1 (25th percentile): {q1:.2f}")
-                    st.write(f"Median (50th percentile): {df[box_column].median():.2f}")
+                    st.write(f"Median (50th percentile): {box_stats['median']:.2f}")
                     st.write(f"Q3 (75th percentile): {q3:.2f}")
                     st.write(f"IQR (Q3-Q1): {iqr:.2f}")
                     st.write(f"Lower outlier boundary: {lower_bound:.2f}")
@@ -145,7 +186,7 @@ if st.session_state.data is not None:
         
         elif basic_viz_type == "Scatter Plot":
             # Numeric columns for scatter plot
-            numeric_columns = df.select_dtypes(include=[np.number]).columns.tolist()
+            numeric_columns = schema['numeric']
             
             if len(numeric_columns) >= 2:
                 col1, col2 = st.columns(2)
@@ -157,7 +198,7 @@ if st.session_state.data is not None:
                     y_column = st.selectbox("Select Y-axis column:", options=numeric_columns, index=min(1, len(numeric_columns)-1))
                 
                 # Optional color grouping
-                categorical_columns = df.select_dtypes(include=['object', 'category']).columns.tolist()
+                categorical_columns = schema['categorical']
                 hue_column = None
                 
                 if categorical_columns:
@@ -173,6 +214,7 @@ if st.session_state.data is not None:
                 st.subheader(f"Scatter Plot: {x_column} vs {y_column}")
                 
                 if x_column and y_column:
+                    df = get_working_sample(source, columns=[x_column, y_column, hue_column])
                     fig = create_scatter_plot(
                         df, x_column, y_column, hue=hue_column,
                         title=f"Scatter Plot: {x_column} vs {y_column}"
@@ -185,11 +227,8 @@ if st.session_state.data is not None:
                     
                     # Add regression line option
                     if st.checkbox("Show regression line", key="scatter_regression"):
-                        import plotly.express as px
-                        
-                        fig = px.scatter(
-                            df, x=x_column, y=y_column, 
-                            color=hue_column, trendline="ols",
+                        fig = create_plotly_scatter_with_trendline(
+                            df, x_column, y_column, color=hue_column,
                             title=f"Scatter Plot with Regression Line: {x_column} vs {y_column}"
                         )
                         st.plotly_chart(fig, use_container_width=True)
@@ -198,8 +237,8 @@ if st.session_state.data is not None:
         
         elif basic_viz_type == "Bar Chart":
             # Get columns appropriate for bar charts
-            categorical_columns = df.select_dtypes(include=['object', 'category']).columns.tolist()
-            numeric_columns = df.select_dtypes(include=[np.number]).columns.tolist()
+            categorical_columns = schema['categorical']
+            numeric_columns = schema['numeric']
             
             if categorical_columns:
                 col1, col2, col3 = st.columns(3)
@@ -226,6 +265,7 @@ if st.session_state.data is not None:
                 
                 # Create and display the bar chart
                 if x_column:
+                    df = get_working_sample(source, columns=[x_column, y_column])
                     title = f"Count of {x_column}" if use_count else f"Bar Chart: {x_column} vs {y_column}"
                     st.subheader(title)
                     
@@ -259,7 +299,7 @@ if st.session_state.data is not None:
         
         elif basic_viz_type == "Pie Chart":
             # Categorical columns for pie chart
-            categorical_columns = df.select_dtypes(include=['object', 'category']).columns.tolist()
+            categorical_columns = schema['categorical']
             
             if categorical_columns:
                 col1, col2 = st.columns(2)
@@ -279,6 +319,7 @@ if st.session_state.data is not None:
                 
                 # Create and display the pie chart
                 if pie_column:
+                    df = get_working_sample(source, columns=[pie_column])
                     # Check if too many categories
                     unique_cats = df[pie_column].nunique()
                     
@@ -320,8 +361,8 @@ if st.session_state.data is not None:
         
         if advanced_viz_type == "Line Chart":
             # Get columns for line chart
-            numeric_columns = df.select_dtypes(include=[np.number]).columns.tolist()
-            all_columns = df.columns.tolist()
+            numeric_columns = schema['numeric']
+            all_columns = schema['columns']
             
             if numeric_columns:
                 col1, col2 = st.columns([1, 2])
@@ -339,6 +380,7 @@ if st.session_state.data is not None:
                 
                 # Create and display the line chart
                 if x_column and y_columns:
+                    df = get_working_sample(source, columns=[x_column] + y_columns)
                     st.subheader(f"Line Chart with {x_column} on X-axis")
                     
                     # Sort data by x-column if it's a datetime or numeric
@@ -368,7 +410,7 @@ if st.session_state.data is not None:
         
         elif advanced_viz_type == "Correlation Heatmap":
             # Numeric columns for correlation heatmap
-            numeric_columns = df.select_dtypes(include=[np.number]).columns.tolist()
+            numeric_columns = schema['numeric']
             
             if len(numeric_columns) >= 2:
                 col1, col2 = st.columns(2)
@@ -394,6 +436,7 @@ if st.session_state.data is not None:
                 
                 # Create and display the heatmap
                 if selected_columns and len(selected_columns) >= 2:
+                    df = get_working_sample(source, columns=selected_columns)
                     st.subheader(f"{corr_method.capitalize()} Correlation Heatmap")
                     
                     fig = create_correlation_heatmap(
@@ -404,7 +447,7 @@ if st.session_state.data is not None:
                     st.pyplot(fig)
                     
                     # Display correlation matrix as a table
-                    corr_matrix = df[selected_columns].corr(method=corr_method).round(2)
+                    corr_matrix = compute_correlation_matrix(df, selected_columns, method=corr_method).round(2)
                     st.subheader("Correlation Matrix")
                     st.dataframe(corr_matrix.style.background_gradient(cmap=cmap), use_container_width=True)
                     
@@ -420,8 +463,8 @@ if st.session_state.data is not None:
         
         elif advanced_viz_type == "Grouped Bar Chart":
             # Get columns for grouped bar chart
-            categorical_columns = df.select_dtypes(include=['object', 'category']).columns.tolist()
-            numeric_columns = df.select_dtypes(include=[np.number]).columns.tolist()
+            categorical_columns = schema['categorical']
+            numeric_columns = schema['numeric']
             
             if len(categorical_columns) >= 2 and numeric_columns:
                 col1, col2, col3 = st.columns(3)
@@ -446,6 +489,7 @@ if st.session_state.data is not None:
                 
                 # Create and display the grouped bar chart
                 if x_column and group_column:
+                    df = get_working_sample(source, columns=[x_column, group_column, y_column])
                     import seaborn as sns
                     
                     st.subheader(f"Grouped Bar Chart: {x_column} by {group_column}")
@@ -541,8 +585,8 @@ if st.session_state.data is not None:
         
         elif advanced_viz_type == "Faceted Charts":
             # Get columns for faceted charts
-            categorical_columns = df.select_dtypes(include=['object', 'category']).columns.tolist()
-            numeric_columns = df.select_dtypes(include=[np.number]).columns.tolist()
+            categorical_columns = schema['categorical']
+            numeric_columns = schema['numeric']
             
             if categorical_columns and len(numeric_columns) >= 1:
                 col1, col2, col3 = st.columns(3)
@@ -572,6 +616,7 @@ if st.session_state.data is not None:
                 
                 with col3:
                     # Layout settings
+                    df = get_working_sample(source, columns=[facet_column, x_column, y_column])
                     max_cats = df[facet_column].nunique()
                     n_cols = st.slider("Number of columns in layout:", 1, 4, min(2, max_cats))
                     
@@ -666,9 +711,9 @@ if st.session_state.data is not None:
             st.subheader("Create a Custom Visualization")
             
             # Get available columns by type
-            numeric_columns = df.select_dtypes(include=[np.number]).columns.tolist()
-            categorical_columns = df.select_dtypes(include=['object', 'category']).columns.tolist()
-            datetime_columns = df.select_dtypes(include=['datetime64']).columns.tolist()
+            numeric_columns = schema['numeric']
+            categorical_columns = schema['categorical']
+            datetime_columns = schema['datetime']
             
             # User selects what type of plot to create
             plot_lib = st.radio(
@@ -708,6 +753,7 @@ if st.session_state.data is not None:
                         color_by = None
                 
                 # Create the plot
+                df = get_working_sample(source, columns=[x_column, y_column, color_by])
                 if plot_lib == "Matplotlib/Seaborn":
                     import seaborn as sns
                     
@@ -782,6 +828,7 @@ if st.session_state.data is not None:
                 
                 # Create the plot
                 if x_column and y_column:
+                    df = get_working_sample(source, columns=[x_column, y_column, group_by])
                     if plot_lib == "Matplotlib/Seaborn":
                         import seaborn as sns
                         
@@ -838,6 +885,7 @@ if st.session_state.data is not None:
                 
                 # Create the plot
                 if hist_column:
+                    df = get_working_sample(source, columns=[hist_column, color_by])
                     if plot_lib == "Matplotlib/Seaborn":
                         import seaborn as sns
                         
@@ -867,7 +915,7 @@ if st.session_state.data is not None:
                         st.plotly_chart(fig, use_container_width=True)
             
             elif custom_plot_type == "Heatmap":
-                numeric_columns = df.select_dtypes(include=[np.number]).columns.tolist()
+                numeric_columns = schema['numeric']
                 
                 if len(numeric_columns) >= 2:
                     st.write("**Correlation Heatmap Settings**")
@@ -898,8 +946,9 @@ if st.session_state.data is not None:
                     
                     # Create the plot
                     if corr_columns and len(corr_columns) >= 2:
+                        df = get_working_sample(source, columns=corr_columns)
                         # Calculate correlation matrix
-                        corr_matrix = df[corr_columns].corr(method=corr_method)
+                        corr_matrix = compute_correlation_matrix(df, corr_columns, method=corr_method)
                         
                         if plot_lib == "Matplotlib/Seaborn":
                             import seaborn as sns
@@ -936,7 +985,7 @@ if st.session_state.data is not None:
                     st.warning("Need at least two numeric columns for a heatmap")
             
             elif custom_plot_type == "Pair Plot":
-                numeric_columns = df.select_dtypes(include=[np.number]).columns.tolist()
+                numeric_columns = schema['numeric']
                 
                 if len(numeric_columns) >= 2:
                     col1, col2 = st.columns(2)
@@ -963,6 +1012,7 @@ if st.session_state.data is not None:
                     
                     # Create the plot
                     if pair_columns and len(pair_columns) >= 2:
+                        df = get_working_sample(source, columns=pair_columns + [hue_column])
                         if plot_lib == "Matplotlib/Seaborn":
                             import seaborn as sns
                             
@@ -1025,8 +1075,8 @@ if st.session_state.data is not None:
         
         if interactive_viz_type == "Interactive Scatter":
             # Get columns for scatter plot
-            numeric_columns = df.select_dtypes(include=[np.number]).columns.tolist()
-            categorical_columns = df.select_dtypes(include=['object', 'category']).columns.tolist()
+            numeric_columns = schema['numeric']
+            categorical_columns = schema['categorical']
             
             if len(numeric_columns) >= 2:
                 col1, col2 = st.columns(2)
@@ -1059,6 +1109,7 @@ if st.session_state.data is not None:
                 
                 # Create the plot
                 if x_column and y_column:
+                    df = get_working_sample(source, columns=[x_column, y_column, color_by, size_by])
                     fig = create_plotly_scatter(
                         df, x_column, y_column, color=color_by, size=size_by,
                         title=f"Interactive Scatter Plot: {x_column} vs {y_column}"
@@ -1067,11 +1118,8 @@ if st.session_state.data is not None:
                     
                     # Show trend line option
                     if st.checkbox("Add trend line", key="i_scatter_trend"):
-                        import plotly.express as px
-                        
-                        trend_fig = px.scatter(
-                            df, x=x_column, y=y_column, color=color_by, size=size_by,
-                            trendline="ols",
+                        trend_fig = create_plotly_scatter_with_trendline(
+                            df, x_column, y_column, color=color_by, size=size_by,
                             title=f"Scatter Plot with Trend Line: {x_column} vs {y_column}"
                         )
                         
@@ -1079,21 +1127,21 @@ if st.session_state.data is not None:
                         
                         # Show regression details
                         if st.checkbox("Show regression details", key="i_scatter_reg_details"):
-                            import statsmodels.api as sm
+                            fit = fit_ols_by_group(df, x_column, y_column).get('All')
                             
-                            X = sm.add_constant(df[x_column])
-                            y = df[y_column]
-                            model = sm.OLS(y, X).fit()
-                            
-                            st.text(model.summary().tables[1].as_text())
+                            if fit is not None:
+                                st.dataframe(get_coefficient_table(fit, x_column), use_container_width=True)
+                                st.write(f"R²: {fit['r_squared']:.4f}, Adjusted R²: {fit['adj_r_squared']:.4f} (n = {fit['n']})")
+                            else:
+                                st.warning("Not enough variation in the data to fit a regression line")
             else:
                 st.warning("Need at least two numeric columns for a scatter plot")
         
         elif interactive_viz_type == "Interactive Line":
             # Get columns for line chart
-            numeric_columns = df.select_dtypes(include=[np.number]).columns.tolist()
-            all_columns = df.columns.tolist()
-            categorical_columns = df.select_dtypes(include=['object', 'category']).columns.tolist()
+            numeric_columns = schema['numeric']
+            all_columns = schema['columns']
+            categorical_columns = schema['categorical']
             
             if numeric_columns:
                 col1, col2 = st.columns(2)
@@ -1124,6 +1172,7 @@ if st.session_state.data is not None:
                 
                 # Create the plot
                 if x_column and y_columns:
+                    df = get_working_sample(source, columns=[x_column] + y_columns + [color_by])
                     # Sort by x column if it's a datetime or numeric for proper line connection
                     try:
                         if pd.api.types.is_datetime64_any_dtype(df[x_column]) or pd.api.types.is_numeric_dtype(df[x_column]):
@@ -1165,8 +1214,8 @@ if st.session_state.data is not None:
         
         elif interactive_viz_type == "Interactive Bar":
             # Get columns for bar chart
-            categorical_columns = df.select_dtypes(include=['object', 'category']).columns.tolist()
-            numeric_columns = df.select_dtypes(include=[np.number]).columns.tolist()
+            categorical_columns = schema['categorical']
+            numeric_columns = schema['numeric']
             
             if categorical_columns:
                 col1, col2 = st.columns(2)
@@ -1203,6 +1252,7 @@ if st.session_state.data is not None:
                 
                 # Create the plot
                 if x_column:
+                    df = get_working_sample(source, columns=[x_column, y_column, color_by])
                     # Check if too many categories
                     n_categories = df[x_column].nunique()
                     if n_categories > 15:
@@ -1245,8 +1295,8 @@ if st.session_state.data is not None:
         
         elif interactive_viz_type == "Interactive Histogram":
             # Get columns for histogram
-            numeric_columns = df.select_dtypes(include=[np.number]).columns.tolist()
-            categorical_columns = df.select_dtypes(include=['object', 'category']).columns.tolist()
+            numeric_columns = schema['numeric']
+            categorical_columns = schema['categorical']
             
             if numeric_columns:
                 col1, col2 = st.columns(2)
@@ -1278,6 +1328,7 @@ if st.session_state.data is not None:
                 
                 # Create the plot
                 if hist_column:
+                    df = get_working_sample(source, columns=[hist_column, color_by])
                     import plotly.express as px
                     
                     # Create histogram with optional grouping
@@ -1315,8 +1366,8 @@ if st.session_state.data is not None:
         
         elif interactive_viz_type == "Interactive Box Plot":
             # Get columns for box plot
-            numeric_columns = df.select_dtypes(include=[np.number]).columns.tolist()
-            categorical_columns = df.select_dtypes(include=['object', 'category']).columns.tolist()
+            numeric_columns = schema['numeric']
+            categorical_columns = schema['categorical']
             
             col1, col2 = st.columns(2)
             
@@ -1351,14 +1402,19 @@ if st.session_state.data is not None:
             
             # Create the plot
             if y_column:
-                fig = create_plotly_box(
-                    df, x_column, y_column, color=color_by,
-                    title=f"Box Plot of {y_column}" + (f" by {x_column}" if x_column else "")
-                )
-                
-                # Update to show points or not
-                if not show_points:
-                    fig.update_traces(boxpoints=False)
+                df = get_working_sample(source, columns=[y_column, x_column, color_by])
+                if not show_points and not x_column and not color_by:
+                    # Ungrouped boxes without points can be drawn from the quantile sketch
+                    fig = create_plotly_sketch_box(df, y_column, title=f"Box Plot of {y_column}")
+                else:
+                    fig = create_plotly_box(
+                        df, x_column, y_column, color=color_by,
+                        title=f"Box Plot of {y_column}" + (f" by {x_column}" if x_column else "")
+                    )
+                    
+                    # Update to show points or not
+                    if not show_points:
+                        fig.update_traces(boxpoints=False)
                 
                 st.plotly_chart(fig, use_container_width=True)
             else:
@@ -1366,7 +1422,7 @@ if st.session_state.data is not None:
         
         elif interactive_viz_type == "Interactive Heatmap":
             # Get columns for heatmap
-            numeric_columns = df.select_dtypes(include=[np.number]).columns.tolist()
+            numeric_columns = schema['numeric']
             
             if len(numeric_columns) >= 2:
                 col1, col2 = st.columns(2)
@@ -1394,6 +1450,7 @@ if st.session_state.data is not None:
                 
                 # Create the plot
                 if selected_columns and len(selected_columns) >= 2:
+                    df = get_working_sample(source, columns=selected_columns)
                     fig = create_plotly_heatmap(
                         df, selected_columns, method=corr_method,
                         title=f"{corr_method.capitalize()} Correlation Heatmap"
@@ -1406,7 +1463,7 @@ if st.session_state.data is not None:
                     
                     # Show correlation matrix as a table
                     if st.checkbox("Show correlation matrix as table", key="i_heatmap_table"):
-                        corr_matrix = df[selected_columns].corr(method=corr_method).round(2)
+                        corr_matrix = compute_correlation_matrix(df, selected_columns, method=corr_method).round(2)
                         st.dataframe(corr_matrix.style.background_gradient(cmap='RdBu_r'), use_container_width=True)
             else:
                 st.warning("Need at least two numeric columns for a heatmap")
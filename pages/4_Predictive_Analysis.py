@@ -7,6 +7,13 @@ from utils.ml_models import (
     evaluate_regression_model, evaluate_classification_model,
     plot_regression_results, plot_feature_importance, get_model_prediction
 )
+from utils.data_processor import get_working_sample, WORKING_SAMPLE_ROWS
+from utils.dataset_cache import get_schema
+from utils.out_of_core import is_out_of_core
+from utils.sampling import get_exploration_data, sampling_badge
+from utils.ingest_jobs import collect_finished_jobs
+from utils.folder_watch import show_folder_watch
+from utils.session_memory import show_session_memory
 
 # Set page configuration
 st.set_page_config(
@@ -36,6 +43,13 @@ if 'test_predictions' not in st.session_state:
 if 'feature_importance' not in st.session_state:
     st.session_state.feature_importance = None
 
+# Pick up datasets from background loads that finished since the last run, and follow a watched folder
+collect_finished_jobs()
+show_folder_watch()
+
+# Account for the session's memory, moving cold objects to disk past the limit
+show_session_memory()
+
 # Function to reset model state
 def reset_model_state():
     st.session_state.model = None
@@ -67,7 +81,21 @@ st.write("Build and evaluate machine learning models to make predictions")
 
 # Check if data is loaded
 if st.session_state.data is not None:
-    df = st.session_state.data
+    full_df = st.session_state.data
+    
+    # Model setup explores the sample; training replays on the full data
+    source = get_exploration_data(full_df)
+    badge = sampling_badge(full_df, source)
+    if badge:
+        st.markdown(badge)
+    
+    # Out-of-core datasets are represented by an in-memory sample on this page
+    if is_out_of_core(full_df):
+        st.info(f"Out-of-core dataset: models are trained on a random sample of {min(WORKING_SAMPLE_ROWS, len(full_df)):,} of {len(full_df):,} rows, loading only the target and feature columns")
+    
+    # Column lists come from cached schema metadata; data is loaded per selected column
+    schema = get_schema(source)
+    df = source
     
     # Create tabs for different stages of predictive analysis
     pred_tabs = st.tabs([
@@ -89,10 +117,12 @@ if st.session_state.data is not None:
             # Select target variable
             target_column = st.selectbox(
                 "Select target variable (what you want to predict):",
-                options=df.columns.tolist()
+                options=schema['columns']
             )
             
             if target_column:
+                df = get_working_sample(source, columns=[target_column])
+                
                 # Determine if classification or regression based on target column
                 is_classification = is_categorical(df, target_column)
                 
@@ -131,7 +161,7 @@ if st.session_state.data is not None:
             st.subheader("Feature Selection")
             
             # Automatically exclude the target column from feature options
-            feature_options = [col for col in df.columns if col != target_column]
+            feature_options = [col for col in schema['columns'] if col != target_column]
             
             selected_features = st.multiselect(
                 "Select features to include in the model:",
@@ -243,14 +273,16 @@ if st.session_state.data is not None:
             # Prepare data button
             if st.button("Prepare Data for Modeling", key="prepare_data"):
                 with st.spinner("Preparing data..."):
+                    training_df = get_working_sample(full_df, columns=[target_column] + selected_features)
+                    
                     # Identify categorical features
-                    categorical_columns = [col for col in selected_features if is_categorical(df, col)]
+                    categorical_columns = [col for col in selected_features if is_categorical(training_df, col)]
                     
                     # Prepare data for machine learning
                     test_size_frac = test_size / 100.0  # Convert percentage to fraction
                     
                     X_train, X_test, y_train, y_test, feature_names, preprocessor = prepare_data_for_ml(
-                        df, 
+                        training_df, 
                         target_column=target_column,
                         feature_columns=selected_features,
                         categorical_columns=categorical_columns,
@@ -629,9 +661,10 @@ if st.session_state.data is not None:
                         # Numerical feature
                         # Try to get the range from the original data
                         try:
-                            min_val = float(df[feature].min())
-                            max_val = float(df[feature].max())
-                            mean_val = float(df[feature].mean())
+                            values = get_working_sample(source, columns=[feature])[feature]
+                            min_val = float(values.min())
+                            max_val = float(values.max())
+                            mean_val = float(values.mean())
                             
                             value = cols[col_idx].slider(
                                 f"{feature}:",
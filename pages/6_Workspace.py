@@ -0,0 +1,291 @@
+import streamlit as st
+import numpy as np
+from utils.data_loader import SUPPORTED_EXTENSIONS, read_uploaded_file
+from utils.sql_engine import TABLE_NAME, MAX_RESULT_ROWS, get_database, ensure_indexes, get_indexes, run_query
+from utils.workspace import (
+    JOIN_TYPES, init_workspace, add_dataset, remove_dataset, get_workspace_summary,
+    get_join_cardinality, get_join, schema_differences, concat_datasets
+)
+from utils.ingest_jobs import collect_finished_jobs
+from utils.folder_watch import show_folder_watch
+from utils.session_memory import show_session_memory
+
+# Set page configuration
+st.set_page_config(
+    page_title="Workspace",
+    page_icon="🗂️",
+    layout="wide",
+    initial_sidebar_state="expanded"
+)
+
+# Initialize session state variables if they don't exist
+if 'data' not in st.session_state:
+    st.session_state.data = None
+if 'uploaded_file_name' not in st.session_state:
+    st.session_state.uploaded_file_name = None
+init_workspace()
+
+# Pick up datasets from background loads that finished since the last run, and follow a watched folder
+collect_finished_jobs()
+show_folder_watch()
+
+# Account for the session's memory, moving cold objects to disk past the limit
+show_session_memory()
+
+# Keep the active dataset in the workspace
+if st.session_state.data is not None and st.session_state.uploaded_file_name not in st.session_state.datasets:
+    add_dataset(st.session_state.uploaded_file_name or "active dataset", st.session_state.data)
+
+# Page title and description
+st.title("🗂️ Workspace")
+st.write("Hold several named datasets, then join or stack them into new ones")
+
+workspace_tabs = st.tabs([
+    "Datasets",
+    "Join",
+    "Concatenate",
+    "SQL Query"
+])
+
+# Tab 1: Datasets
+with workspace_tabs[0]:
+    st.header("Datasets")
+
+    uploaded_files = st.file_uploader(
+        "Add CSV, Excel, or JSON files to the workspace",
+        type=SUPPORTED_EXTENSIONS,
+        help="Compressed (.gz, .zst) and zipped files are decompressed while loading",
+        accept_multiple_files=True
+    )
+
+    if st.button("Add to Workspace"):
+        if uploaded_files:
+            with st.spinner("Loading files..."):
+                for uploaded_file in uploaded_files:
+                    try:
+                        add_dataset(uploaded_file.name, read_uploaded_file(uploaded_file))
+                        st.success(f"✅ Added '{uploaded_file.name}'")
+                    except Exception as e:
+                        st.error(f"Error loading '{uploaded_file.name}': {str(e)}")
+        else:
+            st.error("Please upload at least one file first!")
+
+    summary = get_workspace_summary()
+
+    if summary.empty:
+        st.info("The workspace is empty. Upload files above or load data on the Home page.")
+    else:
+        st.dataframe(summary, use_container_width=True)
+
+        selected_dataset = st.selectbox("Select a dataset:", options=summary['Dataset'].tolist())
+        st.dataframe(st.session_state.datasets[selected_dataset].head(10), use_container_width=True)
+
+        col1, col2 = st.columns(2)
+
+        with col1:
+            if st.button("Set as Active Dataset", use_container_width=True):
+                st.session_state.data = st.session_state.datasets[selected_dataset]
+                st.session_state.uploaded_file_name = selected_dataset
+                st.session_state.upload_status = "success"
+                st.session_state.data_cleaned = False
+                st.success(f"✅ '{selected_dataset}' is now used on all analysis pages")
+
+        with col2:
+            if st.button("Remove from Workspace", use_container_width=True):
+                remove_dataset(selected_dataset)
+                st.rerun()
+
+# Tab 2: Join
+with workspace_tabs[1]:
+    st.header("Join Datasets")
+
+    dataset_names = list(st.session_state.datasets.keys())
+
+    if not dataset_names:
+        st.warning("Add datasets to the workspace to join them")
+    else:
+        col1, col2 = st.columns(2)
+
+        with col1:
+            left_name = st.selectbox("Left dataset:", options=dataset_names, key="join_left")
+            left_df = st.session_state.datasets[left_name]
+            left_on = st.multiselect("Left key columns:", options=left_df.columns.tolist(), key="join_left_on")
+
+        with col2:
+            right_name = st.selectbox(
+                "Right dataset:",
+                options=dataset_names,
+                index=min(1, len(dataset_names) - 1),
+                key="join_right"
+            )
+            right_df = st.session_state.datasets[right_name]
+            right_on = st.multiselect(
+                "Right key columns:",
+                options=right_df.columns.tolist(),
+                default=[col for col in left_on if col in right_df.columns],
+                key="join_right_on"
+            )
+
+        how = st.radio("Join type:", JOIN_TYPES, horizontal=True)
+
+        if not left_on or len(left_on) != len(right_on):
+            st.info("Select the same number of key columns on both sides")
+        else:
+            try:
+                # Report the size of the join before building it
+                cardinality = get_join_cardinality(left_df, right_df, left_on, right_on)
+
+                col1, col2, col3, col4 = st.columns(4)
+                col1.metric("Left rows", f"{cardinality['left_rows']:,}")
+                col2.metric("Right rows", f"{cardinality['right_rows']:,}")
+                col3.metric("Matched keys", f"{cardinality['matched_keys']:,}")
+                col4.metric("Result rows", f"{cardinality[how]:,}")
+
+                st.write(f"**Key relationship:** {cardinality['relationship']}")
+
+                if cardinality[how] > 10 * max(cardinality['left_rows'], cardinality['right_rows'], 1):
+                    st.warning(
+                        "This many-to-many join produces far more rows than its inputs. "
+                        "Check that the key columns uniquely identify rows on at least one side."
+                    )
+
+                result_name = st.text_input("Name for the joined dataset:", value=f"{left_name} ⋈ {right_name}")
+
+                if st.button("Run Join"):
+                    with st.spinner("Joining datasets..."):
+                        joined = get_join(left_df, right_df, left_on, right_on, how)
+
+                    add_dataset(result_name, joined)
+                    st.success(f"✅ Added '{result_name}' with {len(joined):,} rows to the workspace")
+                    st.dataframe(joined.head(10), use_container_width=True)
+            except Exception as e:
+                st.error(f"Error joining datasets: {str(e)}")
+
+# Tab 3: Concatenate
+with workspace_tabs[2]:
+    st.header("Concatenate Datasets")
+    st.write("Stack datasets that share the same columns, such as monthly exports of one table")
+
+    dataset_names = list(st.session_state.datasets.keys())
+
+    selected_datasets = st.multiselect(
+        "Select datasets to concatenate:",
+        options=dataset_names,
+        key="concat_datasets"
+    )
+
+    if len(selected_datasets) < 2:
+        st.info("Select at least two datasets")
+    else:
+        frames = {name: st.session_state.datasets[name] for name in selected_datasets}
+        differences = schema_differences(frames)
+
+        if differences:
+            st.error("The selected datasets do not share the same columns:")
+            for difference in differences:
+                st.write(f"- {difference}")
+        else:
+            add_source = st.checkbox("Add a column recording each row's source dataset", value=True)
+            source_column = st.text_input("Source column name:", value="source") if add_source else None
+            result_name = st.text_input("Name for the combined dataset:", value="combined")
+
+            if st.button("Concatenate"):
+                try:
+                    with st.spinner("Concatenating datasets..."):
+                        combined = concat_datasets(frames, source_column)
+
+                    add_dataset(result_name, combined)
+                    st.success(f"✅ Added '{result_name}' with {len(combined):,} rows to the workspace")
+                    st.dataframe(combined.head(10), use_container_width=True)
+                except Exception as e:
+                    st.error(f"Error concatenating datasets: {str(e)}")
+
+# Tab 4: SQL Query
+with workspace_tabs[3]:
+    st.header("SQL Query")
+
+    if st.session_state.data is None:
+        st.warning("⚠️ Please load or activate a dataset first")
+    else:
+        df = st.session_state.data
+        st.write(f"Query the active dataset as the table `{TABLE_NAME}` with SQLite syntax")
+
+        on_disk = st.checkbox(
+            "Keep the database in a temporary file instead of memory",
+            help="Useful for datasets that are large compared to the available memory"
+        )
+
+        try:
+            # Loaded once per dataset version; later queries reuse the same database
+            with st.spinner("Loading the dataset into SQLite..."):
+                connection = get_database(df, on_disk)
+        except Exception as e:
+            st.error(f"Error loading the dataset into SQLite: {str(e)}")
+            connection = None
+
+        if connection is not None:
+            index_columns = st.multiselect(
+                "Index columns (speeds up filters and joins on them):",
+                options=df.columns.tolist(),
+                default=get_indexes(connection),
+                key="sql_index_columns"
+            )
+
+            if index_columns:
+                with st.spinner("Building indexes..."):
+                    ensure_indexes(connection, index_columns)
+
+            query = st.text_area(
+                "SQL query:",
+                value=f"SELECT * FROM {TABLE_NAME} LIMIT 100",
+                height=150
+            )
+
+            if st.button("Run Query"):
+                try:
+                    with st.spinner("Running query..."):
+                        result, truncated = run_query(connection, query)
+
+                    st.session_state.sql_result = result
+                    st.session_state.sql_truncated = truncated
+                except Exception as e:
+                    st.error(f"Error running query: {str(e)}")
+                    st.info("Only read-only SELECT statements are allowed.")
+
+            result = st.session_state.get('sql_result')
+
+            if result is not None:
+                if st.session_state.get('sql_truncated'):
+                    st.warning(f"Showing the first {MAX_RESULT_ROWS:,} rows of the result")
+
+                st.write(f"**{len(result):,} rows × {len(result.columns)} columns**")
+
+                # Paginated viewer
+                col1, col2 = st.columns(2)
+
+                with col1:
+                    page_size = st.selectbox("Rows per page:", options=[25, 50, 100, 500], index=2)
+
+                n_pages = max(1, int(np.ceil(len(result) / page_size)))
+
+                with col2:
+                    page = st.number_input(f"Page (of {n_pages}):", min_value=1, max_value=n_pages, value=1, step=1)
+
+                start = (page - 1) * page_size
+                st.dataframe(result.iloc[start:start + page_size], use_container_width=True)
+
+                col1, col2 = st.columns(2)
+
+                with col1:
+                    st.download_button(
+                        label="Download Result as CSV",
+                        data=result.to_csv(index=False).encode('utf-8'),
+                        file_name="query_result.csv",
+                        mime="text/csv"
+                    )
+
+                with col2:
+                    result_name = st.text_input("Name for the result dataset:", value="query result")
+                    if st.button("Add Result to Workspace"):
+                        add_dataset(result_name, result)
+                        st.success(f"✅ Added '{result_name}' to the workspace")
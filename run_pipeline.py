@@ -0,0 +1,37 @@
+"""
+Run a saved DataVizPro pipeline without the web app
+
+Usage:
+    python run_pipeline.py pipeline.json --input data.csv --output-dir results
+
+Pipelines are downloaded from the Data Cleaning page (or written by hand);
+see utils/pipeline.py for the steps they can hold.
+"""
+import argparse
+import logging
+import sys
+from utils.pipeline import load_pipeline, run_pipeline
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run a saved DataVizPro pipeline end to end")
+    parser.add_argument('pipeline', help="pipeline JSON file")
+    parser.add_argument('--input', help="data file to run the pipeline on (instead of the pipeline's 'load' step)")
+    parser.add_argument('--output-dir', default='pipeline_output', help="directory for the written files (default: pipeline_output)")
+    parser.add_argument('--out-of-core', action='store_true', help="store the input as partitioned Parquet on disk and process it chunk by chunk")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format='%(levelname)s %(message)s')
+
+    try:
+        pipeline = load_pipeline(args.pipeline)
+        written = run_pipeline(pipeline, args.output_dir, args.input, args.out_of_core)
+    except (OSError, ValueError) as e:
+        logging.getLogger('datavizpro').error(str(e))
+        return 1
+
+    for path in written:
+        print(path)
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,19 @@
+import pandas as pd
+from utils.categorical_sketch import build_profile, estimate_distinct, profile_column, top_values
+
+def test_unused_categories_are_not_profiled():
+    values = pd.Series(pd.Categorical(['a', 'b', 'a', None], categories=['a', 'b', 'c']))
+
+    profile = build_profile(values)
+
+    assert estimate_distinct(profile) == values.nunique() == 2
+    assert set(top_values(profile)['value']) == {'a', 'b'}
+    assert profile['n'] == 3 and profile['nulls'] == 1
+
+def test_profile_matches_value_counts():
+    df = pd.DataFrame({'city': ['x', 'y', 'x', 'z', 'x', 'y', None]})
+
+    top = top_values(profile_column(df, 'city'))
+
+    expected = df['city'].value_counts()
+    assert dict(zip(top['value'], top['count'])) == expected.to_dict()
@@ -0,0 +1,72 @@
+import numpy as np
+import pandas as pd
+import utils.correlation as correlation
+from utils.correlation import kendall_corr_matrix, top_correlated_pairs
+
+def _offset_frame(offset=1e9, n=2000, seed=0):
+    rng = np.random.default_rng(seed)
+    base = rng.normal(size=n)
+    df = pd.DataFrame({
+        'a': base,
+        'b': base + rng.normal(scale=0.5, size=n),
+        'c': rng.normal(size=n),
+        'd': rng.normal(size=n),
+        'e': -base + rng.normal(scale=2.0, size=n)
+    }) + offset
+    df.iloc[::7, 1] = np.nan
+    df.iloc[::11, 3] = np.nan
+    return df
+
+def _expected_pairs(df):
+    corr = df.corr()
+    names = corr.columns
+    return {
+        (names[i], names[j]): corr.iloc[i, j]
+        for i in range(len(names)) for j in range(i + 1, len(names))
+    }
+
+def test_top_pairs_match_pandas_on_offset_data():
+    df = _offset_frame()
+    expected = _expected_pairs(df)
+
+    pairs = top_correlated_pairs(df, k=len(expected), block_size=2)
+
+    assert len(pairs) == len(expected)
+    for _, row in pairs.iterrows():
+        assert np.isclose(row['Correlation'], expected[(row['Feature 1'], row['Feature 2'])], atol=1e-9)
+
+def test_top_pairs_keep_the_strongest_pairs_on_offset_data():
+    df = _offset_frame()
+    expected = _expected_pairs(df)
+    strongest = sorted(expected, key=lambda pair: abs(expected[pair]), reverse=True)[:3]
+
+    pairs = top_correlated_pairs(df, k=3)
+
+    assert list(zip(pairs['Feature 1'], pairs['Feature 2'])) == strongest
+
+def _expected_top(corr, k):
+    pairs = {
+        (corr.columns[i], corr.columns[j]): corr.iloc[i, j]
+        for i in range(len(corr.columns)) for j in range(i + 1, len(corr.columns))
+    }
+    return sorted(pairs.items(), key=lambda item: abs(item[1]), reverse=True)[:k]
+
+def test_spearman_pairs_match_pandas_with_missing_values():
+    df = _offset_frame(offset=0.0)
+    df.iloc[np.random.default_rng(2).random(len(df)) < 0.3, 0] = np.nan
+    expected = dict(_expected_top(df.corr(method='spearman'), 10))
+
+    pairs = top_correlated_pairs(df, k=10, method='spearman', block_size=2)
+
+    for _, row in pairs.iterrows():
+        assert np.isclose(row['Correlation'], expected[(row['Feature 1'], row['Feature 2'])], atol=1e-12)
+
+def test_kendall_pairs_match_the_matrix_in_a_process_pool(monkeypatch):
+    monkeypatch.setattr(correlation, 'PARALLEL_WORK_THRESHOLD', 0)
+    df = _offset_frame(n=300)
+    expected = _expected_top(kendall_corr_matrix(df, max_workers=1), 10)
+
+    pairs = top_correlated_pairs(df, k=10, method='kendall', block_size=2, max_workers=2)
+
+    assert list(zip(pairs['Feature 1'], pairs['Feature 2'])) == [pair for pair, _ in expected]
+    assert np.allclose(pairs['Correlation'], [tau for _, tau in expected])
@@ -0,0 +1,33 @@
+import io
+import json
+import pytest
+from utils.data_loader import _iter_json_records
+
+# Floats and exponents whose text may be cut after '.', 'e'/'E' or the exponent sign
+FLOAT_ARRAY = b'[1, 2.5e3 ,"x", -0.125, 6E-2, 7.0e+1, {"a": 1.5, "b": [3e2]}, 4.75]'
+
+class _SplitStream(io.BytesIO):
+    """Stream whose first read ends at a given offset"""
+
+    def __init__(self, content, split):
+        super().__init__(content)
+        self.split = split
+
+    def read(self, size=-1):
+        if self.split is not None:
+            size, self.split = self.split, None
+        return super().read(size)
+
+@pytest.mark.parametrize('split', range(1, len(FLOAT_ARRAY)))
+def test_array_split_at_any_offset_loads(split):
+    stream = _SplitStream(FLOAT_ARRAY, split)
+
+    assert list(_iter_json_records(stream, block_size=1024)) == json.loads(FLOAT_ARRAY)
+
+@pytest.mark.parametrize('block_size', [1, 2, 3, 5, 7])
+def test_array_read_in_small_blocks_loads(block_size):
+    assert list(_iter_json_records(io.BytesIO(FLOAT_ARRAY), block_size)) == json.loads(FLOAT_ARRAY)
+
+def test_invalid_array_is_rejected():
+    with pytest.raises(ValueError):
+        list(_iter_json_records(io.BytesIO(b'[1, 2x, 3]'), block_size=2))
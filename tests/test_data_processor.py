@@ -0,0 +1,31 @@
+import numpy as np
+import pandas as pd
+from utils.categorical_sketch import get_column_profile, is_exact
+from utils.data_processor import handle_missing_values
+from utils.out_of_core import write_partitioned
+
+def _out_of_core(df, rows_per_chunk):
+    return write_partitioned(
+        (df.iloc[i:i + rows_per_chunk] for i in range(0, len(df), rows_per_chunk)),
+        row_group_size=rows_per_chunk
+    )
+
+def test_out_of_core_mode_fill_matches_series_mode_on_high_cardinality():
+    rng = np.random.default_rng(0)
+    values = rng.integers(0, 50_000, 200_000).astype(str).astype(object)
+    values[rng.random(len(values)) < 0.1] = None
+    df = pd.DataFrame({'c': values})
+    data = _out_of_core(df, 50_000)
+    assert not is_exact(get_column_profile(data, 'c'))
+
+    filled = handle_missing_values(data, 'fill_mode', ['c']).to_pandas()
+
+    assert filled['c'].notna().all()
+    assert (filled.loc[df['c'].isna(), 'c'] == df['c'].mode()[0]).all()
+
+def test_out_of_core_mode_fill_breaks_ties_like_series_mode():
+    df = pd.DataFrame({'c': ['b', 'a', 'a', 'b', None]})
+
+    filled = handle_missing_values(_out_of_core(df, 2), 'fill_mode', ['c']).to_pandas()
+
+    assert filled['c'].tolist() == ['b', 'a', 'a', 'b', df['c'].mode()[0]]
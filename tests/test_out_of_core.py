@@ -0,0 +1,92 @@
+import gc
+import io
+import os
+import numpy as np
+import pandas as pd
+import utils.out_of_core as out_of_core
+import utils.schema_registry as schema_registry
+from utils.data_loader import read_uploaded_file
+from utils.out_of_core import ingest_csv, map_chunks, open_parquet, write_partitioned
+
+class _Upload(io.BytesIO):
+    """In-memory upload with a file name, like a Streamlit UploadedFile"""
+
+    def __init__(self, content, name):
+        super().__init__(content)
+        self.name = name
+
+# A text column left empty for the first row group is read as numbers, so the second chunk widens it
+def _late_text_csv(n=1_200_000, filled_from=600_000):
+    df = pd.DataFrame({'a': np.arange(n), 't': [None] * filled_from + ['x'] * (n - filled_from)})
+    return df, df.to_csv(index=False).encode('utf-8')
+
+def test_widening_pass_rereads_an_upload():
+    df, content = _late_text_csv()
+    upload = _Upload(content, 'data.csv')
+
+    data = ingest_csv(upload)
+
+    assert not upload.closed
+    assert len(data) == len(df)
+    assert data.to_pandas()['t'].notna().sum() == df['t'].notna().sum()
+
+def test_uploaded_csv_with_late_text_loads_out_of_core(tmp_path, monkeypatch):
+    monkeypatch.setattr(schema_registry, 'REGISTRY_PATH', str(tmp_path / 'registry.json'))
+    df, content = _late_text_csv()
+
+    data = read_uploaded_file(_Upload(content, 'data.csv'), out_of_core=True)
+
+    loaded = data.to_pandas()
+    assert loaded['a'].tolist() == df['a'].tolist()
+    assert loaded['t'].tolist()[-1] == 'x'
+
+def test_stored_files_are_deleted_with_their_dataset():
+    data = write_partitioned([pd.DataFrame({'a': range(10)})])
+    filled = map_chunks(data, lambda chunk: chunk.fillna(0))
+    paths = [data.path, filled.path]
+    assert all(os.path.exists(path) for path in paths)
+
+    del data, filled
+    gc.collect()
+
+    assert not any(os.path.exists(path) for path in paths)
+
+def test_opened_parquet_files_are_kept(tmp_path):
+    path = str(tmp_path / 'data.parquet')
+    pd.DataFrame({'a': range(10)}).to_parquet(path)
+
+    data = open_parquet(path)
+    data['a']
+    del data
+    gc.collect()
+
+    assert os.path.exists(path)
+
+def test_sweep_removes_files_of_ended_processes(tmp_path, monkeypatch):
+    monkeypatch.setattr(out_of_core, 'STORAGE_DIR', str(tmp_path))
+    monkeypatch.setattr(out_of_core, '_process_alive', lambda pid: pid == 1)
+    for name in ['process-1', 'process-999999', f"process-{os.getpid()}", 'sheets']:
+        (tmp_path / name).mkdir()
+
+    out_of_core.sweep_stale_storage()
+
+    assert sorted(os.listdir(tmp_path)) == ['process-1', 'sheets']
+
+def test_projections_cache_only_the_requested_columns():
+    df = pd.DataFrame({
+        'i': pd.array([1, None, 3, 4], dtype='Int64'),
+        'f': [0.5, 1.5, np.nan, 2.0],
+        's': ['a', None, 'c', 'd'],
+        'c': pd.Categorical(['x', 'y', 'x', None]),
+        't': pd.to_datetime(['2024-01-01', None, '2024-01-03', '2024-01-04']).tz_localize('UTC')
+    })
+    data = write_partitioned((df.iloc[i:i + 3] for i in range(0, len(df), 3)), row_group_size=3)
+
+    pd.testing.assert_frame_equal(data[['i', 'c']], data.to_pandas()[['i', 'c']])
+    pd.testing.assert_series_equal(data['t'], data.to_pandas()['t'])
+    assert sorted(os.listdir(data._column_dir)) == ['0.arrow', '3.arrow', '4.arrow']
+
+    column_dir = data._column_dir
+    del data
+    gc.collect()
+    assert not os.path.exists(column_dir)
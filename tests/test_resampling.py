@@ -0,0 +1,26 @@
+import tracemalloc
+import numpy as np
+import pytest
+from utils.resampling import bootstrap_ci, bootstrap_distribution
+
+@pytest.mark.parametrize('statistic', ['mean', 'median', 'std', 'skew', 'correlation'])
+def test_batches_in_flight_stay_within_the_memory_budget(statistic):
+    rng = np.random.default_rng(0)
+    values = rng.random((100_000, 2)) if statistic == 'correlation' else rng.random(100_000)
+
+    tracemalloc.start()
+    try:
+        bootstrap_distribution(values, statistic, n_resamples=1000, memory_budget_mb=32, max_workers=4)
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+    assert peak <= 32 * 1024 ** 2
+
+def test_confidence_interval_covers_the_estimate():
+    values = np.random.default_rng(1).normal(loc=5.0, size=500)
+
+    result = bootstrap_ci(values, 'mean', n_resamples=2000)
+
+    assert result['ci_low'] < result['estimate'] < result['ci_high']
+    assert result['estimate'] == pytest.approx(values.mean())
@@ -0,0 +1,12 @@
+import pandas as pd
+import pytest
+from utils.sql_engine import build_database, run_query
+
+@pytest.mark.parametrize('max_rows, rows, truncated', [(9, 9, True), (10, 10, False), (11, 10, False)])
+def test_truncation_is_flagged_only_past_the_limit(max_rows, rows, truncated):
+    connection = build_database(pd.DataFrame({'a': range(10)}))
+
+    result, was_truncated = run_query(connection, "SELECT * FROM data", max_rows=max_rows)
+
+    assert len(result) == rows
+    assert was_truncated is truncated
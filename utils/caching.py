@@ -0,0 +1,63 @@
+import functools
+import inspect
+import threading
+from collections import OrderedDict
+
+# Streamlit's cache is used inside the app; headless runs (CLI, worker processes) cache in process
+try:
+    import streamlit as st
+except ImportError:
+    st = None
+
+def _streamlit_running():
+    return st is not None and st.runtime.exists()
+
+def cache_data(max_entries=None):
+    """
+    Cache a function's results like st.cache_data(show_spinner=False, max_entries=...)
+
+    Inside the app the results go to Streamlit's cache. Without a Streamlit
+    runtime (or without Streamlit installed) they are kept in a per-process
+    least-recently-used cache. Either way, arguments whose names start with
+    an underscore are not part of the key, so functions take a version
+    argument alongside the frame they compute on.
+
+    Parameters:
+    - max_entries: int, results kept per function (None for no limit)
+
+    Returns:
+    - decorator
+    """
+    def decorator(func):
+        # Wrapped for Streamlit on first use inside the app, so headless runs never touch its cache
+        streamlit_cached = None
+        signature = inspect.signature(func)
+        hashed = [name for name in signature.parameters if not name.startswith('_')]
+        entries = OrderedDict()
+        lock = threading.Lock()
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            nonlocal streamlit_cached
+            if _streamlit_running():
+                if streamlit_cached is None:
+                    streamlit_cached = st.cache_data(show_spinner=False, max_entries=max_entries)(func)
+                return streamlit_cached(*args, **kwargs)
+
+            bound = signature.bind(*args, **kwargs)
+            bound.apply_defaults()
+            key = repr([bound.arguments[name] for name in hashed])
+            with lock:
+                if key in entries:
+                    entries.move_to_end(key)
+                    return entries[key]
+
+            result = func(*args, **kwargs)
+            with lock:
+                entries[key] = result
+                while max_entries is not None and len(entries) > max_entries:
+                    entries.popitem(last=False)
+            return result
+
+        return wrapper
+    return decorator
@@ -0,0 +1,235 @@
+import pandas as pd
+import numpy as np
+from utils.caching import cache_data
+from utils.dataset_cache import get_dataset_version, split_append
+from utils.streaming_stats import iter_frame_chunks
+
+# HyperLogLog precision: 2^14 one-byte registers (16 KB, ~0.8% standard error)
+DEFAULT_PRECISION = 14
+
+# Number of values tracked exactly by the heavy-hitter summary
+DEFAULT_CAPACITY = 256
+
+# Count-Min sketch shape
+CMS_WIDTH = 2048
+CMS_DEPTH = 4
+
+# Odd multipliers for the Count-Min row hashes
+_CMS_SEEDS = np.array([0x9E3779B97F4A7C15, 0xC2B2AE3D27D4EB4F, 0x165667B19E3779F9, 0xD6E8FEB86659FD93], dtype=np.uint64)
+
+def _bit_length(values):
+    """Vectorized bit length of uint64 values"""
+    smeared = values.copy()
+    for shift in (1, 2, 4, 8, 16, 32):
+        smeared |= smeared >> np.uint64(shift)
+    return np.bitwise_count(smeared).astype(np.int64)
+
+def _hash_values(values):
+    """64-bit hashes of an array of values"""
+    return pd.util.hash_array(np.asarray(values, dtype=object))
+
+def _reduce_counts(counts, capacity):
+    """
+    Keep at most `capacity` counters, Misra-Gries style
+
+    Returns the reduced counts and the amount subtracted from every counter,
+    which bounds how much any reported count can undercount.
+    """
+    if len(counts) <= capacity:
+        return counts, 0
+
+    ordered = sorted(counts.values(), reverse=True)
+    threshold = ordered[capacity]
+    reduced = {value: count - threshold for value, count in counts.items() if count > threshold}
+    return reduced, threshold
+
+def build_profile(values, precision=DEFAULT_PRECISION, capacity=DEFAULT_CAPACITY):
+    """
+    Profile a chunk of categorical values in one pass
+
+    Parameters:
+    - values: pandas Series (a chunk of a column)
+    - precision: int, HyperLogLog precision p (2^p registers)
+    - capacity: int, number of heavy-hitter counters
+
+    Returns:
+    - dict profile with HyperLogLog registers, heavy-hitter counts,
+      a Count-Min sketch and null/non-null totals
+    """
+    nulls = int(values.isnull().sum())
+    chunk_counts = values.dropna().value_counts(sort=False)
+    # Categorical columns report their unused categories with a count of 0
+    chunk_counts = chunk_counts[chunk_counts > 0]
+
+    registers = np.zeros(2 ** precision, dtype=np.uint8)
+    cms = np.zeros((CMS_DEPTH, CMS_WIDTH), dtype=np.int64)
+
+    if len(chunk_counts):
+        hashes = _hash_values(chunk_counts.index)
+
+        # HyperLogLog: leading bits pick the register, the rest give the rank
+        register_idx = (hashes >> np.uint64(64 - precision)).astype(np.int64)
+        remainder = hashes << np.uint64(precision)
+        rank = np.minimum(64 - _bit_length(remainder) + 1, 64 - precision + 1).astype(np.uint8)
+        np.maximum.at(registers, register_idx, rank)
+
+        # Count-Min: one multiplicative hash per row
+        counts = chunk_counts.to_numpy(dtype=np.int64)
+        for row, seed in enumerate(_CMS_SEEDS[:CMS_DEPTH]):
+            cells = ((hashes * seed) >> np.uint64(40)) % np.uint64(CMS_WIDTH)
+            cms[row] += np.bincount(cells.astype(np.int64), weights=counts, minlength=CMS_WIDTH).astype(np.int64)
+
+    heavy, offset = _reduce_counts(chunk_counts.to_dict(), capacity)
+
+    return {
+        'precision': precision,
+        'capacity': capacity,
+        'registers': registers,
+        'counts': heavy,
+        'offset': offset,
+        'cms': cms,
+        'n': int(chunk_counts.sum()),
+        'nulls': nulls
+    }
+
+def merge_profiles(left, right):
+    """
+    Merge two categorical profiles
+
+    Parameters:
+    - left: dict profile
+    - right: dict profile (same precision and capacity)
+
+    Returns:
+    - dict profile covering both inputs
+    """
+    counts = dict(left['counts'])
+    for value, count in right['counts'].items():
+        counts[value] = counts.get(value, 0) + count
+    counts, threshold = _reduce_counts(counts, left['capacity'])
+
+    return {
+        'precision': left['precision'],
+        'capacity': left['capacity'],
+        'registers': np.maximum(left['registers'], right['registers']),
+        'counts': counts,
+        'offset': left['offset'] + right['offset'] + threshold,
+        'cms': left['cms'] + right['cms'],
+        'n': left['n'] + right['n'],
+        'nulls': left['nulls'] + right['nulls']
+    }
+
+def is_exact(profile):
+    """Whether the heavy-hitter summary still holds every distinct value exactly"""
+    return profile['offset'] == 0 and len(profile['counts']) < profile['capacity']
+
+def estimate_distinct(profile):
+    """
+    Estimate the number of distinct non-null values
+
+    Exact while the heavy-hitter summary is not saturated, HyperLogLog otherwise.
+
+    Parameters:
+    - profile: dict profile
+
+    Returns:
+    - int, distinct count
+    """
+    if is_exact(profile):
+        return len(profile['counts'])
+
+    registers = profile['registers'].astype(float)
+    m = len(registers)
+    alpha = 0.7213 / (1 + 1.079 / m)
+    estimate = alpha * m * m / np.sum(2.0 ** -registers)
+
+    # Small-range correction (linear counting)
+    zeros = int((registers == 0).sum())
+    if estimate <= 2.5 * m and zeros > 0:
+        estimate = m * np.log(m / zeros)
+
+    return int(round(estimate))
+
+def estimate_count(profile, value):
+    """
+    Estimate the frequency of a value from the Count-Min sketch
+
+    Parameters:
+    - profile: dict profile
+    - value: the value to look up
+
+    Returns:
+    - int, estimated count (never below the true count)
+    """
+    hashes = _hash_values([value])
+    estimates = [
+        profile['cms'][row, int((((hashes * seed) >> np.uint64(40)) % np.uint64(CMS_WIDTH))[0])]
+        for row, seed in enumerate(_CMS_SEEDS[:CMS_DEPTH])
+    ]
+    return int(min(estimates))
+
+def top_values(profile, k=20):
+    """
+    Get the most frequent values of a profile
+
+    Parameters:
+    - profile: dict profile
+    - k: int, number of values to return
+
+    Returns:
+    - DataFrame with 'value' and 'count' columns, most frequent first
+    """
+    items = sorted(profile['counts'].items(), key=lambda item: item[1], reverse=True)[:k]
+
+    if is_exact(profile):
+        counts = [count for _, count in items]
+    else:
+        # Summary counts undercount by at most the offset; Count-Min never undercounts
+        counts = [min(estimate_count(profile, value), count + profile['offset']) for value, count in items]
+
+    top = pd.DataFrame({'value': [value for value, _ in items], 'count': counts})
+    return top.sort_values('count', ascending=False, kind='stable').reset_index(drop=True)
+
+def profile_column(df, column, precision=DEFAULT_PRECISION, capacity=DEFAULT_CAPACITY):
+    """
+    Profile a categorical column one chunk at a time at fixed memory cost
+
+    Parameters:
+    - df: pandas DataFrame or OutOfCoreFrame
+    - column: str, column to profile
+    - precision: int, HyperLogLog precision
+    - capacity: int, number of heavy-hitter counters
+
+    Returns:
+    - dict profile
+    """
+    profile = None
+    for chunk in iter_frame_chunks(df, columns=[column]):
+        partial = build_profile(chunk[column], precision, capacity)
+        profile = partial if profile is None else merge_profiles(profile, partial)
+
+    if profile is None:
+        profile = build_profile(pd.Series([], dtype=object), precision, capacity)
+    return profile
+
+@cache_data(max_entries=256)
+def _cached_column_profile(version, column, _df):
+    appended = split_append(version, _df)
+    if appended is not None:
+        # Profile only the new rows and merge them into the earlier version's profile
+        base_version, base, delta = appended
+        return merge_profiles(_cached_column_profile(base_version, column, base), profile_column(delta, column))
+    return profile_column(_df, column)
+
+def get_column_profile(df, column):
+    """
+    Get the categorical profile of a column, cached per dataset version
+
+    Parameters:
+    - df: pandas DataFrame
+    - column: str, column to profile
+
+    Returns:
+    - dict profile
+    """
+    return _cached_column_profile(get_dataset_version(df), column, df)
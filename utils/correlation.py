@@ -0,0 +1,415 @@
+import os
+from contextlib import nullcontext
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from statistics import NormalDist
+import pandas as pd
+import numpy as np
+
+# Below this many (rows x column pairs) the process pool costs more than it saves
+PARALLEL_WORK_THRESHOLD = 2_000_000
+
+# Values matrix shared with pool workers (set once per worker by the initializer)
+_worker_values = None
+
+def _dense_rank(values):
+    """Map values to dense integer ranks 0..m-1"""
+    return np.unique(values, return_inverse=True)[1].astype(np.int64)
+
+def _count_tied_pairs(codes):
+    """Count pairs of equal values in an array of dense ranks"""
+    counts = np.bincount(codes)
+    return int((counts * (counts - 1) // 2).sum())
+
+def _count_inversions(ranks):
+    """
+    Count pairs i < j with ranks[i] > ranks[j] using a bottom-up merge sort
+
+    Each level merges adjacent runs of the previous level. Offsetting every run
+    pair by its index turns the whole level into one sorted array, so the
+    inversions between the left and right halves of every pair can be counted
+    with a single vectorized searchsorted call.
+
+    Parameters:
+    - ranks: numpy array of non-negative integers
+
+    Returns:
+    - int, number of inversions
+    """
+    a = np.asarray(ranks, dtype=np.int64).copy()
+    n = len(a)
+    if n < 2:
+        return 0
+
+    span = int(a.max()) + 1
+    positions = np.arange(n)
+    inversions = 0
+    width = 1
+
+    while width < n:
+        pair_id = positions // (2 * width)
+        keys = pair_id * span + a
+        is_right = (positions // width) % 2 == 1
+
+        left_keys = keys[~is_right]
+        right_keys = keys[is_right]
+        right_pairs = pair_id[is_right]
+
+        # For every right element, count the left elements of the same pair that are larger
+        not_greater = np.searchsorted(left_keys, right_keys, side='right')
+        pair_end = np.searchsorted(left_keys, (right_pairs + 1) * span, side='left')
+        inversions += int((pair_end - not_greater).sum())
+
+        # Merge: sorting the offset keys sorts every pair independently
+        a = np.sort(keys) - pair_id * span
+        width *= 2
+
+    return inversions
+
+def _complete_pairs(x, y):
+    """Drop positions where either array is missing"""
+    x = np.asarray(x, dtype=float)
+    y = np.asarray(y, dtype=float)
+    mask = ~(np.isnan(x) | np.isnan(y))
+    return x[mask], y[mask]
+
+def kendall_tau(x, y):
+    """
+    Calculate Kendall's tau-b with Knight's O(n log n) algorithm
+
+    Parameters:
+    - x: array-like, first variable
+    - y: array-like, second variable (same length as x)
+
+    Returns:
+    - float, tau-b coefficient (NaN if undefined)
+    """
+    x, y = _complete_pairs(x, y)
+    n = len(x)
+    if n < 2:
+        return np.nan
+
+    x_ranks = _dense_rank(x)
+    y_ranks = _dense_rank(y)
+
+    # Sort by x, breaking ties by y, so tied x values never count as discordant
+    order = np.lexsort((y_ranks, x_ranks))
+    x_ranks = x_ranks[order]
+    y_ranks = y_ranks[order]
+
+    total_pairs = n * (n - 1) // 2
+    x_ties = _count_tied_pairs(x_ranks)
+    y_ties = _count_tied_pairs(y_ranks)
+    joint_ties = _count_tied_pairs(_dense_rank(x_ranks * (int(y_ranks.max()) + 1) + y_ranks))
+    discordant = _count_inversions(y_ranks)
+
+    denominator = np.sqrt(float(total_pairs - x_ties) * float(total_pairs - y_ties))
+    if denominator == 0:
+        return np.nan
+
+    numerator = total_pairs - x_ties - y_ties + joint_ties - 2 * discordant
+    return float(numerator / denominator)
+
+def kendall_tau_sampled(x, y, sample_size=10000, confidence=0.95, random_state=42):
+    """
+    Approximate Kendall's tau on a random sample with a confidence interval
+
+    The interval uses the Fisher z-transform with the Fieller-Hartley-Pearson
+    variance 0.437 / (n - 4).
+
+    Parameters:
+    - x: array-like, first variable
+    - y: array-like, second variable
+    - sample_size: int, number of complete pairs to sample
+    - confidence: float, confidence level of the interval
+    - random_state: int, random seed for reproducibility
+
+    Returns:
+    - dict with 'tau', 'ci_low', 'ci_high' and 'n' (pairs used)
+    """
+    x, y = _complete_pairs(x, y)
+
+    if sample_size is not None and len(x) > sample_size:
+        rng = np.random.default_rng(random_state)
+        idx = rng.choice(len(x), size=sample_size, replace=False)
+        x, y = x[idx], y[idx]
+
+    n = len(x)
+    tau = kendall_tau(x, y)
+
+    if n <= 4 or np.isnan(tau):
+        return {'tau': tau, 'ci_low': np.nan, 'ci_high': np.nan, 'n': n}
+
+    z_crit = NormalDist().inv_cdf(0.5 + confidence / 2)
+    z = np.arctanh(np.clip(tau, -0.999999, 0.999999))
+    half_width = z_crit * np.sqrt(0.437 / (n - 4))
+
+    return {
+        'tau': tau,
+        'ci_low': float(np.tanh(z - half_width)),
+        'ci_high': float(np.tanh(z + half_width)),
+        'n': n
+    }
+
+def _init_worker(values):
+    global _worker_values
+    _worker_values = values
+
+def _kendall_pair_batch(pairs):
+    """Compute tau for a batch of (i, j) column index pairs in a pool worker"""
+    return [(i, j, kendall_tau(_worker_values[:, i], _worker_values[:, j])) for i, j in pairs]
+
+def _chunk_pairs(pairs, n_chunks):
+    """Split the pair list into roughly equal contiguous batches"""
+    size = max(1, int(np.ceil(len(pairs) / n_chunks)))
+    return [pairs[k:k + size] for k in range(0, len(pairs), size)]
+
+def _kendall_executor(values, n_pairs, max_workers):
+    """Process pool sharing values with its workers, or None when the work is too small for one"""
+    if max_workers > 1 and n_pairs > 1 and len(values) * n_pairs >= PARALLEL_WORK_THRESHOLD:
+        return ProcessPoolExecutor(
+            max_workers=min(max_workers, n_pairs),
+            initializer=_init_worker,
+            initargs=(values,)
+        )
+    return None
+
+def _kendall_pairs(values, pairs, executor=None, n_batches=1):
+    """Kendall tau of (i, j) column pairs of values, in the pool's workers when one is given"""
+    if executor is not None and len(pairs) > 1:
+        try:
+            batches = executor.map(_kendall_pair_batch, _chunk_pairs(pairs, n_batches))
+            return [item for batch in batches for item in batch]
+        except (OSError, BrokenProcessPool):
+            # Fall back to serial execution where worker processes are unavailable
+            pass
+    return [(i, j, kendall_tau(values[:, i], values[:, j])) for i, j in pairs]
+
+def kendall_corr_matrix(df, columns=None, max_workers=None, sample_size=None, random_state=42):
+    """
+    Calculate a Kendall tau-b correlation matrix, running column pairs in a process pool
+
+    Parameters:
+    - df: pandas DataFrame
+    - columns: list, numeric columns to include (None for all numeric columns)
+    - max_workers: int, number of worker processes (None uses all CPUs)
+    - sample_size: int, approximate on this many sampled rows (None for exact)
+    - random_state: int, random seed used when sampling
+
+    Returns:
+    - DataFrame with the correlation matrix
+    """
+    if columns is None:
+        numeric_df = df.select_dtypes(include=np.number)
+    else:
+        numeric_df = df[columns].select_dtypes(include=np.number)
+
+    if sample_size is not None and len(numeric_df) > sample_size:
+        numeric_df = numeric_df.sample(sample_size, random_state=random_state)
+
+    names = numeric_df.columns.tolist()
+    values = numeric_df.to_numpy(dtype=float)
+    n_cols = len(names)
+
+    matrix = np.eye(n_cols)
+    pairs = [(i, j) for i in range(n_cols) for j in range(i + 1, n_cols)]
+
+    if max_workers is None:
+        max_workers = os.cpu_count() or 1
+
+    executor = _kendall_executor(values, len(pairs), max_workers)
+    with executor or nullcontext():
+        results = _kendall_pairs(values, pairs, executor, max_workers * 4)
+
+    for i, j, tau in results:
+        matrix[i, j] = matrix[j, i] = tau
+
+    return pd.DataFrame(matrix, index=names, columns=names)
+
+def compute_correlation_matrix(df, columns=None, method='pearson', sample_size=None):
+    """
+    Calculate a correlation matrix, routing Kendall to the fast engine
+
+    Parameters:
+    - df: pandas DataFrame
+    - columns: list, columns to include (None for all numeric columns)
+    - method: str, 'pearson', 'spearman' or 'kendall'
+    - sample_size: int, approximate Kendall on this many sampled rows (None for exact)
+
+    Returns:
+    - DataFrame with the correlation matrix
+    """
+    if method == 'kendall':
+        return kendall_corr_matrix(df, columns, sample_size=sample_size)
+
+    if columns is None:
+        numeric_df = df.select_dtypes(include=np.number)
+    else:
+        numeric_df = df[columns].select_dtypes(include=np.number)
+
+    return numeric_df.corr(method=method)
+
+def _pair_sums(x_block, m_block, y_block, n_block):
+    """Pairwise-complete Pearson correlations between two column blocks via matrix products (on mean-shifted columns)"""
+    count = m_block.T @ n_block
+    sum_x = x_block.T @ n_block
+    sum_y = m_block.T @ y_block
+    sum_xx = (x_block ** 2).T @ n_block
+    sum_yy = m_block.T @ (y_block ** 2)
+    sum_xy = x_block.T @ y_block
+
+    with np.errstate(invalid='ignore', divide='ignore'):
+        cov = count * sum_xy - sum_x * sum_y
+        var_x = count * sum_xx - sum_x ** 2
+        var_y = count * sum_yy - sum_y ** 2
+        corr = cov / np.sqrt(var_x * var_y)
+
+    corr[count < 2] = np.nan
+    return np.clip(corr, -1, 1)
+
+def _spearman_pair(x, y):
+    """Spearman correlation of two columns, ranked on the rows both have (as DataFrame.corr does)"""
+    x, y = _complete_pairs(x, y)
+    if len(x) < 2:
+        return np.nan
+    x_ranks = pd.Series(x).rank().to_numpy()
+    y_ranks = pd.Series(y).rank().to_numpy()
+    with np.errstate(invalid='ignore', divide='ignore'):
+        return float(np.corrcoef(x_ranks, y_ranks)[0, 1])
+
+def _top_pairs_frame(heap, names):
+    """Convert the heap of (|r|, i, j, r) entries into a sorted DataFrame"""
+    ordered = sorted(heap, reverse=True)
+    return pd.DataFrame({
+        'Feature 1': [names[i] for _, i, _, _ in ordered],
+        'Feature 2': [names[j] for _, _, j, _ in ordered],
+        'Correlation': [r for _, _, _, r in ordered]
+    })
+
+def iter_top_correlated_pairs(df, columns=None, k=20, method='pearson', block_size=256, max_workers=None):
+    """
+    Stream the k most strongly correlated column pairs without building the full matrix
+
+    The matrix is computed one block of columns at a time and only a bounded
+    heap of the strongest |r| pairs is kept, so memory stays O(k + block_size^2).
+    Correlations are pairwise-complete, matching DataFrame.corr: Spearman
+    pairs involving a column with missing values are ranked on the rows both
+    columns have.
+
+    Parameters:
+    - df: pandas DataFrame
+    - columns: list, numeric columns to scan (None for all numeric columns)
+    - k: int, number of pairs to keep
+    - method: str, 'pearson', 'spearman' or 'kendall'
+    - block_size: int, number of columns per block
+    - max_workers: int, number of worker processes for Kendall (None uses all CPUs)
+
+    Yields:
+    - (DataFrame of the current top pairs, fraction of pairs scanned)
+    """
+    import heapq
+
+    if columns is None:
+        numeric_df = df.select_dtypes(include=np.number)
+    else:
+        numeric_df = df[columns].select_dtypes(include=np.number)
+
+    names = numeric_df.columns.tolist()
+    n_cols = len(names)
+    total_pairs = n_cols * (n_cols - 1) // 2
+    heap = []
+
+    if total_pairs == 0:
+        yield _top_pairs_frame(heap, names), 1.0
+        return
+
+    raw = numeric_df.to_numpy(dtype=float)
+    if method == 'spearman':
+        # Spearman is Pearson on ranks; columns without missing values are ranked once for all pairs
+        has_missing = np.isnan(raw).any(axis=0)
+        numeric_df = numeric_df.rank()
+
+    values = numeric_df.to_numpy(dtype=float)
+    present = ~np.isnan(values)
+    mask = present.astype(float)
+
+    # Shift each column by its mean so the raw-sum formulas in _pair_sums keep their precision
+    counts = present.sum(axis=0)
+    shift = np.divide(np.where(present, values, 0.0).sum(axis=0), counts, out=np.zeros(n_cols), where=counts > 0)
+    filled = np.where(present, values - shift, 0.0)
+
+    def push(i, j, r):
+        if np.isnan(r):
+            return
+        entry = (abs(r), i, j, r)
+        if len(heap) < k:
+            heapq.heappush(heap, entry)
+        elif entry > heap[0]:
+            heapq.heapreplace(heap, entry)
+
+    starts = list(range(0, n_cols, block_size))
+    scanned = 0
+
+    if max_workers is None:
+        max_workers = os.cpu_count() or 1
+    # One pool serves every block of a Kendall scan
+    executor = _kendall_executor(values, total_pairs, max_workers) if method == 'kendall' else None
+
+    with executor or nullcontext():
+        for bi in starts:
+            for bj in starts:
+                if bj < bi:
+                    continue
+
+                rows = np.arange(bi, min(bi + block_size, n_cols))
+                cols = np.arange(bj, min(bj + block_size, n_cols))
+                upper = cols[None, :] > rows[:, None]
+
+                if method == 'kendall':
+                    block = np.full((len(rows), len(cols)), np.nan)
+                    pairs = [(int(rows[a]), int(cols[b])) for a, b in zip(*np.nonzero(upper))]
+                    for i, j, tau in _kendall_pairs(values, pairs, executor, max_workers * 4):
+                        block[i - bi, j - bj] = tau
+                else:
+                    block = _pair_sums(filled[:, rows], mask[:, rows], filled[:, cols], mask[:, cols])
+
+                if method == 'spearman':
+                    # Re-rank pairs with a missing value on the rows both columns have
+                    for a, b in zip(*np.nonzero(upper & (has_missing[rows][:, None] | has_missing[cols][None, :]))):
+                        block[a, b] = _spearman_pair(raw[:, rows[a]], raw[:, cols[b]])
+
+                # Keep only the upper triangle of the full matrix
+                block = np.where(upper, block, np.nan)
+                scanned += int(upper.sum())
+
+                # Only the block's own top k candidates can enter the heap
+                flat = np.abs(block).ravel()
+                valid = np.flatnonzero(~np.isnan(flat))
+                if len(valid) > k:
+                    valid = valid[np.argpartition(flat[valid], -k)[-k:]]
+
+                for pos in valid:
+                    a, b = divmod(int(pos), len(cols))
+                    push(int(rows[a]), int(cols[b]), float(block[a, b]))
+
+                yield _top_pairs_frame(heap, names), scanned / total_pairs
+
+def top_correlated_pairs(df, columns=None, k=20, method='pearson', block_size=256, max_workers=None):
+    """
+    Find the k most strongly correlated column pairs
+
+    Parameters:
+    - df: pandas DataFrame
+    - columns: list, numeric columns to scan (None for all numeric columns)
+    - k: int, number of pairs to keep
+    - method: str, 'pearson', 'spearman' or 'kendall'
+    - block_size: int, number of columns per block
+    - max_workers: int, number of worker processes for Kendall (None uses all CPUs)
+
+    Returns:
+    - DataFrame with 'Feature 1', 'Feature 2' and 'Correlation', strongest first
+    """
+    top_pairs = None
+    for top_pairs, _ in iter_top_correlated_pairs(df, columns, k, method, block_size, max_workers):
+        pass
+    return top_pairs
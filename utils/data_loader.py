@@ -0,0 +1,637 @@
+import codecs
+import gzip
+import hashlib
+import io
+import json
+import os
+import uuid
+import zipfile
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from itertools import repeat
+import pandas as pd
+import pyarrow as pa
+from utils.out_of_core import STORAGE_DIR, ingest_csv, open_parquet, write_partitioned, concat_partitioned
+from utils.workspace import schema_differences
+from utils.schema_registry import (
+    HEADER_SAMPLE_ROWS, header_fingerprint, get_pinned_schema, csv_read_options,
+    apply_pinned_categories, matches_schema
+)
+
+# zstandard is optional; .zst files are rejected with a hint when it is missing
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+# Data formats the loaders can parse
+DATA_EXTENSIONS = ['csv', 'xlsx', 'xls', 'json', 'jsonl', 'ndjson']
+
+# JSON Lines extensions (one JSON record per line)
+JSON_LINES_EXTENSIONS = ['jsonl', 'ndjson']
+
+# Records normalized into one DataFrame batch when parsing JSON
+JSON_BATCH_SIZE = 50_000
+
+# Bytes read from a JSON stream at a time
+JSON_BLOCK_SIZE = 1 << 20
+
+# Excel workbook extensions
+EXCEL_EXTENSIONS = ['xlsx', 'xls']
+
+# Directory holding parsed worksheets, keyed by workbook hash and sheet name
+SHEET_CACHE_DIR = os.path.join(STORAGE_DIR, 'sheets')
+
+# Compression and archive formats decompressed on the fly (e.g. data.csv.gz, data.json.zst, exports.zip)
+COMPRESSED_EXTENSIONS = ['gz', 'zst', 'zip']
+
+# File extensions accepted by the uploaders
+SUPPORTED_EXTENSIONS = DATA_EXTENSIONS + COMPRESSED_EXTENSIONS
+
+# File extensions that can be opened from a local path in out-of-core mode
+OUT_OF_CORE_EXTENSIONS = ['csv', 'parquet'] + COMPRESSED_EXTENSIONS
+
+def _split_name(name):
+    """Split a file name into its data format and compression ('sales.csv.gz' -> ('csv', 'gz'))"""
+    parts = os.path.basename(name).lower().split('.')
+    compression = parts[-1] if len(parts) > 1 and parts[-1] in COMPRESSED_EXTENSIONS else None
+    if compression == 'zip':
+        return None, compression
+
+    data_parts = parts[:-1] if compression else parts
+    return (data_parts[-1] if len(data_parts) > 1 else ''), compression
+
+def _decompress(raw, compression):
+    """Wrap a binary stream (or open a path) so that reads return decompressed bytes"""
+    if compression == 'gz':
+        return gzip.open(raw)
+    if compression == 'zst':
+        if zstandard is None:
+            raise ValueError("Reading .zst files requires the optional 'zstandard' package (pip install zstandard).")
+        return zstandard.open(raw, 'rb')
+    return raw
+
+def _opener(source, compression):
+    """Callable returning a new decompressing stream over the start of source on every call"""
+    def open_stream():
+        if hasattr(source, 'seek'):
+            source.seek(0)
+        return _decompress(source, compression)
+    return open_stream
+
+def _iter_json_lines(stream, block_size=JSON_BLOCK_SIZE):
+    """Yield the records of a JSON Lines stream, reading it in blocks"""
+    tail = b''
+    while True:
+        block = stream.read(block_size)
+        lines = (tail + block).split(b'\n')
+        # The last piece may be an incomplete line until the stream ends
+        tail = lines.pop() if block else b''
+        for line in lines:
+            if line.strip():
+                yield json.loads(line)
+        if not block:
+            return
+
+def _iter_json_records(stream, block_size=JSON_BLOCK_SIZE):
+    """
+    Yield the records of a JSON document, reading it in blocks
+
+    The elements of a top-level array are decoded one at a time, so only the
+    current block and record are held as text. Any other document is read
+    whole and yielded as one record, or parsed as JSON Lines when it holds
+    one value per line.
+    """
+    decoder = json.JSONDecoder()
+    text = codecs.getincrementaldecoder('utf-8-sig')()
+    buffer, position, eof = '', 0, False
+
+    def read_more():
+        nonlocal buffer, position, eof
+        block = stream.read(block_size)
+        eof = not block
+        buffer = buffer[position:] + text.decode(block, final=eof)
+        position = 0
+
+    def skip_whitespace():
+        nonlocal position
+        while True:
+            while position < len(buffer) and buffer[position] in ' \t\r\n':
+                position += 1
+            if position < len(buffer) or eof:
+                return
+            read_more()
+
+    skip_whitespace()
+    if buffer[position:position + 1] != '[':
+        content = buffer[position:] + text.decode(stream.read(), final=True)
+        try:
+            yield json.loads(content)
+        except json.JSONDecodeError as e:
+            if not e.msg.startswith('Extra data'):
+                raise
+            yield from (json.loads(line) for line in content.splitlines() if line.strip())
+        return
+
+    position += 1
+    while True:
+        skip_whitespace()
+        if buffer[position:position + 1] == ']':
+            return
+
+        # Decode the next element, reading more of the stream until it is complete
+        while True:
+            try:
+                record, end = decoder.raw_decode(buffer, position)
+                # A number cut at the block end ('1.', '2e') decodes short of its end, so the
+                # value only counts as complete when a delimiter follows it
+                if eof or (end < len(buffer) and buffer[end] in ' \t\r\n,]'):
+                    break
+            except json.JSONDecodeError:
+                if eof:
+                    raise
+            # A value that reaches the end of the buffer may continue in the next block
+            read_more()
+
+        position = end
+        yield record
+
+        skip_whitespace()
+        separator = buffer[position:position + 1]
+        if separator == ',':
+            position += 1
+        elif separator != ']':
+            raise ValueError(f"Invalid JSON: expected ',' or ']' in the top-level array, found {separator!r}")
+
+def iter_json_batches(stream, file_format='json', batch_size=JSON_BATCH_SIZE):
+    """
+    Parse JSON or JSON Lines incrementally into normalized DataFrame batches
+
+    Records are normalized (nested fields flattened with json_normalize) in
+    batches, so the raw text and Python objects of only one batch are held
+    at a time.
+
+    Parameters:
+    - stream: binary file-like object
+    - file_format: str, 'json' or one of JSON_LINES_EXTENSIONS
+    - batch_size: int, records per batch
+
+    Yields:
+    - DataFrame batches (at least one, empty for a document without records);
+      columns may differ between batches
+    """
+    records = _iter_json_lines(stream) if file_format in JSON_LINES_EXTENSIONS else _iter_json_records(stream)
+
+    batch = []
+    yielded = False
+    for record in records:
+        batch.append(record)
+        if len(batch) >= batch_size:
+            yield pd.json_normalize(batch)
+            batch = []
+            yielded = True
+
+    if batch or not yielded:
+        yield pd.json_normalize(batch)
+
+def _ingest_json(stream, file_format, progress=None):
+    """Store JSON batches out of core, one partitioned part per batch, then stack the parts"""
+    parts = []
+    try:
+        for batch in iter_json_batches(stream, file_format):
+            parts.append(write_partitioned([batch]))
+            if progress:
+                progress(len(batch))
+        return parts[0] if len(parts) == 1 else concat_partitioned(parts)
+    finally:
+        if len(parts) > 1:
+            for part in parts:
+                os.remove(part.path)
+
+def _read_stream(stream, file_format, out_of_core=False, progress=None):
+    """Parse a binary stream into a DataFrame, or store it out of core"""
+    if out_of_core and (file_format == 'json' or file_format in JSON_LINES_EXTENSIONS):
+        return _ingest_json(stream, file_format, progress)
+
+    data = _parse_stream(stream, file_format, progress)
+    return write_partitioned([data]) if out_of_core else data
+
+def _parse_stream(stream, file_format, progress=None):
+    """Parse a binary stream into a DataFrame"""
+    if file_format == 'json' or file_format in JSON_LINES_EXTENSIONS:
+        batches = []
+        for batch in iter_json_batches(stream, file_format):
+            batches.append(batch)
+            if progress:
+                progress(len(batch))
+        return batches[0] if len(batches) == 1 else pd.concat(batches, ignore_index=True)
+
+    if file_format == 'csv':
+        data = pd.read_csv(stream)
+    elif file_format in ['xls', 'xlsx']:
+        # Excel readers jump around the file, which decompressing streams may not support
+        if not stream.seekable():
+            stream = io.BytesIO(stream.read())
+        data = pd.read_excel(stream)
+    else:
+        raise ValueError(f"Unsupported file format: {file_format}. Please upload a CSV, Excel, or JSON file.")
+
+    if progress:
+        progress(len(data))
+    return data
+
+def _read_csv_sample(source, nrows):
+    """Read the first rows of a CSV path, seekable file-like object or stream callable as text"""
+    if callable(source):
+        with source() as stream:
+            return pd.read_csv(stream, nrows=nrows, dtype=str)
+
+    if hasattr(source, 'seek'):
+        source.seek(0)
+    try:
+        return pd.read_csv(source, nrows=nrows, dtype=str)
+    finally:
+        if hasattr(source, 'seek'):
+            source.seek(0)
+
+def read_csv_header(source, name=None):
+    """
+    Read the header and first rows of a CSV file, for looking up and pinning its schema
+
+    Parameters:
+    - source: path, seekable file-like object, or callable returning a new binary stream
+    - name: str, file name to dispatch on (None when source is known to be plain CSV);
+      compressed CSV files are decompressed, other formats have no header
+
+    Returns:
+    - dict with 'fingerprint' (see schema_registry.header_fingerprint) and
+      'sample' (DataFrame of the first rows as text), or None when the file is not CSV
+    """
+    if name is not None:
+        file_format, compression = _split_name(name)
+        if file_format != 'csv':
+            return None
+        if compression:
+            source = _opener(source, compression)
+
+    sample = _read_csv_sample(source, HEADER_SAMPLE_ROWS)
+    return {'fingerprint': header_fingerprint(sample.columns), 'sample': sample}
+
+def _load_pinned_csv(source, schema, out_of_core, progress=None):
+    """
+    Parse a CSV file with the column types pinned for its header
+
+    Returns:
+    - pandas DataFrame (or OutOfCoreFrame), or None when the data no longer
+      fits the pinned types (e.g. missing values in a pinned integer column)
+    """
+    options = csv_read_options(schema)
+    reported = [0]
+
+    def tracked(rows):
+        reported[0] += rows
+        progress(rows)
+
+    data = None
+    try:
+        if out_of_core:
+            data = ingest_csv(source, progress=tracked if progress else None, read_options=options)
+            if not matches_schema(data.head(0), schema):
+                os.remove(data.path)
+                data = None
+        else:
+            if callable(source):
+                with source() as stream:
+                    data = pd.read_csv(stream, **options)
+            else:
+                if hasattr(source, 'seek'):
+                    source.seek(0)
+                data = pd.read_csv(source, **options)
+
+            if matches_schema(data, schema):
+                data = apply_pinned_categories(data, schema)
+                if progress:
+                    tracked(len(data))
+            else:
+                data = None
+    except (ValueError, TypeError):
+        data = None
+
+    if data is None and reported[0] and progress:
+        progress(-reported[0])
+    return data
+
+def _load(source, file_format, out_of_core, progress=None):
+    """
+    Read one data file in memory, or store it out of core
+
+    CSV files whose header has a pinned schema are parsed with the pinned
+    column types instead of inferring them, falling back to inference when
+    the data no longer fits.
+
+    Parameters:
+    - source: path, file-like object, or callable returning a new binary stream
+    - file_format: str, one of DATA_EXTENSIONS
+    - out_of_core: bool, store the data as partitioned Parquet on disk
+    - progress: callable receiving the number of rows parsed since its last call
+
+    Returns:
+    - pandas DataFrame, or OutOfCoreFrame in out-of-core mode
+    """
+    if file_format == 'csv':
+        schema = get_pinned_schema(read_csv_header(source)['fingerprint'])
+        if schema is not None:
+            data = _load_pinned_csv(source, schema, out_of_core, progress)
+            if data is not None:
+                return data
+            if hasattr(source, 'seek'):
+                source.seek(0)
+
+    if out_of_core and file_format == 'csv':
+        return ingest_csv(source, progress=progress)
+
+    if callable(source):
+        with source() as stream:
+            return _read_stream(stream, file_format, out_of_core, progress)
+    return _read_stream(source, file_format, out_of_core, progress)
+
+def _read_zip(source, out_of_core, progress=None):
+    """
+    Read every data file in a zip archive in parallel and stack them
+
+    Members are streamed out of the archive (and decompressed again when they
+    are .gz or .zst files themselves); folders, hidden files and other formats
+    are skipped. Columns are matched by name, and missing ones are filled with
+    missing values.
+
+    Parameters:
+    - source: path or file-like object with the archive
+    - out_of_core: bool, store the data as partitioned Parquet on disk
+    - progress: callable receiving the number of rows parsed since its last call
+      (called from the worker threads)
+
+    Returns:
+    - pandas DataFrame, or OutOfCoreFrame in out-of-core mode
+
+    Raises:
+    - ValueError if the archive holds no supported data files
+    """
+    if not isinstance(source, str):
+        source.seek(0)
+        source = source.read()
+
+    def open_archive():
+        return zipfile.ZipFile(source if isinstance(source, str) else io.BytesIO(source))
+
+    with open_archive() as archive:
+        members = [
+            info.filename for info in archive.infolist()
+            if not info.is_dir()
+            and not info.filename.startswith('__MACOSX/')
+            and not os.path.basename(info.filename).startswith('.')
+            and _split_name(info.filename)[0] in DATA_EXTENSIONS
+            and _split_name(info.filename)[1] != 'zip'
+        ]
+
+    if not members:
+        raise ValueError("The zip archive holds no CSV, Excel, or JSON files.")
+
+    def load_member(member):
+        # Every worker reads through its own archive handle
+        with open_archive() as archive:
+            file_format, compression = _split_name(member)
+            return _load(lambda: _decompress(archive.open(member), compression), file_format, out_of_core, progress)
+
+    with ThreadPoolExecutor(max_workers=min(len(members), os.cpu_count() or 1)) as executor:
+        frames = list(executor.map(load_member, members))
+
+    if len(frames) == 1:
+        return frames[0]
+
+    if out_of_core:
+        try:
+            return concat_partitioned(frames)
+        finally:
+            for frame in frames:
+                os.remove(frame.path)
+
+    return pd.concat(frames, ignore_index=True)
+
+def _read_source(source, name, out_of_core, progress=None):
+    """Read a possibly compressed or archived data file, dispatching on its name"""
+    file_format, compression = _split_name(name)
+
+    if compression == 'zip':
+        return _read_zip(source, out_of_core, progress)
+
+    if file_format not in DATA_EXTENSIONS:
+        raise ValueError(
+            f"Unsupported file format: {file_format or compression}. "
+            "Please upload a CSV, Excel, or JSON file (optionally .gz, .zst, or zipped)."
+        )
+
+    if compression:
+        # Decompressed on the fly: the uncompressed file never exists on disk or in memory as a whole
+        source = _opener(source, compression)
+
+    return _load(source, file_format, out_of_core, progress)
+
+def read_uploaded_file(uploaded_file, out_of_core=False, progress=None):
+    """
+    Read an uploaded file into a DataFrame based on its extension
+
+    Compressed files (.gz, .zst) are decompressed while they are parsed, and
+    the data files in a zip archive are read in parallel and stacked.
+
+    Parameters:
+    - uploaded_file: file-like object with a 'name' attribute (e.g. a Streamlit UploadedFile)
+    - out_of_core: bool, store the data as partitioned Parquet on disk and return a proxy
+      (CSV files are streamed in chunks; other formats are read once, then spilled)
+    - progress: callable receiving the number of rows parsed since its last call
+      (per chunk or batch where the format is read incrementally)
+
+    Returns:
+    - pandas DataFrame, or OutOfCoreFrame in out-of-core mode
+
+    Raises:
+    - ValueError if the file format is not supported
+    """
+    return _read_source(uploaded_file, uploaded_file.name, out_of_core, progress)
+
+def open_local_file(path, progress=None):
+    """
+    Open a CSV or Parquet file on the local disk as an out-of-core dataset
+
+    CSV files may be compressed (.gz, .zst) or collected in a zip archive.
+
+    Parameters:
+    - path: str, file path
+    - progress: callable receiving the number of rows parsed since its last call
+
+    Returns:
+    - OutOfCoreFrame
+
+    Raises:
+    - ValueError if the file does not exist or its format is not supported
+    """
+    if not os.path.isfile(path):
+        raise ValueError(f"File not found: {path}")
+
+    file_format, compression = _split_name(path)
+
+    if file_format == 'parquet' and compression is None:
+        return open_parquet(path)
+    if file_format == 'csv' or compression == 'zip':
+        return _read_source(path, path, out_of_core=True, progress=progress)
+
+    raise ValueError(
+        f"Unsupported file format: {file_format or compression}. "
+        "Out-of-core mode reads CSV or Parquet files (CSV optionally .gz, .zst, or zipped)."
+    )
+
+def read_local_file(path, out_of_core=False, progress=None):
+    """
+    Read a data file on the local disk the way an upload of it would be read
+
+    Parquet files are also accepted: opened in place in out-of-core mode,
+    read whole otherwise.
+
+    Parameters:
+    - path: str, file path
+    - out_of_core: bool, store the data as partitioned Parquet on disk
+    - progress: callable receiving the number of rows parsed since its last call
+
+    Returns:
+    - pandas DataFrame, or OutOfCoreFrame in out-of-core mode
+
+    Raises:
+    - ValueError if the file does not exist or its format is not supported
+    """
+    if not os.path.isfile(path):
+        raise ValueError(f"File not found: {path}")
+
+    file_format, compression = _split_name(path)
+    if file_format == 'parquet' and compression is None:
+        return open_parquet(path) if out_of_core else pd.read_parquet(path)
+
+    with open(path, 'rb') as f:
+        return _read_source(f, path, out_of_core, progress)
+
+def _read_bytes(source):
+    """Read the whole content of a path or file-like object"""
+    if isinstance(source, str):
+        with open(source, 'rb') as f:
+            return f.read()
+    source.seek(0)
+    return source.read()
+
+def list_excel_sheets(source):
+    """
+    List the sheet names of an Excel workbook without parsing the sheets
+
+    Parameters:
+    - source: path or file-like object with the workbook
+
+    Returns:
+    - list of sheet names in workbook order
+    """
+    with pd.ExcelFile(io.BytesIO(_read_bytes(source))) as workbook:
+        return [str(name) for name in workbook.sheet_names]
+
+def _parse_sheet(content, sheet_name):
+    """Parse one sheet of a workbook (runs in a worker process)"""
+    return pd.read_excel(io.BytesIO(content), sheet_name=sheet_name)
+
+def _sheet_cache_path(workbook_hash, sheet_name):
+    """Cache file of a parsed sheet"""
+    sheet_hash = hashlib.sha1(str(sheet_name).encode('utf-8')).hexdigest()[:16]
+    return os.path.join(SHEET_CACHE_DIR, f"{workbook_hash}_{sheet_hash}.parquet")
+
+def _store_sheet(frame, path):
+    """Write a parsed sheet to the cache; sheets Parquet cannot hold (mixed-type columns) are not cached"""
+    os.makedirs(SHEET_CACHE_DIR, exist_ok=True)
+    partial_path = f"{path}.{uuid.uuid4().hex}.partial"
+    try:
+        frame.to_parquet(partial_path)
+        os.replace(partial_path, path)
+    except (pa.ArrowInvalid, pa.ArrowTypeError, pa.ArrowNotImplementedError, ValueError):
+        if os.path.exists(partial_path):
+            os.remove(partial_path)
+
+def read_excel_sheets(source, sheet_names=None):
+    """
+    Parse sheets of an Excel workbook, in parallel worker processes
+
+    Parsed sheets are cached on disk as Parquet, keyed by a hash of the
+    workbook and the sheet name, so loading the same workbook again (or more
+    of its sheets) only parses the sheets that were not read before.
+
+    Parameters:
+    - source: path or file-like object with the workbook
+    - sheet_names: list of sheet names to parse (None for all sheets)
+
+    Returns:
+    - dict of sheet name -> DataFrame, in the order of sheet_names
+    """
+    content = _read_bytes(source)
+    workbook_hash = hashlib.sha1(content).hexdigest()[:16]
+
+    if sheet_names is None:
+        with pd.ExcelFile(io.BytesIO(content)) as workbook:
+            sheet_names = [str(name) for name in workbook.sheet_names]
+
+    sheets = {}
+    missing = []
+    for name in sheet_names:
+        path = _sheet_cache_path(workbook_hash, name)
+        if os.path.exists(path):
+            sheets[name] = pd.read_parquet(path)
+        else:
+            missing.append(name)
+
+    if len(missing) == 1:
+        parsed = [_parse_sheet(content, missing[0])]
+    elif missing:
+        # Sheet parsing is pure-Python work, so sheets are parsed in separate processes
+        with ProcessPoolExecutor(max_workers=min(len(missing), os.cpu_count() or 1)) as executor:
+            parsed = list(executor.map(_parse_sheet, repeat(content), missing))
+    else:
+        parsed = []
+
+    for name, frame in zip(missing, parsed):
+        _store_sheet(frame, _sheet_cache_path(workbook_hash, name))
+        sheets[name] = frame
+
+    return {name: sheets[name] for name in sheet_names}
+
+def read_workbook(source, sheet_names=None, union=False, out_of_core=False, source_column='sheet', progress=None):
+    """
+    Load sheets of an Excel workbook as one or more datasets
+
+    Parameters:
+    - source: path or file-like object with the workbook
+    - sheet_names: list of sheet names to load (None for all sheets)
+    - union: bool, stack the sheets into one dataset when they all share the same columns
+    - out_of_core: bool, store the data as partitioned Parquet on disk
+    - source_column: str, column recording each row's sheet in a union (skipped
+      when the sheets already have a column of that name)
+    - progress: callable receiving the number of rows parsed, once the sheets are parsed
+
+    Returns:
+    - dict of dataset name -> pandas DataFrame (or OutOfCoreFrame): one entry
+      named after the joined sheet names for a union, otherwise one per sheet
+    """
+    sheets = read_excel_sheets(source, sheet_names)
+    if progress:
+        progress(sum(len(frame) for frame in sheets.values()))
+
+    if union and len(sheets) > 1 and not schema_differences(sheets):
+        first = next(iter(sheets.values()))
+        parts = [
+            frame.assign(**{source_column: name}) if source_column and source_column not in first.columns else frame
+            for name, frame in sheets.items()
+        ]
+        sheets = {' + '.join(sheets): pd.concat(parts, ignore_index=True)}
+
+    if out_of_core:
+        return {name: write_partitioned([frame]) for name, frame in sheets.items()}
+    return sheets
@@ -1,36 +1,259 @@
 import pandas as pd
 import numpy as np
-import streamlit as st
+from utils.caching import cache_data
+from utils.messages import report_error
+from utils.streaming_stats import compute_moments_chunked, iter_frame_chunks, merge_moments, moments_to_statistics
+from utils.quantile_sketch import approximate_median, approximate_quantiles, build_sketch, merge_sketches, sketch_quantiles
+from utils.categorical_sketch import get_column_profile, estimate_distinct, is_exact, top_values
+from utils.dataset_cache import get_dataset_version, split_append, is_appended, lazy_copy, writable_copy
+from utils.out_of_core import is_out_of_core, map_chunks
 
-def get_initial_dataframe_info(df):
+# Rows kept in memory when a page needs a plain DataFrame of an out-of-core dataset
+WORKING_SAMPLE_ROWS = 200_000
+
+def describe_dataframe(df):
+    """
+    Collect the column lists and data quality facts the pages start from
+    
+    Parameters:
+    - df: pandas DataFrame
+    
+    Returns:
+    - dict with 'columns', 'numeric_columns', 'categorical_columns',
+      'datetime_columns', 'missing_percentages', 'duplicate_count' and
+      'unique_categorical_values' (empty when df is None)
+    """
+    if df is None:
+        return {}
+    
+    categorical_columns = df.select_dtypes(include=['object', 'category']).columns.tolist()
+    
+    # Sample uniqueness of categorical columns from their sketched profiles
+    unique_values = {}
+    for col in categorical_columns:
+        profile = get_column_profile(df, col)
+        n_unique = estimate_distinct(profile) + (1 if profile['nulls'] else 0)
+        if is_exact(profile) and n_unique < 20:  # Only for columns with reasonable number of unique values
+            unique_values[col] = list(profile['counts'].keys()) + ([np.nan] if profile['nulls'] else [])
+    
+    return {
+        'columns': df.columns.tolist(),
+        'numeric_columns': df.select_dtypes(include=np.number).columns.tolist(),
+        'categorical_columns': categorical_columns,
+        'datetime_columns': df.select_dtypes(include=['datetime64']).columns.tolist(),
+        # Missing values percentage and duplicates
+        'missing_percentages': (get_missing_value_counts(df) / len(df) * 100).to_dict(),
+        'duplicate_count': count_duplicates(df),
+        'unique_categorical_values': unique_values
+    }
+
+def _count_missing(df):
+    counts = pd.Series(0, index=df.columns, dtype='int64')
+    for chunk in iter_frame_chunks(df):
+        counts += chunk.isnull().sum()
+    return counts
+
+@cache_data(max_entries=16)
+def _cached_missing_value_counts(version, _df):
+    appended = split_append(version, _df)
+    if appended is not None:
+        base_version, base, delta = appended
+        return _cached_missing_value_counts(base_version, base) + _count_missing(delta)
+    return _count_missing(_df)
+
+def get_missing_value_counts(df):
+    """
+    Count missing values per column, chunk by chunk for out-of-core datasets
+    and from the new rows only for appended versions
+    
+    Parameters:
+    - df: pandas DataFrame or OutOfCoreFrame
+    
+    Returns:
+    - Series of missing value counts indexed by column
+    """
+    if is_out_of_core(df) or is_appended(df):
+        return _cached_missing_value_counts(get_dataset_version(df), df)
+    return df.isnull().sum()
+
+def _row_hashes(df):
+    """64-bit hash of every row, computed one chunk at a time"""
+    hashes = []
+    for chunk in iter_frame_chunks(df):
+        # Integer columns read back as floats in chunks with missing values, so hash numbers as floats
+        numeric = [col for col in chunk.columns if pd.api.types.is_numeric_dtype(chunk[col]) and not pd.api.types.is_bool_dtype(chunk[col])]
+        hashes.append(pd.util.hash_pandas_object(chunk.astype({col: 'float64' for col in numeric}), index=False).to_numpy())
+    return np.concatenate(hashes) if hashes else np.empty(0, dtype=np.uint64)
+
+def _first_occurrence_mask(hashes, keep='first'):
+    """Mark the rows to keep when dropping duplicate hashes"""
+    mask = np.zeros(len(hashes), dtype=bool)
+    if keep == 'last':
+        _, positions = np.unique(hashes[::-1], return_index=True)
+        mask[len(hashes) - 1 - positions] = True
+    else:
+        _, positions = np.unique(hashes, return_index=True)
+        mask[positions] = True
+    return mask
+
+def _sorted_unique(hashes):
+    """Sorted distinct hashes (sorting and comparing neighbours beats np.unique on uint64)"""
+    hashes = np.sort(hashes)
+    if len(hashes) == 0:
+        return hashes
+    return hashes[np.concatenate([[True], hashes[1:] != hashes[:-1]])]
+
+@cache_data(max_entries=8)
+def _cached_unique_row_hashes(version, _df):
+    appended = split_append(version, _df)
+    if appended is not None:
+        # Only the new rows are hashed; unseen hashes are inserted into the earlier version's sorted ones
+        base_version, base, delta = appended
+        known = _cached_unique_row_hashes(base_version, base)
+        hashes = _sorted_unique(_row_hashes(delta))
+        positions = np.searchsorted(known, hashes)
+        seen = known[np.minimum(positions, len(known) - 1)] == hashes if len(known) else np.zeros(len(hashes), dtype=bool)
+        return np.insert(known, positions[~seen], hashes[~seen])
+    return _sorted_unique(_row_hashes(_df))
+
+@cache_data(max_entries=16)
+def _cached_duplicate_count(version, _df):
+    return int(len(_df) - len(_cached_unique_row_hashes(version, _df)))
+
+def count_duplicates(df):
+    """
+    Count duplicate rows, from row hashes for out-of-core datasets and appended versions
+    
+    Parameters:
+    - df: pandas DataFrame or OutOfCoreFrame
+    
+    Returns:
+    - int, number of rows that repeat an earlier row
     """
-    Calculate and store initial dataframe information in session state
+    if is_out_of_core(df) or is_appended(df):
+        return _cached_duplicate_count(get_dataset_version(df), df)
+    return int(df.duplicated().sum())
+
+def get_working_sample(df, n=WORKING_SAMPLE_ROWS, columns=None):
     """
-    if df is not None:
-        # Store information about the dataframe
-        st.session_state.columns = df.columns.tolist()
-        st.session_state.numeric_columns = df.select_dtypes(include=np.number).columns.tolist()
-        st.session_state.categorical_columns = df.select_dtypes(include=['object', 'category']).columns.tolist()
-        st.session_state.datetime_columns = df.select_dtypes(include=['datetime64']).columns.tolist()
+    Get an in-memory DataFrame for operations that need one
+    
+    In-memory datasets are returned as they are; out-of-core datasets are
+    represented by a uniform random sample, cached per dataset version.
+    With columns given, only those columns are loaded (from the
+    memory-mapped column cache), so a chart of two columns of a wide
+    dataset never reads the others.
+    
+    Parameters:
+    - df: pandas DataFrame or OutOfCoreFrame
+    - n: int, sample size for out-of-core datasets
+    - columns: list of columns the caller needs (None entries are ignored; None for all)
+    
+    Returns:
+    - pandas DataFrame
+    """
+    if is_out_of_core(df):
+        if columns is not None:
+            columns = tuple(dict.fromkeys(col for col in columns if col is not None))
+        return _cached_working_sample(get_dataset_version(df), n, columns, df)
+    return df
+
+@cache_data(max_entries=16)
+def _cached_working_sample(version, n, columns, _df):
+    return _df.sample(n, columns=list(columns) if columns is not None else None)
+
+def _fill_values(df, strategy, columns):
+    """Per-column fill values for the mean, median and mode strategies, from one-pass summaries"""
+    numeric_columns = [col for col in columns if col in df.select_dtypes(include=np.number).columns]
+    
+    if strategy == 'fill_mean':
+        moments = compute_moments_chunked(iter_frame_chunks(df, columns=numeric_columns), numeric_columns)
+        return moments['mean'].where(moments['count'] > 0).dropna().to_dict()
+    if strategy == 'fill_median':
+        return {col: approximate_median(df, col) for col in numeric_columns}
+    if strategy == 'fill_mode':
+        modes = {}
+        for col in columns:
+            profile = get_column_profile(df, col)
+            if is_exact(profile):
+                counts = top_values(profile).set_index('value')['count']
+            else:
+                # The sketch's counts are approximate once it is saturated, so count exactly chunk by chunk
+                counts = _exact_value_counts(df, col)
+            counts = counts[counts > 0]
+            if len(counts):
+                # Break ties by the smallest value, as Series.mode does
+                modes[col] = counts.index[counts == counts.max()].sort_values()[0]
+        return modes
+    return {}
+
+def _exact_value_counts(df, column):
+    """Exact counts of a column's non-null values, one chunk at a time"""
+    counts = pd.Series(dtype='int64')
+    for chunk in iter_frame_chunks(df, columns=[column]):
+        counts = counts.add(chunk[column].value_counts(), fill_value=0)
+    return counts
+
+def _handle_missing_values_chunked(df, strategy, columns, custom_value):
+    """Out-of-core version of handle_missing_values: one pass per strategy, results written to disk"""
+    columns = list(columns)
+    
+    if strategy == 'drop_rows':
+        return map_chunks(df, lambda chunk: chunk.dropna(subset=columns))
+    
+    if strategy == 'drop_columns':
+        return map_chunks(df, lambda chunk: chunk, columns=[col for col in df.columns if col not in columns])
+    
+    if strategy in ('fill_mean', 'fill_median', 'fill_mode'):
+        values = _fill_values(df, strategy, columns)
+        return map_chunks(df, lambda chunk: chunk.fillna(values))
+    
+    if strategy == 'fill_custom':
+        return map_chunks(df, lambda chunk: chunk.fillna({col: custom_value for col in columns}))
+    
+    if strategy == 'fill_ffill':
+        # Carry the last value seen in earlier chunks into the leading gaps of the next one
+        carry = {}
+        
+        def forward_fill(chunk):
+            filled = writable_copy(chunk)
+            filled[columns] = chunk[columns].ffill().fillna(carry)
+            if len(filled):
+                carry.update(filled[columns].iloc[-1].dropna().to_dict())
+            return filled
         
-        # Calculate missing values percentage
-        missing_percentages = (df.isnull().sum() / len(df) * 100).to_dict()
-        st.session_state.missing_percentages = missing_percentages
+        return map_chunks(df, forward_fill)
+    
+    if strategy == 'fill_bfill':
+        # First pass: the first value of every chunk, then the next value available after each chunk
+        firsts = [chunk[columns].bfill().iloc[0] for chunk in iter_frame_chunks(df, columns=columns) if len(chunk)]
+        following = [{} for _ in firsts]
+        upcoming = {}
+        for i in range(len(firsts) - 1, -1, -1):
+            following[i] = dict(upcoming)
+            upcoming.update(firsts[i].dropna().to_dict())
         
-        # Check for duplicates
-        st.session_state.duplicate_count = df.duplicated().sum()
+        chunk_starts = {}
         
-        # Sample uniqueness of categorical columns
-        unique_values = {}
-        for col in st.session_state.categorical_columns:
-            if len(df[col].unique()) < 20:  # Only for columns with reasonable number of unique values
-                unique_values[col] = df[col].unique().tolist()
-        st.session_state.unique_categorical_values = unique_values
+        def backward_fill(chunk):
+            filled = writable_copy(chunk)
+            if len(chunk):
+                position = chunk_starts.setdefault(chunk.index[0], len(chunk_starts))
+                filled[columns] = chunk[columns].bfill().fillna(following[position])
+            return filled
+        
+        return map_chunks(df, backward_fill)
+    
+    return df
 
 def handle_missing_values(df, strategy, columns=None, custom_value=None):
     """
     Handle missing values in the dataframe using various strategies
     
+    The input is never modified: the result shares the columns left as
+    they are with it (Copy-on-Write), so only the filled columns take new
+    memory.
+    
     Parameters:
     - df: pandas DataFrame
     - strategy: str, one of 'drop_rows', 'drop_columns', 'fill_mean', 'fill_median', 
@@ -44,13 +267,16 @@ def handle_missing_values(df, strategy, columns=None, custom_value=None):
     if df is None:
         return None
     
-    # Make a copy to avoid modifying the original
-    df_processed = df.copy()
-    
     # If no columns specified, use all columns
     if columns is None:
         columns = df.columns
     
+    if is_out_of_core(df):
+        return _handle_missing_values_chunked(df, strategy, columns, custom_value)
+    
+    # Lazy copy: columns are copied only when a strategy assigns them
+    df_processed = writable_copy(df)
+    
     # Apply the selected strategy
     if strategy == 'drop_rows':
         df_processed = df_processed.dropna(subset=columns)
@@ -66,7 +292,8 @@ def handle_missing_values(df, strategy, columns=None, custom_value=None):
     elif strategy == 'fill_median':
         for col in columns:
             if pd.api.types.is_numeric_dtype(df_processed[col]):
-                df_processed[col] = df_processed[col].fillna(df_processed[col].median())
+                # Median from the cached quantile sketch instead of a full sort
+                df_processed[col] = df_processed[col].fillna(approximate_median(df, col))
             
     elif strategy == 'fill_mode':
         for col in columns:
@@ -77,10 +304,10 @@ def handle_missing_values(df, strategy, columns=None, custom_value=None):
             df_processed[col] = df_processed[col].fillna(custom_value)
             
     elif strategy == 'fill_ffill':
-        df_processed[columns] = df_processed[columns].fillna(method='ffill')
+        df_processed[columns] = df_processed[columns].ffill()
             
     elif strategy == 'fill_bfill':
-        df_processed[columns] = df_processed[columns].fillna(method='bfill')
+        df_processed[columns] = df_processed[columns].bfill()
     
     return df_processed
 
@@ -88,6 +315,9 @@ def handle_duplicates(df, strategy):
     """
     Handle duplicate rows in the dataframe
     
+    The input is never modified; keeping all rows returns a lazy copy that
+    shares its data (and cached results).
+    
     Parameters:
     - df: pandas DataFrame
     - strategy: str, one of 'remove_first', 'remove_last', 'keep_all'
@@ -98,23 +328,27 @@ def handle_duplicates(df, strategy):
     if df is None:
         return None
     
-    # Make a copy to avoid modifying the original
-    df_processed = df.copy()
+    if is_out_of_core(df):
+        if strategy == 'keep_all':
+            return df
+        # Keep first (or last) occurrences by row hash, then stream the kept rows to disk
+        keep = _first_occurrence_mask(_row_hashes(df), 'last' if strategy == 'remove_last' else 'first')
+        return map_chunks(df, lambda chunk: chunk[keep[chunk.index.to_numpy()]])
     
     if strategy == 'remove_first':
-        df_processed = df_processed.drop_duplicates(keep='first')
-    elif strategy == 'remove_last':
-        df_processed = df_processed.drop_duplicates(keep='last')
-    elif strategy == 'keep_all':
-        # No action needed, keep all rows including duplicates
-        pass
+        return df.drop_duplicates(keep='first')
+    if strategy == 'remove_last':
+        return df.drop_duplicates(keep='last')
     
-    return df_processed
+    # keep_all: no action needed, keep all rows including duplicates
+    return lazy_copy(df)
 
 def convert_data_types(df, column, new_type):
     """
     Convert a column to a different data type
     
+    The input is never modified; the result shares every other column with it.
+    
     Parameters:
     - df: pandas DataFrame
     - column: str, the column to convert
@@ -126,32 +360,48 @@ def convert_data_types(df, column, new_type):
     if df is None or column not in df.columns:
         return df
     
-    # Make a copy to avoid modifying the original
-    df_processed = df.copy()
+    if is_out_of_core(df):
+        try:
+            return map_chunks(df, lambda chunk: _convert_column(writable_copy(chunk), column, new_type))
+        except Exception as e:
+            report_error(f"Error converting {column} to {new_type}: {str(e)}")
+            return df
+    
+    # Lazy copy: only the converted column takes new memory
+    df_processed = writable_copy(df)
     
     try:
-        if new_type == 'int':
-            df_processed[column] = pd.to_numeric(df_processed[column], errors='coerce').astype('Int64')
-        elif new_type == 'float':
-            df_processed[column] = pd.to_numeric(df_processed[column], errors='coerce')
-        elif new_type == 'str':
-            df_processed[column] = df_processed[column].astype(str)
-        elif new_type == 'bool':
-            df_processed[column] = df_processed[column].astype(bool)
-        elif new_type == 'datetime':
-            df_processed[column] = pd.to_datetime(df_processed[column], errors='coerce')
+        df_processed = _convert_column(df_processed, column, new_type)
     except Exception as e:
-        st.error(f"Error converting {column} to {new_type}: {str(e)}")
+        report_error(f"Error converting {column} to {new_type}: {str(e)}")
     
     return df_processed
 
+def _convert_column(df_processed, column, new_type):
+    """Convert one column of a frame in place and return the frame"""
+    if new_type == 'int':
+        df_processed[column] = pd.to_numeric(df_processed[column], errors='coerce').astype('Int64')
+    elif new_type == 'float':
+        df_processed[column] = pd.to_numeric(df_processed[column], errors='coerce')
+    elif new_type == 'str':
+        df_processed[column] = df_processed[column].astype(str)
+    elif new_type == 'bool':
+        df_processed[column] = df_processed[column].astype(bool)
+    elif new_type == 'datetime':
+        df_processed[column] = pd.to_datetime(df_processed[column], errors='coerce')
+    return df_processed
+
 def filter_dataframe(df, filters):
     """
     Apply filters to the dataframe
     
+    The filters are combined into one row mask, so the kept rows are
+    copied once, without copying the input first.
+    
     Parameters:
     - df: pandas DataFrame
     - filters: list of dicts with keys 'column', 'operator', 'value'
+      ('range' takes a (low, high) tuple, both ends included)
     
     Returns:
     - Filtered pandas DataFrame
@@ -159,33 +409,73 @@ def filter_dataframe(df, filters):
     if df is None or not filters:
         return df
     
-    # Make a copy to avoid modifying the original
-    df_filtered = df.copy()
+    if is_out_of_core(df):
+        return map_chunks(df, lambda chunk: _apply_filters(chunk, filters))
     
+    return _apply_filters(df, filters)
+
+def _filter_mask(values, operator, value):
+    """Boolean mask of the rows of a column kept by one filter, or None for an unknown operator"""
+    if operator == 'range':
+        return (values >= value[0]) & (values <= value[1])
+    if operator == 'equals':
+        return values == value
+    if operator == 'not_equals':
+        return values != value
+    if operator == 'greater_than':
+        return values > value
+    if operator == 'less_than':
+        return values < value
+    if operator == 'contains':
+        return values.astype(str).str.contains(str(value), na=False)
+    if operator == 'starts_with':
+        return values.astype(str).str.startswith(str(value), na=False)
+    if operator == 'ends_with':
+        return values.astype(str).str.endswith(str(value), na=False)
+    return None
+
+def _apply_filters(df, filters):
+    """Apply a list of filters to an in-memory frame (or one chunk)"""
+    mask = None
     for filter_item in filters:
         column = filter_item.get('column')
-        operator = filter_item.get('operator')
-        value = filter_item.get('value')
         
-        if column not in df_filtered.columns:
+        if column not in df.columns:
             continue
         
-        if operator == 'equals':
-            df_filtered = df_filtered[df_filtered[column] == value]
-        elif operator == 'not_equals':
-            df_filtered = df_filtered[df_filtered[column] != value]
-        elif operator == 'greater_than':
-            df_filtered = df_filtered[df_filtered[column] > value]
-        elif operator == 'less_than':
-            df_filtered = df_filtered[df_filtered[column] < value]
-        elif operator == 'contains':
-            df_filtered = df_filtered[df_filtered[column].astype(str).str.contains(str(value), na=False)]
-        elif operator == 'starts_with':
-            df_filtered = df_filtered[df_filtered[column].astype(str).str.startswith(str(value), na=False)]
-        elif operator == 'ends_with':
-            df_filtered = df_filtered[df_filtered[column].astype(str).str.endswith(str(value), na=False)]
-    
-    return df_filtered
+        kept = _filter_mask(df[column], filter_item.get('operator'), filter_item.get('value'))
+        if kept is not None:
+            mask = kept if mask is None else mask & kept
+    
+    # Without an applicable filter the rows are shared with the input
+    return lazy_copy(df) if mask is None else df[mask]
+
+def _compute_moments(df, columns):
+    return compute_moments_chunked(iter_frame_chunks(df, columns=columns), columns)
+
+@cache_data(max_entries=32)
+def _cached_moments(version, columns, _df):
+    appended = split_append(version, _df)
+    if appended is not None:
+        base_version, base, delta = appended
+        return merge_moments(_cached_moments(base_version, columns, base), _compute_moments(delta, list(columns)))
+    return _compute_moments(_df, list(columns))
+
+def get_moments(df, columns):
+    """
+    Get the moment accumulator of numeric columns, cached per dataset version
+    
+    Appended versions merge the moments of the new rows into those of the
+    earlier version, so the history is not scanned again.
+    
+    Parameters:
+    - df: pandas DataFrame or OutOfCoreFrame
+    - columns: list of numeric columns
+    
+    Returns:
+    - DataFrame moment accumulator indexed by column
+    """
+    return _cached_moments(get_dataset_version(df), tuple(columns), df)
 
 def get_summary_statistics(df, columns=None):
     """
@@ -211,27 +501,127 @@ def get_summary_statistics(df, columns=None):
     if not numeric_columns:
         return pd.DataFrame()
     
-    # Calculate statistics
-    stats_df = df[numeric_columns].describe().T
+    # Count, mean, std, min, max, skew, kurtosis and missing values in one chunked pass
+    moments = get_moments(df, numeric_columns)
+    stats_df = moments_to_statistics(moments)
     
-    # Add additional statistics
-    stats_df['skew'] = df[numeric_columns].skew()
-    stats_df['kurtosis'] = df[numeric_columns].kurtosis()
-    stats_df['missing_count'] = df[numeric_columns].isnull().sum()
-    stats_df['missing_pct'] = df[numeric_columns].isnull().mean() * 100
+    # Add percentiles from the cached quantile sketches
+    quantiles = approximate_quantiles(df, numeric_columns, [0.25, 0.5, 0.75])
+    quantiles.columns = ['25%', '50%', '75%']
+    stats_df = stats_df.join(quantiles)
     
-    return stats_df
+    return stats_df[[
+        'count', 'mean', 'std', 'min', '25%', '50%', '75%', 'max',
+        'skew', 'kurtosis', 'missing_count', 'missing_pct'
+    ]]
+
+# Aggregations group_by_aggregate can compute chunk by chunk
+GROUP_BY_FUNCTIONS = ['mean', 'median', 'sum', 'min', 'max', 'count', 'std']
+
+def _group_partials(chunk, group_columns, agg_columns):
+    """Per-group count, sum, min, max and sum of squared deviations of one chunk"""
+    grouped = chunk.groupby(group_columns, observed=True)[agg_columns]
+    count = grouped.count()
+    return pd.concat({
+        'count': count,
+        'sum': grouped.sum(),
+        'min': grouped.min(),
+        'max': grouped.max(),
+        'M2': (grouped.var(ddof=0) * count).fillna(0)
+    }, axis=1)
+
+def _group_by_chunked(df, group_columns, agg_columns, agg_functions):
+    """Merge per-chunk group partials (and per-group quantile sketches for the median)"""
+    partials = []
+    sketches = {}
+    
+    for chunk in iter_frame_chunks(df, columns=list(dict.fromkeys(group_columns + agg_columns))):
+        partials.append(_group_partials(chunk, group_columns, agg_columns))
+        if 'median' in agg_functions:
+            for key, group in chunk.groupby(group_columns, observed=True):
+                # Single-column groups iterate as 1-tuples but are indexed by the bare value
+                key = key[0] if len(group_columns) == 1 else key
+                for col in agg_columns:
+                    sketch = build_sketch(group[col])
+                    sketches[key, col] = merge_sketches(sketches[key, col], sketch) if (key, col) in sketches else sketch
+    
+    if not partials:
+        return pd.DataFrame(columns=pd.MultiIndex.from_product([agg_columns, agg_functions]))
+    
+    combined = pd.concat(partials)
+    levels = list(range(len(group_columns)))
+    
+    count = combined['count'].groupby(level=levels).sum()
+    total = combined['sum'].groupby(level=levels).sum()
+    mean = total / count.replace(0, np.nan)
+    
+    # Chan et al.: add the spread of the chunk means around the overall mean to the within-chunk M2
+    chunk_mean = combined['sum'] / combined['count'].replace(0, np.nan)
+    spread = ((chunk_mean - mean.reindex(combined.index)) ** 2 * combined['count']).fillna(0)
+    M2 = combined['M2'].groupby(level=levels).sum() + spread.groupby(level=levels).sum()
+    
+    results = {
+        'count': count,
+        'sum': total,
+        'mean': mean,
+        'min': combined['min'].groupby(level=levels).min(),
+        'max': combined['max'].groupby(level=levels).max(),
+        'std': np.sqrt(M2 / (count - 1).where(count > 1))
+    }
+    
+    columns = {}
+    for col in agg_columns:
+        for func in agg_functions:
+            if func == 'median':
+                columns[col, func] = pd.Series(
+                    [sketch_quantiles(sketches[key, col], [0.5])[0] for key in count.index],
+                    index=count.index
+                )
+            else:
+                columns[col, func] = results[func][col]
+    
+    return pd.DataFrame(columns)
 
-def get_categorical_summary(df, columns=None):
+@cache_data(max_entries=16)
+def _cached_group_by(version, group_columns, agg_columns, agg_functions, _df):
+    return _group_by_chunked(_df, list(group_columns), list(agg_columns), list(agg_functions))
+
+def group_by_aggregate(df, group_columns, agg_columns, agg_functions):
+    """
+    Aggregate numeric columns per group
+    
+    Out-of-core datasets are aggregated one chunk at a time: per-group counts,
+    sums, extremes and squared deviations are merged across chunks, and
+    medians come from mergeable quantile sketches.
+    
+    Parameters:
+    - df: pandas DataFrame or OutOfCoreFrame
+    - group_columns: list of columns to group by
+    - agg_columns: list of numeric columns to aggregate
+    - agg_functions: list of names from GROUP_BY_FUNCTIONS
+    
+    Returns:
+    - DataFrame indexed by group with (column, function) columns
+    """
+    if is_out_of_core(df):
+        return _cached_group_by(
+            get_dataset_version(df), tuple(group_columns), tuple(agg_columns), tuple(agg_functions), df
+        )
+    
+    return df.groupby(group_columns).agg({col: list(agg_functions) for col in agg_columns})
+
+def get_categorical_summary(df, columns=None, top_k=100):
     """
     Generate summary for categorical columns
     
     Parameters:
     - df: pandas DataFrame
     - columns: list of categorical column names (None for all object columns)
+    - top_k: int, number of most frequent values to include in value_counts
     
     Returns:
-    - Dictionary with categorical summaries
+    - Dictionary with categorical summaries ('approximate' is True when the
+      unique count and frequencies come from sketches rather than exact counts)
     """
     if df is None:
         return {}
@@ -248,15 +638,18 @@ def get_categorical_summary(df, columns=None):
     
     summaries = {}
     for col in cat_columns:
-        value_counts = df[col].value_counts().reset_index()
-        value_counts.columns = ['value', 'count']
+        # Single-pass sketch: exact for low-cardinality columns, fixed memory otherwise
+        profile = get_column_profile(df, col)
+        
+        value_counts = top_values(profile, k=top_k)
         value_counts['percentage'] = value_counts['count'] / len(df) * 100
         
         summaries[col] = {
-            'unique_count': df[col].nunique(),
-            'missing_count': df[col].isnull().sum(),
-            'missing_pct': df[col].isnull().mean() * 100,
-            'value_counts': value_counts
+            'unique_count': estimate_distinct(profile),
+            'missing_count': profile['nulls'],
+            'missing_pct': profile['nulls'] / len(df) * 100 if len(df) else 0.0,
+            'value_counts': value_counts,
+            'approximate': not is_exact(profile)
         }
     
     return summaries
@@ -0,0 +1,231 @@
+import hashlib
+import weakref
+import numpy as np
+import pandas as pd
+from utils.caching import cache_data
+from utils.out_of_core import is_out_of_core
+
+# Lazy copies share data safely only under Copy-on-Write, which is always on from pandas 3
+if int(pd.__version__.split('.')[0]) < 3:
+    pd.set_option('mode.copy_on_write', True)
+
+# id(DataFrame) -> (weak reference, version string)
+_versions = {}
+
+# Appended versions remembered for deriving their cached results
+MAX_APPEND_LINEAGE = 64
+
+# Stacked parts recorded as separate appends (more are folded into the first part)
+MAX_STACK_LINKS = 32
+
+# Version of an appended dataset -> (base version, base rows, base, delta);
+# base and delta are kept only for out-of-core datasets, whose rows are not sliceable
+_appends = {}
+
+def get_dataset_version(df):
+    """
+    Return a content fingerprint identifying a version of a dataset
+
+    The fingerprint is computed once per DataFrame object and memoized, so it
+    is cheap to call on every rerun. Frames are treated as immutable: the pages
+    replace st.session_state.data with a new frame whenever the data changes.
+
+    Out-of-core datasets are identified by their storage file instead of
+    hashing every row.
+
+    Parameters:
+    - df: pandas DataFrame or OutOfCoreFrame
+
+    Returns:
+    - str, version identifier
+    """
+    if is_out_of_core(df):
+        return df.fingerprint
+
+    key = id(df)
+    entry = _versions.get(key)
+    if entry is not None and entry[0]() is df:
+        return entry[1]
+
+    version = _content_version(df)
+    _remember_version(df, version)
+    return version
+
+def _content_version(df, base_version=None, new_rows=None):
+    """Fingerprint of a frame's shape, columns, dtypes and rows; chained from base_version, only new_rows are hashed"""
+    digest = hashlib.sha1(base_version.encode('utf-8')) if base_version is not None else hashlib.sha1()
+    digest.update(str(df.shape).encode('utf-8'))
+    digest.update(str(list(df.columns)).encode('utf-8'))
+    digest.update(str(df.dtypes.astype(str).tolist()).encode('utf-8'))
+    digest.update(pd.util.hash_pandas_object(df if new_rows is None else new_rows, index=True).to_numpy().tobytes())
+    return digest.hexdigest()[:16]
+
+def _remember_version(df, version):
+    key = id(df)
+    _versions[key] = (weakref.ref(df, lambda _, key=key: _versions.pop(key, None)), version)
+
+def set_dataset_version(df, version):
+    """
+    Memoize the version of a frame holding the same data as an earlier one (e.g. reloaded from disk)
+
+    Parameters:
+    - df: pandas DataFrame
+    - version: str, version of the earlier frame
+    """
+    _remember_version(df, version)
+
+def lazy_copy(df):
+    """
+    Copy a dataset for one session without copying its data
+
+    The copy shares the data of df through pandas' Copy-on-Write: whichever
+    frame is written to first copies the columns it changes, so a session
+    that starts cleaning never alters the frame other sessions see. The copy
+    keeps the memoized version of df.
+
+    Parameters:
+    - df: pandas DataFrame or OutOfCoreFrame (read-only, returned as is)
+
+    Returns:
+    - pandas DataFrame or OutOfCoreFrame
+    """
+    if is_out_of_core(df):
+        return df
+
+    copy = df.copy(deep=False)
+    carry_version(df, copy)
+    return copy
+
+def writable_copy(df):
+    """
+    Copy a frame to modify without copying its data
+
+    Under Copy-on-Write the copy shares every column with df until one is
+    assigned or written to; only that column is then copied, so modifying a
+    few columns of a large dataset takes memory for those columns only. The
+    copy gets a version of its own, since it is about to change.
+
+    Parameters:
+    - df: pandas DataFrame
+
+    Returns:
+    - pandas DataFrame
+    """
+    return df.copy(deep=False)
+
+def carry_version(source, target):
+    """
+    Give a frame holding the same data as another the other's memoized version, if it has one
+
+    Parameters:
+    - source: pandas DataFrame
+    - target: pandas DataFrame with the same rows, columns and dtypes
+    """
+    entry = _versions.get(id(source))
+    if entry is not None and entry[0]() is source:
+        _remember_version(target, entry[1])
+
+def _record_lineage(version, base_version, base_rows, base=None, delta=None):
+    _appends[version] = (base_version, base_rows, base, delta)
+    while len(_appends) > MAX_APPEND_LINEAGE:
+        del _appends[next(iter(_appends))]
+
+def record_append(combined, base, delta):
+    """
+    Record that a dataset version consists of an earlier version followed by appended rows
+
+    Cached results of the appended version (profiles, statistics, duplicate
+    hashes, indexes) are then derived from the earlier version's and the
+    new rows' own, see split_append. In-memory versions get a fingerprint
+    chained from the earlier version and the new rows, so the history is
+    not hashed again.
+
+    Parameters:
+    - combined: pandas DataFrame or OutOfCoreFrame, base rows followed by delta rows
+    - base: the earlier version
+    - delta: the appended rows
+    """
+    base_version = get_dataset_version(base)
+
+    if is_out_of_core(combined):
+        _record_lineage(combined.fingerprint, base_version, len(base), base, delta)
+        return
+
+    version = _content_version(combined, base_version, combined.iloc[len(base):])
+    _remember_version(combined, version)
+    _record_lineage(version, base_version, len(base))
+
+def record_stack(combined, part_rows):
+    """
+    Record an in-memory dataset stacked from parts as if the parts had been appended one by one
+
+    Every prefix of the stack gets the version it would have had as an
+    appended version, so when one part changes, the cached results of the
+    parts before it are reused and only the rest is recomputed. Parts beyond
+    the last MAX_STACK_LINKS are recorded as one block with the first part.
+
+    Parameters:
+    - combined: pandas DataFrame, the stacked parts
+    - part_rows: list of int, rows of each part in stacking order
+    """
+    ends = np.cumsum(part_rows)
+    ends = ends[max(0, len(ends) - MAX_STACK_LINKS - 1):]
+
+    version = _content_version(combined.iloc[:ends[0]])
+    for start, end in zip(ends[:-1], ends[1:]):
+        prefix = combined.iloc[:end]
+        base_version, version = version, _content_version(prefix, version, prefix.iloc[start:])
+        _record_lineage(version, base_version, int(start))
+
+    _remember_version(combined, version)
+
+def split_append(version, df):
+    """
+    Split an appended dataset version into its earlier version and the appended rows
+
+    Parameters:
+    - version: str, version of df (as passed to the cached helpers)
+    - df: pandas DataFrame or OutOfCoreFrame
+
+    Returns:
+    - (base version, base rows, appended rows), or None when df was not
+      created by appending rows
+    """
+    entry = _appends.get(version)
+    if entry is None:
+        return None
+
+    base_version, base_rows, base, delta = entry
+    if base is None:
+        base, delta = df.iloc[:base_rows], df.iloc[base_rows:]
+    return base_version, base, delta
+
+def is_appended(df):
+    """Whether a dataset version was created by appending rows, so its cached results are incremental"""
+    return get_dataset_version(df) in _appends
+
+@cache_data(max_entries=32)
+def _cached_schema(version, _df):
+    return {
+        'columns': _df.columns.tolist(),
+        'dtypes': _df.dtypes.astype(str).to_dict(),
+        'numeric': _df.select_dtypes(include=np.number).columns.tolist(),
+        'categorical': _df.select_dtypes(include=['object', 'category']).columns.tolist(),
+        'datetime': _df.select_dtypes(include=['datetime64']).columns.tolist(),
+        'n_rows': len(_df)
+    }
+
+def get_schema(df):
+    """
+    Get column metadata of a dataset, cached per dataset version
+
+    Out-of-core datasets take it from the file schema, without reading any rows.
+
+    Parameters:
+    - df: pandas DataFrame or OutOfCoreFrame
+
+    Returns:
+    - dict with 'columns', 'dtypes' (column -> dtype name), 'numeric',
+      'categorical' and 'datetime' column lists, and 'n_rows'
+    """
+    return _cached_schema(get_dataset_version(df), df)
@@ -0,0 +1,289 @@
+import os
+import threading
+import time
+from datetime import datetime
+import streamlit as st
+from utils.data_loader import SUPPORTED_EXTENSIONS, read_local_file
+from utils.workspace import add_dataset, append_rows, stack_rows
+from utils.dataset_cache import lazy_copy
+
+# watchdog is optional; without it the folder is scanned on every poll
+try:
+    from watchdog.events import FileSystemEventHandler
+    from watchdog.observers import Observer
+except ImportError:
+    FileSystemEventHandler = object
+    Observer = None
+
+# File extensions picked up from a watched folder
+WATCH_EXTENSIONS = SUPPORTED_EXTENSIONS + ['parquet']
+
+# Default seconds between polls of a followed folder
+DEFAULT_POLL_SECONDS = 10
+
+# Files modified more recently than this are still being written and wait for a later poll
+SETTLE_SECONDS = 2
+
+# (folder path, out-of-core mode) -> FolderWatch, shared by all sessions of the server
+_watches = {}
+_watches_lock = threading.Lock()
+
+class _ChangeHandler(FileSystemEventHandler):
+    """Marks a watch for rescanning whenever something in its folder changes"""
+
+    def __init__(self, watch):
+        self._watch = watch
+
+    def on_any_event(self, event):
+        self._watch._dirty.set()
+
+class FolderWatch:
+    """
+    A local folder followed as one dataset: its data files stacked in order of arrival
+
+    Files present when the watch starts are stacked in name order; later
+    files are appended as they arrive. Shared by every session following the
+    folder, so each change is read once.
+    """
+
+    def __init__(self, path, out_of_core=False):
+        self.path = path
+        self.out_of_core = out_of_core
+        # File name -> {'signature', 'rows', 'part'} in stacking order; parts are kept
+        # out of core only, in memory a file's rows are a slice of the dataset
+        self.files = {}
+        # File name -> (signature, error) of files that could not be read, retried once they change
+        self.failed = {}
+        self.data = None
+        self.version = 0
+        self.checked = None
+        self.error = None
+        self._lock = threading.Lock()
+        self._dirty = threading.Event()
+        self._dirty.set()
+        self._pending = False
+        self._observer = None
+
+        if Observer is not None:
+            try:
+                self._observer = Observer()
+                self._observer.schedule(_ChangeHandler(self), path, recursive=False)
+                self._observer.daemon = True
+                self._observer.start()
+            except OSError:
+                # e.g. out of inotify watches: polling still works
+                self._observer = None
+
+    def scan(self):
+        """
+        List the settled data files of the folder
+
+        Returns:
+        - dict of file name -> (size, modification time) signature
+        """
+        now = time.time()
+        signatures = {}
+        self._pending = False
+        with os.scandir(self.path) as entries:
+            for entry in entries:
+                name = entry.name
+                if name.startswith('.') or not entry.is_file() or not name.lower().endswith(tuple(f".{ext}" for ext in WATCH_EXTENSIONS)):
+                    continue
+                stat = entry.stat()
+                if now - stat.st_mtime < SETTLE_SECONDS:
+                    self._pending = True
+                    continue
+                signatures[name] = (stat.st_size, stat.st_mtime_ns)
+        return signatures
+
+    def _parts(self):
+        """Current data of every file, in stacking order"""
+        parts = {}
+        offset = 0
+        for name, entry in self.files.items():
+            parts[name] = entry['part'] if entry['part'] is not None else self.data.iloc[offset:offset + entry['rows']]
+            offset += entry['rows']
+        return parts
+
+    def refresh(self):
+        """
+        Read new or changed files and publish a new version of the dataset when anything changed
+
+        New files are appended to the current version, so its cached results
+        are updated from their rows only. When a file changed or disappeared,
+        the dataset is restacked: only changed files are read again, and
+        cached results of the files before the first change are reused.
+
+        Returns:
+        - bool, whether a new version was published
+
+        Raises:
+        - ValueError if the folder does not exist or the files cannot be stacked
+        """
+        if not os.path.isdir(self.path):
+            raise ValueError(f"Folder not found: {self.path}")
+
+        with self._lock:
+            # With change notifications, unchanged folders are not even listed
+            if self._observer is not None and not self._dirty.is_set() and not self._pending:
+                self.checked = time.time()
+                return False
+            self._dirty.clear()
+
+            current = self.scan()
+            self.checked = time.time()
+            self.failed = {name: failure for name, failure in self.failed.items() if name in current}
+            changed = [name for name, entry in self.files.items() if name in current and current[name] != entry['signature']]
+            removed = [name for name in self.files if name not in current]
+            added = sorted(
+                name for name in current
+                if name not in self.files and self.failed.get(name, (None,))[0] != current[name]
+            )
+
+            loaded = {}
+            for name in changed + added:
+                try:
+                    loaded[name] = read_local_file(os.path.join(self.path, name), self.out_of_core)
+                    self.failed.pop(name, None)
+                except Exception as e:
+                    self.failed[name] = (current[name], str(e))
+
+            # A changed file that cannot be read keeps its previous rows
+            changed = [name for name in changed if name in loaded]
+            added = [name for name in added if name in loaded]
+            if not (changed or removed or added):
+                return False
+
+            files = dict(self.files)
+            data = self.data
+            try:
+                if data is not None and not changed and not removed:
+                    for name in added:
+                        try:
+                            data = append_rows(data, loaded[name])
+                        except ValueError as e:
+                            self.failed[name] = (current[name], str(e))
+                            continue
+                        files[name] = self._entry(current[name], loaded[name])
+                else:
+                    parts = self._parts() if data is not None else {}
+                    for name in removed:
+                        del files[name]
+                        del parts[name]
+                    for name in changed + added:
+                        files[name] = self._entry(current[name], loaded[name])
+                        parts[name] = loaded[name]
+                    data = stack_rows([parts[name] for name in files]) if files else None
+            except ValueError as e:
+                self.error = str(e)
+                raise
+
+            if data is self.data:
+                return False
+
+            self.files = files
+            self.data = data
+            self.version += 1
+            self.error = None
+            return True
+
+    def _entry(self, signature, data):
+        return {'signature': signature, 'rows': len(data), 'part': data if self.out_of_core else None}
+
+def get_folder_watch(path, out_of_core=False):
+    """
+    Get the shared watch of a folder, starting it if needed
+
+    Parameters:
+    - path: str, folder path
+    - out_of_core: bool, store the folder's data as partitioned Parquet on disk
+
+    Returns:
+    - FolderWatch
+    """
+    key = (os.path.abspath(path), out_of_core)
+    with _watches_lock:
+        if key not in _watches:
+            _watches[key] = FolderWatch(key[0], out_of_core)
+        return _watches[key]
+
+def follow_folder(path, out_of_core=False, interval=DEFAULT_POLL_SECONDS):
+    """
+    Make the session follow a folder: its dataset becomes the active one and is refreshed as files arrive
+
+    Parameters:
+    - path: str, folder path
+    - out_of_core: bool, store the folder's data as partitioned Parquet on disk
+    - interval: int, seconds between polls
+
+    Raises:
+    - ValueError if the folder does not exist
+    """
+    if not os.path.isdir(path):
+        raise ValueError(f"Folder not found: {path}")
+
+    st.session_state.folder_watch = {
+        'path': os.path.abspath(path),
+        'out_of_core': out_of_core,
+        'interval': interval,
+        'version': 0
+    }
+
+def stop_following_folder():
+    """Stop following the session's folder (the last version stays loaded)"""
+    st.session_state.folder_watch = None
+
+def collect_folder_updates():
+    """
+    Make the latest version of the followed folder's dataset active
+
+    Returns:
+    - bool, whether a new version was picked up
+    """
+    settings = st.session_state.get('folder_watch')
+    if not settings:
+        return False
+
+    watch = get_folder_watch(settings['path'], settings['out_of_core'])
+    if watch.version == settings['version'] or watch.data is None:
+        return False
+
+    name = f"{os.path.basename(watch.path) or watch.path} (folder)"
+    # The watch's data is shared by every following session, so each gets its own copy
+    data = lazy_copy(watch.data)
+    add_dataset(name, data)
+    st.session_state.data = data
+    st.session_state.uploaded_file_name = name
+    st.session_state.upload_status = "success"
+    st.session_state.data_cleaned = False
+    settings['version'] = watch.version
+    return True
+
+def show_folder_watch():
+    """
+    Poll the followed folder from the sidebar, rerunning the page when a new version is published
+
+    Called on every page, so a dashboard left open on any page keeps up with the folder.
+    """
+    settings = st.session_state.get('folder_watch')
+    if not settings:
+        return
+
+    @st.fragment(run_every=settings['interval'])
+    def poll():
+        watch = get_folder_watch(settings['path'], settings['out_of_core'])
+        try:
+            watch.refresh()
+        except ValueError as e:
+            st.warning(f"⚠️ {e}")
+
+        if collect_folder_updates():
+            st.rerun()
+
+        checked = datetime.fromtimestamp(watch.checked).strftime('%H:%M:%S') if watch.checked else 'never'
+        st.caption(f"👁️ Following **{watch.path}**: {len(watch.files)} files, version {watch.version}, checked at {checked}")
+        for name, (_, error) in watch.failed.items():
+            st.caption(f"⚠️ Skipped {name}: {error}")
+
+    with st.sidebar:
+        poll()
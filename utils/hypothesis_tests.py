@@ -0,0 +1,190 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+import pandas as pd
+import numpy as np
+from scipy import stats
+from utils.caching import cache_data
+from utils.dataset_cache import get_dataset_version, split_append
+
+# Tests that compare exactly two groups
+TWO_GROUP_TESTS = ['t-test', 'mann-whitney']
+
+# Tests that compare any number of groups
+MULTI_GROUP_TESTS = ['anova', 'kruskal', 'permutation']
+
+# Memory budget for one batch of permuted group codes
+PERMUTATION_BATCH_MEMORY_MB = 128
+
+# Below this many (rows x permutations) the process pool costs more than it saves
+PARALLEL_WORK_THRESHOLD = 5_000_000
+
+@cache_data(max_entries=64)
+def _cached_group_codes(version, group_column, _df):
+    appended = split_append(version, _df)
+    if appended is not None:
+        # Factorize only the new rows and renumber both sides into the merged sorted labels
+        base_version, base, delta = appended
+        base_codes, base_labels = _cached_group_codes(base_version, group_column, base)
+        delta_codes, delta_labels = pd.factorize(delta[group_column], sort=True)
+        labels = pd.Index(base_labels).append(pd.Index(delta_labels)).unique().sort_values()
+
+        def renumber(codes, old_labels):
+            mapping = labels.get_indexer(pd.Index(old_labels))
+            return np.where(codes >= 0, mapping[codes] if len(mapping) else codes, -1)
+
+        codes = np.concatenate([renumber(base_codes, base_labels), renumber(delta_codes, delta_labels)])
+        return codes, list(labels)
+
+    codes, uniques = pd.factorize(_df[group_column], sort=True)
+    return codes, list(uniques)
+
+def get_group_codes(df, group_column):
+    """
+    Factorize a grouping column into integer codes, cached per dataset version
+
+    Parameters:
+    - df: pandas DataFrame
+    - group_column: str, grouping column
+
+    Returns:
+    - (numpy array of codes with -1 for missing values, list of group labels)
+    """
+    return _cached_group_codes(get_dataset_version(df), group_column, df)
+
+def _between_group_statistic(sums, counts):
+    """Permutation statistic: sum of squared group totals over group sizes (monotone in between-group SS)"""
+    return (sums ** 2 / counts).sum(axis=-1)
+
+def _permutation_batch(args):
+    """Count permuted statistics at least as extreme as the observed one for one batch"""
+    values, codes, n_groups, counts, observed, size, seed = args
+    rng = np.random.default_rng(seed)
+
+    # Shuffle the group labels independently in every row of the batch
+    permuted = rng.permuted(np.tile(codes, (size, 1)), axis=1)
+    flat = (permuted + n_groups * np.arange(size)[:, None]).ravel()
+    sums = np.bincount(flat, weights=np.tile(values, size), minlength=size * n_groups).reshape(size, n_groups)
+
+    return int((_between_group_statistic(sums, counts) >= observed * (1 - 1e-12)).sum())
+
+def _permutation_tasks(values, codes, n_permutations, random_state):
+    """Split one permutation test into batches sized to the memory budget"""
+    n_groups = int(codes.max()) + 1
+    counts = np.bincount(codes, minlength=n_groups).astype(float)
+    observed = _between_group_statistic(np.bincount(codes, weights=values, minlength=n_groups), counts)
+
+    batch = max(1, min(n_permutations, int(PERMUTATION_BATCH_MEMORY_MB * 1024 ** 2 // (len(values) * 24))))
+    sizes = [batch] * (n_permutations // batch)
+    if n_permutations % batch:
+        sizes.append(n_permutations % batch)
+
+    seeds = np.random.SeedSequence(random_state).spawn(len(sizes))
+    return [(values, codes, n_groups, counts, observed, size, seed) for size, seed in zip(sizes, seeds)]
+
+def _split_groups(values, codes, selected_codes):
+    """Keep complete rows of the selected groups and renumber their codes 0..k-1"""
+    mask = ~np.isnan(values) & np.isin(codes, selected_codes)
+    remap = np.full(max(selected_codes) + 1, -1)
+    remap[selected_codes] = np.arange(len(selected_codes))
+    return values[mask], remap[codes[mask]]
+
+def run_group_tests(df, metric_columns, group_column, tests, groups=None, n_permutations=1000,
+                    max_workers=None, random_state=42):
+    """
+    Test many metric columns against one grouping column in a single batched request
+
+    Parameters:
+    - df: pandas DataFrame
+    - metric_columns: list of numeric columns to test
+    - group_column: str, grouping column
+    - tests: list of test names from TWO_GROUP_TESTS and MULTI_GROUP_TESTS
+    - groups: list of group labels to compare (None for all; two-group tests
+      use the first two)
+    - n_permutations: int, number of permutations for the permutation test
+    - max_workers: int, number of worker processes (None uses all CPUs)
+    - random_state: int, random seed for reproducibility
+
+    Returns:
+    - DataFrame with one row per (metric, test): statistic, p-value and groups compared
+    """
+    codes, labels = get_group_codes(df, group_column)
+
+    if groups is None:
+        groups = labels
+    selected_codes = [labels.index(g) for g in groups if g in labels]
+
+    rows = []
+    permutation_jobs = []
+
+    for metric in metric_columns:
+        values = df[metric].to_numpy(dtype=float, na_value=np.nan)
+
+        for test in tests:
+            test_codes = selected_codes[:2] if test in TWO_GROUP_TESTS else selected_codes
+            row = {
+                'Metric': metric,
+                'Test': test,
+                'Groups': ", ".join(str(labels[c]) for c in test_codes),
+                'Statistic': np.nan,
+                'p-value': np.nan
+            }
+
+            if len(test_codes) < 2:
+                rows.append(row)
+                continue
+
+            test_values, test_group_codes = _split_groups(values, codes, test_codes)
+            samples = [test_values[test_group_codes == g] for g in range(len(test_codes))]
+
+            if any(len(sample) < 2 for sample in samples):
+                rows.append(row)
+                continue
+
+            if test == 't-test':
+                result = stats.ttest_ind(samples[0], samples[1], equal_var=False)
+                row['Statistic'], row['p-value'] = result.statistic, result.pvalue
+            elif test == 'mann-whitney':
+                result = stats.mannwhitneyu(samples[0], samples[1], alternative='two-sided')
+                row['Statistic'], row['p-value'] = result.statistic, result.pvalue
+            elif test == 'anova':
+                result = stats.f_oneway(*samples)
+                row['Statistic'], row['p-value'] = result.statistic, result.pvalue
+            elif test == 'kruskal':
+                result = stats.kruskal(*samples)
+                row['Statistic'], row['p-value'] = result.statistic, result.pvalue
+            elif test == 'permutation':
+                # Report the observed F statistic; the p-value comes from the permutations
+                row['Statistic'] = stats.f_oneway(*samples).statistic
+                permutation_jobs.append((len(rows), _permutation_tasks(
+                    test_values, test_group_codes, n_permutations, random_state
+                )))
+
+            rows.append(row)
+
+    # Run the permutation batches of every metric together
+    tasks = [task for _, job_tasks in permutation_jobs for task in job_tasks]
+    if tasks:
+        if max_workers is None:
+            max_workers = os.cpu_count() or 1
+
+        work = sum(len(task[0]) * task[5] for task in tasks)
+        exceed_counts = None
+        if max_workers > 1 and len(tasks) > 1 and work >= PARALLEL_WORK_THRESHOLD:
+            try:
+                with ProcessPoolExecutor(max_workers=min(max_workers, len(tasks))) as executor:
+                    exceed_counts = list(executor.map(_permutation_batch, tasks))
+            except (OSError, BrokenProcessPool):
+                # Fall back to serial execution where worker processes are unavailable
+                exceed_counts = None
+
+        if exceed_counts is None:
+            exceed_counts = [_permutation_batch(task) for task in tasks]
+
+        position = 0
+        for row_index, job_tasks in permutation_jobs:
+            exceeded = sum(exceed_counts[position:position + len(job_tasks)])
+            position += len(job_tasks)
+            rows[row_index]['p-value'] = (exceeded + 1) / (n_permutations + 1)
+
+    return pd.DataFrame(rows, columns=['Metric', 'Test', 'Groups', 'Statistic', 'p-value'])
@@ -0,0 +1,335 @@
+import io
+import os
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+import streamlit as st
+from utils.data_loader import read_uploaded_file, open_local_file, read_workbook, read_csv_header
+from utils.workspace import add_dataset, append_rows
+from utils.out_of_core import is_out_of_core
+from utils.dataset_cache import lazy_copy
+from utils.schema_registry import registry_stamp
+from utils.shared_datasets import content_key, get_shared_datasets
+
+# Ingest jobs running at the same time; further jobs wait in the queue
+MAX_INGEST_WORKERS = 2
+
+# Finished jobs kept for pick-up (e.g. by a new session after a browser refresh)
+MAX_FINISHED_JOBS = 20
+
+# Query parameter listing the jobs submitted from a browser tab, so the session a refresh starts picks them up
+JOB_QUERY_PARAM = 'ingest_job'
+
+# Job states
+JOB_QUEUED = 'queued'
+JOB_RUNNING = 'running'
+JOB_DONE = 'done'
+JOB_FAILED = 'failed'
+JOB_CANCELLED = 'cancelled'
+
+# Job id -> IngestJob, shared by all sessions of the server
+_jobs = {}
+_jobs_lock = threading.Lock()
+_executor = None
+
+class IngestCancelled(Exception):
+    """Raised inside a job's worker thread when the job has been cancelled"""
+
+class IngestJob:
+    """
+    State of one background ingest, shared between its worker thread and the script runs
+
+    The worker updates bytes_read and rows_parsed as it goes; once the job is
+    done, datasets maps dataset names to the loaded data. For CSV files,
+    header holds the header fingerprint and first rows used to pin the schema.
+    """
+
+    def __init__(self, name, total_bytes=None):
+        # Unguessable, since knowing a job's id is what lets a session pick up its data
+        self.id = uuid.uuid4().hex
+        self.name = name
+        self.status = JOB_QUEUED
+        self.total_bytes = total_bytes
+        self.bytes_read = 0
+        self.rows_parsed = 0
+        self.datasets = None
+        self.header = None
+        self.error = None
+        self.submitted = time.time()
+        self.finished = None
+        self._cancel_event = threading.Event()
+        self._lock = threading.Lock()
+
+    @property
+    def finished_running(self):
+        return self.status in (JOB_DONE, JOB_FAILED, JOB_CANCELLED)
+
+    @property
+    def progress(self):
+        """Fraction of the input read, or None when the input size is unknown"""
+        if not self.total_bytes:
+            return None
+        return min(self.bytes_read / self.total_bytes, 1.0)
+
+    def cancel(self):
+        """Ask the worker to stop at its next read or parsed chunk"""
+        self._cancel_event.set()
+
+    def check_cancelled(self):
+        """Raise IngestCancelled in the worker if the job has been cancelled"""
+        if self._cancel_event.is_set():
+            raise IngestCancelled()
+
+    def add_rows(self, rows):
+        """Progress callback for the loaders (may be called from several threads)"""
+        with self._lock:
+            self.rows_parsed += rows
+        self.check_cancelled()
+
+class _ProgressReader:
+    """Binary file-like object over an upload's bytes that reports reads to a job"""
+
+    def __init__(self, content, name, job):
+        self._buffer = io.BytesIO(content)
+        self.name = name
+        self._job = job
+
+    def read(self, size=-1):
+        self._job.check_cancelled()
+        data = self._buffer.read(size)
+        # Reported as the position, so a rewind for a second pass shows up as such
+        self._job.bytes_read = self._buffer.tell()
+        return data
+
+    def seek(self, offset, whence=io.SEEK_SET):
+        return self._buffer.seek(offset, whence)
+
+    def tell(self):
+        return self._buffer.tell()
+
+    def seekable(self):
+        return True
+
+    def readable(self):
+        return True
+
+def _get_executor():
+    global _executor
+    with _jobs_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=MAX_INGEST_WORKERS, thread_name_prefix='ingest')
+        return _executor
+
+def _prune_jobs():
+    """Forget the oldest finished jobs beyond MAX_FINISHED_JOBS"""
+    with _jobs_lock:
+        finished = sorted((job for job in _jobs.values() if job.finished_running), key=lambda job: job.finished)
+        for job in finished[:max(0, len(finished) - MAX_FINISHED_JOBS)]:
+            del _jobs[job.id]
+
+def _run(job, load):
+    """Worker body: run the loader and record its outcome on the job"""
+    if job._cancel_event.is_set():
+        job.status = JOB_CANCELLED
+    else:
+        job.status = JOB_RUNNING
+        try:
+            job.datasets = load(job)
+            job.status = JOB_DONE
+        except IngestCancelled:
+            job.status = JOB_CANCELLED
+        except Exception as e:
+            job.error = str(e)
+            job.status = JOB_FAILED
+
+    job.finished = time.time()
+    _prune_jobs()
+
+def _submit(job, load):
+    with _jobs_lock:
+        _jobs[job.id] = job
+    _get_executor().submit(_run, job, load)
+    return job.id
+
+def submit_upload(uploaded_file, out_of_core=False, sheet_names=None, union_sheets=False, append_to=None):
+    """
+    Load an uploaded file in a background worker
+
+    The upload's bytes are copied, so the job does not depend on the script
+    run (or session) that submitted it. A file another session already
+    loaded with the same options is not parsed again: the job gets copies of
+    the shared datasets.
+
+    Parameters:
+    - uploaded_file: file-like object with a 'name' attribute (e.g. a Streamlit UploadedFile)
+    - out_of_core: bool, store the data as partitioned Parquet on disk
+    - sheet_names: list of sheets to load from an Excel workbook (None for a plain file)
+    - union_sheets: bool, stack sheets with matching columns into one dataset
+    - append_to: (name, dataset) tuple to append the file's rows to as a new version
+      of that dataset (None to load the file as a dataset of its own); the rows
+      are stored the way the dataset is, in memory or out of core
+
+    Returns:
+    - str job id
+    """
+    uploaded_file.seek(0)
+    content = uploaded_file.read()
+    name = uploaded_file.name
+    job = IngestJob(name, total_bytes=len(content))
+    if append_to is not None:
+        out_of_core = is_out_of_core(append_to[1])
+    shared = get_shared_datasets()
+
+    def load(job):
+        reader = _ProgressReader(content, name, job)
+        # Pinning a schema changes how the same bytes are parsed
+        key = content_key(content, name, out_of_core, sheet_names, union_sheets, registry_stamp())
+        def parse():
+            if sheet_names:
+                sheets = read_workbook(reader, sheet_names, union_sheets, out_of_core, progress=job.add_rows)
+                return {f"{name} [{sheet}]": data for sheet, data in sheets.items()}
+            return {name: read_uploaded_file(reader, out_of_core, progress=job.add_rows)}
+
+        datasets = shared.get_or_load(key, parse)
+        if not sheet_names:
+            job.header = read_csv_header(reader, name)
+
+        if append_to is None:
+            return datasets
+        if len(datasets) > 1:
+            raise ValueError("Append one sheet, or a union of sheets with matching columns, at a time.")
+
+        # The appended version keeps the dataset's name (and the header it was pinned by)
+        job.header = None
+        target_name, target = append_to
+        return {target_name: append_rows(target, next(iter(datasets.values())))}
+
+    return _submit(job, load)
+
+def submit_local_file(path):
+    """
+    Open a local file as an out-of-core dataset in a background worker
+
+    Parameters:
+    - path: str, file path
+
+    Returns:
+    - str job id
+    """
+    name = os.path.basename(path)
+    job = IngestJob(name, total_bytes=None)
+
+    def load(job):
+        data = open_local_file(path, progress=job.add_rows)
+        job.header = read_csv_header(path, path)
+        return {name: data}
+
+    return _submit(job, load)
+
+def get_job(job_id):
+    """
+    Look up a job by id
+
+    Returns:
+    - IngestJob, or None when the id is unknown (or the finished job was forgotten)
+    """
+    with _jobs_lock:
+        return _jobs.get(job_id)
+
+def cancel_job(job_id):
+    """
+    Cancel a queued or running job
+
+    Parameters:
+    - job_id: str, job id
+    """
+    job = get_job(job_id)
+    if job is not None:
+        job.cancel()
+
+def _sync_query_params():
+    """Keep the URL listing the session's jobs the server still knows"""
+    tracked = [job_id for job_id in st.session_state.get('tracked_jobs', []) if get_job(job_id) is not None]
+    st.session_state.tracked_jobs = tracked
+    if st.query_params.get_all(JOB_QUERY_PARAM) != tracked:
+        if tracked:
+            st.query_params[JOB_QUERY_PARAM] = tracked
+        elif JOB_QUERY_PARAM in st.query_params:
+            del st.query_params[JOB_QUERY_PARAM]
+
+def track_job(job_id):
+    """
+    Follow a submitted job in this session and in the page URL
+
+    The URL keeps the job ids across a browser refresh, which starts a new
+    session; that session picks up only the jobs listed there, so loads are
+    never handed to another user's session.
+
+    Parameters:
+    - job_id: str, as returned by submit_upload or submit_local_file
+    """
+    st.session_state.ingest_jobs.append(job_id)
+    st.session_state.tracked_jobs = st.session_state.get('tracked_jobs', []) + [job_id]
+    _sync_query_params()
+
+def use_job_datasets(job):
+    """
+    Add the datasets of a finished job to the session's workspace and make the first one active
+
+    Parameters:
+    - job: IngestJob with status JOB_DONE
+    """
+    if 'upload_headers' not in st.session_state:
+        st.session_state.upload_headers = {}
+
+    # Sessions picking up the same job each get their own copy of its data
+    datasets = {name: lazy_copy(data) for name, data in job.datasets.items()}
+    for name, data in datasets.items():
+        add_dataset(name, data)
+        if job.header is not None:
+            st.session_state.upload_headers[name] = job.header
+
+    name, data = next(iter(datasets.items()))
+    st.session_state.data = data
+    st.session_state.uploaded_file_name = name
+    st.session_state.upload_status = "success"
+    st.session_state.data_cleaned = False
+
+def collect_finished_jobs():
+    """
+    Pick up the outcome of this session's background jobs that have finished
+
+    Called at the top of every page, so a dataset becomes active on whichever
+    page the user is working on when its job completes. A new session (e.g.
+    after a browser refresh) takes over the jobs listed in the page URL.
+
+    Returns:
+    - list of IngestJob that finished since the last call
+    """
+    if 'ingest_jobs' not in st.session_state:
+        st.session_state.tracked_jobs = [
+            job_id for job_id in st.query_params.get_all(JOB_QUERY_PARAM) if get_job(job_id) is not None
+        ]
+        st.session_state.ingest_jobs = list(st.session_state.tracked_jobs)
+
+    finished = []
+    pending = []
+    for job_id in st.session_state.ingest_jobs:
+        job = get_job(job_id)
+        if job is None:
+            continue
+        if not job.finished_running:
+            pending.append(job_id)
+            continue
+
+        if job.status == JOB_DONE:
+            use_job_datasets(job)
+        elif job.status == JOB_FAILED:
+            st.session_state.upload_status = "error"
+            st.session_state.upload_error = job.error
+        finished.append(job)
+
+    st.session_state.ingest_jobs = pending
+    _sync_query_params()
+    return finished
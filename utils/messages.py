@@ -0,0 +1,38 @@
+import logging
+
+# Streamlit is only needed to show messages on a page; headless runs log them
+try:
+    import streamlit as st
+    from streamlit.runtime.scriptrunner import get_script_run_ctx
+except ImportError:
+    st = None
+
+logger = logging.getLogger('datavizpro')
+
+def _in_script_run():
+    """Whether the caller runs as part of a Streamlit page (not a worker thread, process or batch job)"""
+    return st is not None and get_script_run_ctx(suppress_warning=True) is not None
+
+def report_error(message):
+    """
+    Report an error to the user: on the page being run, or in the log when running headless
+
+    Parameters:
+    - message: str
+    """
+    if _in_script_run():
+        st.error(message)
+    else:
+        logger.error(message)
+
+def report_warning(message):
+    """
+    Report a warning to the user: on the page being run, or in the log when running headless
+
+    Parameters:
+    - message: str
+    """
+    if _in_script_run():
+        st.warning(message)
+    else:
+        logger.warning(message)
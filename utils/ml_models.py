@@ -1,4 +1,3 @@
-import streamlit as st
 import pandas as pd
 import numpy as np
 from sklearn.model_selection import train_test_split
@@ -9,6 +8,8 @@ from sklearn.metrics import mean_squared_error, r2_score, accuracy_score, classi
 from sklearn.impute import SimpleImputer
 import plotly.express as px
 import plotly.graph_objects as go
+from utils.dataset_cache import writable_copy
+from utils.messages import report_error
 
 def prepare_data_for_ml(df, target_column, feature_columns=None, categorical_columns=None, test_size=0.2, random_state=42):
     """
@@ -27,11 +28,11 @@ def prepare_data_for_ml(df, target_column, feature_columns=None, categorical_col
     - X_train, X_test, y_train, y_test, feature_names, preprocessor
     """
     if df is None or target_column not in df.columns:
-        st.error(f"Target column {target_column} not found in the dataframe")
+        report_error(f"Target column {target_column} not found in the dataframe")
         return None, None, None, None, None, None
     
-    # Make a copy to avoid modifying the original
-    df_ml = df.copy()
+    # The dataset is only read; encoded and imputed columns are copied as they are assigned below
+    df_ml = df
     
     # Select features
     if feature_columns is None:
@@ -41,7 +42,7 @@ def prepare_data_for_ml(df, target_column, feature_columns=None, categorical_col
         feature_columns = [col for col in feature_columns if col in df_ml.columns]
     
     if not feature_columns:
-        st.error("No feature columns available for modeling")
+        report_error("No feature columns available for modeling")
         return None, None, None, None, None, None
     
     # Create feature matrix and target vector
@@ -54,7 +55,7 @@ def prepare_data_for_ml(df, target_column, feature_columns=None, categorical_col
     
     # Handle categorical features
     preprocessor = {}
-    X_processed = X.copy()
+    X_processed = writable_copy(X)
     
     if categorical_columns:
         # Encode categorical features
@@ -380,8 +381,8 @@ def get_model_prediction(model, X_new, preprocessor, target_type="regression"):
     if model is None or X_new is None or preprocessor is None:
         return None
     
-    # Make a copy to avoid modifying the original
-    X_processed = X_new.copy()
+    # Lazy copy: only the encoded and imputed columns take new memory
+    X_processed = writable_copy(X_new)
     
     # Preprocess categorical features
     for col, le in preprocessor.items():
@@ -0,0 +1,448 @@
+import os
+import shutil
+import tempfile
+import threading
+import uuid
+import weakref
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.ipc as ipc
+import pyarrow.parquet as pq
+
+# Rows per Parquet row group (and per chunk handed to the chunked operators)
+ROW_GROUP_SIZE = 500_000
+
+# Directory holding the partitioned files of out-of-core datasets
+STORAGE_DIR = os.path.join(tempfile.gettempdir(), 'datavizpro_out_of_core')
+
+# Directory holding this process's files; the directories of processes that ended are swept at startup
+PROCESS_STORAGE_DIR = os.path.join(STORAGE_DIR, f"process-{os.getpid()}")
+
+# Directory holding the uncompressed Arrow column caches used for memory-mapped projections
+COLUMN_CACHE_DIR = os.path.join(PROCESS_STORAGE_DIR, 'columns')
+
+def _remove_file(path):
+    try:
+        os.remove(path)
+    except OSError:
+        pass
+
+def _remove_storage(path, column_dir):
+    """Delete a proxy's files: its Parquet file when the app wrote it, and its column caches"""
+    if path is not None:
+        _remove_file(path)
+    shutil.rmtree(column_dir, ignore_errors=True)
+
+def _process_alive(pid):
+    """Whether a process is running (always assumed on Windows, where signals cannot probe it)"""
+    if os.name == 'nt':
+        return True
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except OSError:
+        return True
+    return True
+
+def sweep_stale_storage():
+    """
+    Delete the stored files of processes that ended without removing them
+
+    Runs once at startup. A directory named after this process's id can only
+    be left over from an earlier process that had the same id.
+
+    Returns:
+    - list of removed paths
+    """
+    if not os.path.isdir(STORAGE_DIR):
+        return []
+
+    removed = []
+    for entry in os.scandir(STORAGE_DIR):
+        pid = entry.name[len('process-'):]
+        if not (entry.name.startswith('process-') and pid.isdigit() and entry.is_dir(follow_symlinks=False)):
+            continue
+        if int(pid) == os.getpid() or not _process_alive(int(pid)):
+            shutil.rmtree(entry.path, ignore_errors=True)
+            removed.append(entry.path)
+    return removed
+
+class OutOfCoreFrame:
+    """
+    Read-only proxy for a dataset stored as a row-group-partitioned Parquet file
+
+    Exposes the parts of the DataFrame API the pages rely on for metadata
+    (columns, dtypes, shape, select_dtypes, head) and loads single columns on
+    demand; whole-table work goes through iter_chunks, one row group at a time.
+
+    Column projections are served from uncompressed Arrow files, one per
+    column, built from the Parquet store the first time the column is
+    requested and memory-mapped, so selecting two columns of a wide dataset
+    reads and caches only those two columns.
+
+    Files the app wrote itself (temporary=True: ingested uploads and the
+    results of chunked operations) are deleted once the proxy is garbage
+    collected, i.e. when no session, cache or lineage record holds it. The
+    column caches always go with the proxy.
+    """
+
+    def __init__(self, path, temporary=False):
+        self.path = path
+        parquet_file = pq.ParquetFile(path)
+        self.num_rows = parquet_file.metadata.num_rows
+        self.num_row_groups = parquet_file.metadata.num_row_groups
+
+        # Zero-row frame carrying the column names and pandas dtypes
+        self._schema = parquet_file.schema_arrow
+        self._meta = self._schema.empty_table().to_pandas()
+
+        stat = os.stat(path)
+        self.fingerprint = f"ooc:{os.path.abspath(path)}:{stat.st_size}:{stat.st_mtime_ns}"
+
+        # Column name -> memory-mapped array of its column cache; the proxy may be shared
+        # by several sessions, so builds take turns
+        self._mapped = {}
+        self._column_lock = threading.Lock()
+        self._column_dir = os.path.join(COLUMN_CACHE_DIR, uuid.uuid4().hex)
+        weakref.finalize(self, _remove_storage, path if temporary else None, self._column_dir)
+
+    @property
+    def columns(self):
+        return self._meta.columns
+
+    @property
+    def dtypes(self):
+        return self._meta.dtypes
+
+    @property
+    def shape(self):
+        return (self.num_rows, len(self._meta.columns))
+
+    def __len__(self):
+        return self.num_rows
+
+    def select_dtypes(self, include=None, exclude=None):
+        """Select columns by dtype; returns an empty frame whose columns match"""
+        return self._meta.select_dtypes(include=include, exclude=exclude)
+
+    def iter_chunks(self, columns=None):
+        """
+        Read the dataset one row group at a time
+
+        Parameters:
+        - columns: list of columns to read (None for all)
+
+        Yields:
+        - DataFrame chunks with a continuous RangeIndex
+        """
+        parquet_file = pq.ParquetFile(self.path)
+        offset = 0
+        for i in range(self.num_row_groups):
+            chunk = parquet_file.read_row_group(i, columns=columns).to_pandas()
+            chunk.index = pd.RangeIndex(offset, offset + len(chunk))
+            offset += len(chunk)
+            yield chunk
+
+    def _mapped_columns(self, columns):
+        """Memory-mapped arrays of the given columns, caching the ones not requested before"""
+        with self._column_lock:
+            missing = [col for col in dict.fromkeys(columns) if col not in self._mapped]
+            if missing:
+                os.makedirs(self._column_dir, exist_ok=True)
+                paths = {col: os.path.join(self._column_dir, f"{self.columns.get_loc(col)}.arrow") for col in missing}
+                writers = {col: ipc.new_file(paths[col], pa.schema([self._schema.field(col)])) for col in missing}
+                try:
+                    # Only the missing columns are read from each row group
+                    parquet_file = pq.ParquetFile(self.path)
+                    for i in range(self.num_row_groups):
+                        table = parquet_file.read_row_group(i, columns=missing)
+                        for col in missing:
+                            writers[col].write_table(table.select([col]))
+                finally:
+                    for writer in writers.values():
+                        writer.close()
+
+                # Reading a memory-mapped IPC file maps the column buffers without copying them
+                for col in missing:
+                    self._mapped[col] = ipc.open_file(pa.memory_map(paths[col])).read_all().column(0)
+            return [self._mapped[col] for col in columns]
+
+    def load_columns(self, columns, rows=None):
+        """
+        Load selected columns into memory from their memory-mapped column caches
+
+        Parameters:
+        - columns: list of column names
+        - rows: sorted array of row positions to take (None for all rows)
+
+        Returns:
+        - DataFrame with only the selected columns
+        """
+        columns = list(columns)
+        # The file's pandas metadata restores the pandas dtypes (e.g. nullable integers)
+        schema = pa.schema([self._schema.field(col) for col in columns], metadata=self._schema.metadata)
+        table = pa.Table.from_arrays(self._mapped_columns(columns), schema=schema)
+        if rows is not None:
+            table = table.take(pa.array(rows, type=pa.int64()))
+        frame = table.to_pandas()
+        frame.index = pd.Index(rows) if rows is not None else pd.RangeIndex(len(frame))
+        return frame
+
+    def head(self, n=5):
+        """Read the first n rows"""
+        if n <= 0:
+            return self._meta.copy()
+
+        parts = []
+        remaining = n
+        for chunk in self.iter_chunks():
+            parts.append(chunk.iloc[:remaining])
+            remaining -= len(parts[-1])
+            if remaining <= 0:
+                break
+        return pd.concat(parts) if parts else self._meta.copy()
+
+    def sample(self, n, random_state=42, columns=None):
+        """
+        Draw a uniform random sample of n rows (all rows when n >= len)
+
+        Parameters:
+        - n: int, sample size
+        - random_state: int, random seed for reproducibility
+        - columns: list of columns to load (None for all); projected samples
+          are taken from the memory-mapped column caches
+
+        Returns:
+        - in-memory DataFrame with the sampled rows in their original order
+        """
+        rng = np.random.default_rng(random_state)
+        keep = np.sort(rng.choice(self.num_rows, size=min(n, self.num_rows), replace=False))
+        if columns is not None:
+            return self.load_columns(columns, rows=keep)
+
+        parts = []
+        for chunk in self.iter_chunks():
+            start, stop = chunk.index[0], chunk.index[-1] + 1
+            selected = keep[(keep >= start) & (keep < stop)]
+            if len(selected):
+                parts.append(chunk.loc[selected])
+        return pd.concat(parts) if parts else self._meta.copy()
+
+    def __getitem__(self, key):
+        """Load one column (str) or a projection of columns (list) into memory"""
+        if isinstance(key, str):
+            return self.load_columns([key])[key]
+        if isinstance(key, (list, pd.Index)):
+            return self.load_columns(list(key))
+        raise TypeError("Out-of-core datasets support column selection only; use the chunked operators")
+
+    def to_pandas(self):
+        """Load the whole dataset into memory"""
+        return pq.read_table(self.path).to_pandas()
+
+def is_out_of_core(df):
+    """Whether a dataset is an out-of-core proxy rather than an in-memory DataFrame"""
+    return isinstance(df, OutOfCoreFrame)
+
+class _SchemaDrift(Exception):
+    """A chunk holds values that do not fit the column type taken from the first chunk"""
+
+    def __init__(self, column, chunk_dtype):
+        super().__init__(column)
+        self.column = column
+        self.chunk_dtype = chunk_dtype
+
+def _chunk_to_table(chunk, schema):
+    """Convert a chunk to the file schema column by column, reporting the column that does not fit"""
+    arrays = []
+    for field in schema:
+        try:
+            arrays.append(pa.array(chunk[field.name], type=field.type, from_pandas=True))
+        except (pa.ArrowInvalid, pa.ArrowTypeError, pa.ArrowNotImplementedError):
+            raise _SchemaDrift(field.name, chunk[field.name].dtype)
+    return pa.Table.from_arrays(arrays, schema=schema)
+
+def new_storage_path():
+    """Return a fresh file path in this process's storage directory"""
+    os.makedirs(PROCESS_STORAGE_DIR, exist_ok=True)
+    return os.path.join(PROCESS_STORAGE_DIR, f"{uuid.uuid4().hex}.parquet")
+
+def write_partitioned(chunks, path=None, row_group_size=ROW_GROUP_SIZE, meta=None):
+    """
+    Write an iterable of DataFrame chunks to a row-group-partitioned Parquet file
+
+    Parameters:
+    - chunks: iterable of DataFrames with the same columns
+    - path: str, output file (None for a new file in the storage directory,
+      deleted with the returned proxy)
+    - row_group_size: int, maximum rows per row group
+    - meta: DataFrame whose dtypes define the schema when no chunk has rows
+
+    Returns:
+    - OutOfCoreFrame over the written file
+    """
+    temporary = path is None
+    path = path or new_storage_path()
+    writer = None
+    schema = None
+
+    try:
+        for chunk in chunks:
+            if schema is None:
+                schema = pa.Schema.from_pandas(chunk, preserve_index=False)
+                writer = pq.ParquetWriter(path, schema)
+            if len(chunk):
+                writer.write_table(_chunk_to_table(chunk, schema), row_group_size=row_group_size)
+
+        if writer is None:
+            schema = pa.Schema.from_pandas(meta if meta is not None else pd.DataFrame(), preserve_index=False)
+            writer = pq.ParquetWriter(path, schema)
+    except BaseException:
+        if writer is not None:
+            writer.close()
+        if os.path.exists(path):
+            os.remove(path)
+        raise
+
+    writer.close()
+    return OutOfCoreFrame(path, temporary)
+
+def map_chunks(df, func, columns=None):
+    """
+    Apply a function to every chunk of a dataset and store the results out of core
+
+    Parameters:
+    - df: OutOfCoreFrame
+    - func: callable taking and returning a DataFrame chunk
+    - columns: list of columns to read (None for all)
+
+    Returns:
+    - OutOfCoreFrame with the transformed rows
+    """
+    meta = df.head(0) if columns is None else df.head(0)[columns]
+    return write_partitioned((func(chunk) for chunk in df.iter_chunks(columns)), meta=func(meta))
+
+def concat_partitioned(frames, path=None):
+    """
+    Stack out-of-core datasets into one partitioned file, row group by row group
+
+    Columns are matched by name; their types are unified (e.g. integers and
+    decimals become decimals) and columns missing from a dataset are null.
+
+    Parameters:
+    - frames: list of OutOfCoreFrame
+    - path: str, output file (None for a new file in the storage directory,
+      deleted with the returned proxy)
+
+    Returns:
+    - OutOfCoreFrame with the rows of all datasets in order
+
+    Raises:
+    - ValueError if a column holds incompatible types across datasets
+    """
+    try:
+        schema = pa.unify_schemas(
+            [pq.read_schema(frame.path).remove_metadata() for frame in frames],
+            promote_options='permissive'
+        )
+    except (pa.ArrowInvalid, pa.ArrowTypeError) as e:
+        raise ValueError(f"The datasets have incompatible column types: {e}")
+
+    temporary = path is None
+    path = path or new_storage_path()
+    with pq.ParquetWriter(path, schema) as writer:
+        for frame in frames:
+            parquet_file = pq.ParquetFile(frame.path)
+            for i in range(frame.num_row_groups):
+                table = parquet_file.read_row_group(i)
+                arrays = [
+                    table.column(field.name).cast(field.type) if field.name in table.column_names
+                    else pa.nulls(len(table), field.type)
+                    for field in schema
+                ]
+                writer.write_table(pa.Table.from_arrays(arrays, schema=schema))
+
+    return OutOfCoreFrame(path, temporary)
+
+def _reported(chunks, progress, counter):
+    """Pass chunks through, reporting their row counts"""
+    for chunk in chunks:
+        counter[0] += len(chunk)
+        progress(len(chunk))
+        yield chunk
+
+def ingest_csv(source, chunksize=ROW_GROUP_SIZE, max_retries=20, progress=None, read_options=None):
+    """
+    Stream a CSV file into partitioned Parquet storage without loading it whole
+
+    Column types come from the first chunk. When a later chunk does not fit
+    (e.g. decimals in a column that started as integers), that column is
+    widened and the file is read again from the start.
+
+    Parameters:
+    - source: path, seekable file-like object with CSV data, or a callable
+      returning a new binary stream for every pass (e.g. a decompressing
+      stream, which cannot rewind); streams from a callable are closed after use
+    - chunksize: int, rows per chunk and row group
+    - max_retries: int, maximum number of widening passes
+    - progress: callable receiving the number of rows parsed since its last call
+      (negative when a widening pass starts over)
+    - read_options: dict of extra pandas.read_csv arguments (e.g. the 'dtype',
+      'parse_dates' and 'date_format' of a pinned schema); the column types
+      given there are not widened
+
+    Returns:
+    - OutOfCoreFrame
+
+    Raises:
+    - ValueError if a chunk does not fit a column type given in read_options
+    """
+    read_options = dict(read_options or {})
+    pinned_dtype = read_options.pop('dtype', None) or {}
+    pinned = set(pinned_dtype) | set(read_options.get('parse_dates') or [])
+    dtype_overrides = {}
+
+    for _ in range(max_retries + 1):
+        stream = source() if callable(source) else source
+        if not callable(source) and hasattr(source, 'seek'):
+            source.seek(0)
+        counter = [0]
+        reader = None
+        try:
+            dtype = {**pinned_dtype, **dtype_overrides}
+            reader = pd.read_csv(stream, chunksize=chunksize, dtype=dtype or None, **read_options)
+            chunks = _reported(reader, progress, counter) if progress else reader
+            return write_partitioned(chunks, row_group_size=chunksize)
+        except _SchemaDrift as drift:
+            if progress:
+                progress(-counter[0])
+            if drift.column in pinned:
+                raise ValueError(f"Column '{drift.column}' holds values that do not fit its pinned type")
+            numeric = pd.api.types.is_numeric_dtype(drift.chunk_dtype)
+            dtype_overrides[drift.column] = 'float64' if numeric and not dtype_overrides.get(drift.column) else str
+        finally:
+            # Closed here rather than left to garbage collection, which would close a
+            # caller's stream (e.g. an upload) in the middle of the next pass
+            if reader is not None:
+                reader.close()
+            if callable(source):
+                stream.close()
+
+    raise ValueError("Could not settle on column types for this CSV file; convert the mixed columns before loading")
+
+def open_parquet(path):
+    """
+    Use an existing Parquet file as an out-of-core dataset
+
+    Parameters:
+    - path: str, Parquet file
+
+    Returns:
+    - OutOfCoreFrame
+    """
+    return OutOfCoreFrame(path)
+
+# Remove what earlier processes left behind before this one stores anything
+sweep_stale_storage()
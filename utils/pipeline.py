@@ -0,0 +1,275 @@
+import json
+import logging
+import os
+import pickle
+import shutil
+from datetime import datetime
+from utils.data_loader import read_local_file
+from utils.data_processor import (
+    handle_missing_values, handle_duplicates, convert_data_types, filter_dataframe,
+    get_summary_statistics, get_missing_value_counts, group_by_aggregate, get_working_sample
+)
+from utils.ml_models import (
+    prepare_data_for_ml, train_linear_regression, train_random_forest_regression,
+    train_logistic_regression, train_random_forest_classifier,
+    evaluate_regression_model, evaluate_classification_model
+)
+from utils.visualizer import (
+    create_plotly_histogram, create_plotly_scatter, create_plotly_bar, create_plotly_pie,
+    create_plotly_line, create_plotly_heatmap, create_plotly_sketch_box
+)
+from utils.out_of_core import is_out_of_core
+
+logger = logging.getLogger('datavizpro')
+
+# Version of the saved pipeline format
+PIPELINE_FORMAT = 1
+
+# Steps of each stage, in the order a pipeline usually runs them
+STAGES = {
+    'ingest': ['load'],
+    'clean': ['handle_missing_values', 'handle_duplicates', 'convert_data_types', 'filter'],
+    'analyze': ['summary_statistics', 'missing_values', 'group_by'],
+    'model': ['train_model'],
+    'render': ['chart', 'save']
+}
+
+# Model name (as on the Predictive Analysis page) -> (training function, task)
+MODELS = {
+    'Linear Regression': (train_linear_regression, 'Regression'),
+    'Random Forest Regression': (train_random_forest_regression, 'Regression'),
+    'Logistic Regression': (train_logistic_regression, 'Classification'),
+    'Random Forest Classifier': (train_random_forest_classifier, 'Classification')
+}
+
+# Chart type of a 'chart' step -> plotly figure function, called with the step's options
+CHART_TYPES = {
+    'histogram': create_plotly_histogram,
+    'scatter': create_plotly_scatter,
+    'bar': create_plotly_bar,
+    'pie': create_plotly_pie,
+    'line': create_plotly_line,
+    'heatmap': create_plotly_heatmap,
+    'box': create_plotly_sketch_box
+}
+
+def build_pipeline(steps, source=None):
+    """
+    Build a saved pipeline from recorded steps
+
+    Parameters:
+    - steps: list of step dicts, each with a 'step' name and its options
+    - source: str, name of the file the steps were recorded on
+
+    Returns:
+    - dict, ready to be written as JSON
+    """
+    return {
+        'format': PIPELINE_FORMAT,
+        'source': source,
+        'created': datetime.now().isoformat(timespec='seconds'),
+        'steps': list(steps)
+    }
+
+def _json_value(value):
+    """JSON form of values JSON cannot hold as they are (numpy scalars, timestamps)"""
+    if hasattr(value, 'item'):
+        return value.item()
+    if hasattr(value, 'isoformat'):
+        return value.isoformat()
+    return str(value)
+
+def pipeline_to_json(pipeline):
+    """
+    Serialize a pipeline for saving
+
+    Parameters:
+    - pipeline: dict, as returned by build_pipeline
+
+    Returns:
+    - str JSON
+    """
+    return json.dumps(pipeline, indent=2, default=_json_value)
+
+def load_pipeline(path):
+    """
+    Read a saved pipeline and check its steps
+
+    Parameters:
+    - path: str, pipeline JSON file
+
+    Returns:
+    - dict, the pipeline
+
+    Raises:
+    - ValueError if the file is not a pipeline or names an unknown step
+    """
+    with open(path, encoding='utf-8') as f:
+        pipeline = json.load(f)
+
+    if not isinstance(pipeline, dict) or not isinstance(pipeline.get('steps'), list):
+        raise ValueError(f"{path} is not a pipeline: expected an object with a list of 'steps'")
+
+    known = {step for steps in STAGES.values() for step in steps}
+    for i, step in enumerate(pipeline['steps'], start=1):
+        if not isinstance(step, dict) or step.get('step') not in known:
+            raise ValueError(f"Step {i} is not one of: {', '.join(sorted(known))}")
+    return pipeline
+
+def _output_path(output_dir, name, extension):
+    os.makedirs(output_dir, exist_ok=True)
+    return os.path.join(output_dir, f"{name}.{extension}")
+
+def _load(data, output_dir, path, out_of_core=False):
+    return read_local_file(path, out_of_core), []
+
+def _handle_missing_values(data, output_dir, strategy, columns=None, custom_value=None):
+    return handle_missing_values(data, strategy, columns, custom_value), []
+
+def _handle_duplicates(data, output_dir, strategy):
+    return handle_duplicates(data, strategy), []
+
+def _convert_data_types(data, output_dir, column, new_type):
+    return convert_data_types(data, column, new_type), []
+
+def _filter(data, output_dir, filters):
+    return filter_dataframe(data, filters), []
+
+def _summary_statistics(data, output_dir, columns=None, name='summary_statistics'):
+    path = _output_path(output_dir, name, 'csv')
+    get_summary_statistics(data, columns).to_csv(path)
+    return data, [path]
+
+def _missing_values(data, output_dir, name='missing_values'):
+    path = _output_path(output_dir, name, 'csv')
+    get_missing_value_counts(data).rename('missing_count').to_csv(path)
+    return data, [path]
+
+def _group_by(data, output_dir, group_columns, agg_columns, agg_functions, name='group_by'):
+    path = _output_path(output_dir, name, 'csv')
+    group_by_aggregate(data, group_columns, agg_columns, agg_functions).to_csv(path)
+    return data, [path]
+
+def _train_model(data, output_dir, target_column, model, feature_columns=None, params=None,
+                 test_size=0.2, random_state=42, name='model'):
+    if model not in MODELS:
+        raise ValueError(f"Unknown model '{model}'; expected one of: {', '.join(MODELS)}")
+    train, task = MODELS[model]
+
+    # Out-of-core datasets are modeled on a sample, as on the Predictive Analysis page
+    columns = [target_column] + list(feature_columns) if feature_columns is not None else None
+    training_df = get_working_sample(data, columns=columns)
+
+    X_train, X_test, y_train, y_test, feature_names, preprocessor = prepare_data_for_ml(
+        training_df, target_column, feature_columns, test_size=test_size, random_state=random_state
+    )
+    if X_train is None:
+        raise ValueError(f"Could not prepare the data to predict '{target_column}'")
+
+    fitted = train(X_train, y_train, **(params or {}))
+    evaluate = evaluate_regression_model if task == 'Regression' else evaluate_classification_model
+    metrics, _, feature_importance = evaluate(fitted, X_test, y_test, feature_names)
+
+    model_path = _output_path(output_dir, name, 'pkl')
+    with open(model_path, 'wb') as f:
+        pickle.dump({'model': fitted, 'preprocessor': preprocessor, 'feature_names': feature_names, 'task': task}, f)
+
+    metrics_path = _output_path(output_dir, f"{name}_metrics", 'json')
+    with open(metrics_path, 'w', encoding='utf-8') as f:
+        json.dump(metrics, f, indent=2, default=str)
+
+    outputs = [model_path, metrics_path]
+    if feature_importance is not None:
+        outputs.append(_output_path(output_dir, f"{name}_feature_importance", 'csv'))
+        feature_importance.to_csv(outputs[-1], index=False)
+    return data, outputs
+
+def _chart(data, output_dir, chart, name=None, **options):
+    if chart not in CHART_TYPES:
+        raise ValueError(f"Unknown chart '{chart}'; expected one of: {', '.join(CHART_TYPES)}")
+
+    # The sketched box plot summarizes every row; the other charts draw a sample of out-of-core data
+    source = data if chart == 'box' else get_working_sample(data)
+    fig = CHART_TYPES[chart](source, **options)
+    if fig is None:
+        raise ValueError(f"Could not draw the {chart} chart")
+
+    path = _output_path(output_dir, name or chart, 'html')
+    fig.write_html(path)
+    return data, [path]
+
+def _save(data, output_dir, path):
+    if not os.path.isabs(path):
+        path = os.path.join(output_dir, path)
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+
+    parquet = path.lower().endswith('.parquet')
+    if is_out_of_core(data):
+        # Written chunk by chunk, or as a copy of the partitioned file, never loaded whole
+        if parquet:
+            shutil.copyfile(data.path, path)
+        else:
+            for i, chunk in enumerate(data.iter_chunks()):
+                chunk.to_csv(path, mode='w' if i == 0 else 'a', header=i == 0, index=False)
+    elif parquet:
+        data.to_parquet(path)
+    else:
+        data.to_csv(path, index=False)
+    return data, [path]
+
+# Step name -> function(data, output_dir, **options) returning (data, written files)
+_STEP_FUNCTIONS = {
+    'load': _load,
+    'handle_missing_values': _handle_missing_values,
+    'handle_duplicates': _handle_duplicates,
+    'convert_data_types': _convert_data_types,
+    'filter': _filter,
+    'summary_statistics': _summary_statistics,
+    'missing_values': _missing_values,
+    'group_by': _group_by,
+    'train_model': _train_model,
+    'chart': _chart,
+    'save': _save
+}
+
+def run_pipeline(pipeline, output_dir, input_path=None, out_of_core=False):
+    """
+    Run a saved pipeline end to end, without Streamlit
+
+    Clean steps transform the dataset in turn; analyze, model and render
+    steps write their results (CSV tables, a pickled model with its
+    metrics, HTML charts, the cleaned data) to output_dir. Runs in any
+    process, so pipelines can be scheduled or handed to a process pool.
+
+    Parameters:
+    - pipeline: dict, as returned by load_pipeline or build_pipeline
+    - output_dir: str, directory for the written files
+    - input_path: str, data file to start from (replaces the pipeline's 'load' step)
+    - out_of_core: bool, load input_path as partitioned Parquet on disk
+
+    Returns:
+    - list of written file paths
+
+    Raises:
+    - ValueError if a step fails, naming the step
+    """
+    steps = list(pipeline['steps'])
+    if input_path is not None:
+        steps = [{'step': 'load', 'path': input_path, 'out_of_core': out_of_core}] + [step for step in steps if step['step'] != 'load']
+
+    data = None
+    written = []
+    for i, step in enumerate(steps, start=1):
+        options = {key: value for key, value in step.items() if key != 'step'}
+        name = step['step']
+        if data is None and name != 'load':
+            raise ValueError(f"Step {i} ({name}) needs data: start the pipeline with a 'load' step or pass an input file")
+
+        logger.info("Step %d/%d: %s", i, len(steps), name)
+        try:
+            data, outputs = _STEP_FUNCTIONS[name](data, output_dir, **options)
+        except (TypeError, KeyError, ValueError, OSError) as e:
+            raise ValueError(f"Step {i} ({name}) failed: {e}") from e
+
+        written.extend(outputs)
+    return written
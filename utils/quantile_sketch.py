@@ -0,0 +1,248 @@
+import pandas as pd
+import numpy as np
+from utils.caching import cache_data
+from utils.dataset_cache import get_dataset_version, split_append
+from utils.streaming_stats import iter_frame_chunks
+
+# Default normalized rank error of the sketches (1%)
+DEFAULT_ERROR = 0.01
+
+# Shrink factor of level capacities from the top level down
+_CAPACITY_DECAY = 2 / 3
+
+_rng = np.random.default_rng(2024)
+
+def k_for_error(error=DEFAULT_ERROR):
+    """
+    Choose the KLL accuracy parameter k for a target normalized rank error
+
+    Uses the empirical KLL bound error ≈ 2.296 / k^0.9723.
+
+    Parameters:
+    - error: float, target rank error (e.g. 0.01 for 1%)
+
+    Returns:
+    - int, accuracy parameter k
+    """
+    return max(8, int(np.ceil((2.296 / error) ** (1 / 0.9723))))
+
+def _capacity(k, height, n_levels):
+    return max(2, int(np.ceil(k * _CAPACITY_DECAY ** (n_levels - height - 1))))
+
+def _compress(sketch):
+    """Compact levels that exceed their capacity, promoting half their items upward"""
+    levels = sketch['levels']
+    height = 0
+    while height < len(levels):
+        if len(levels[height]) > _capacity(sketch['k'], height, len(levels)):
+            if height + 1 == len(levels):
+                levels.append(np.empty(0))
+
+            items = np.sort(levels[height])
+            # With an odd count one item stays behind at this level
+            keep = items[-1:] if len(items) % 2 else items[:0]
+            pairs = items[:len(items) - len(keep)]
+            promoted = pairs[_rng.integers(0, 2)::2]
+
+            levels[height] = keep
+            levels[height + 1] = np.concatenate([levels[height + 1], promoted])
+            # A promotion can overflow a lower capacity once the sketch grows, so restart
+            height = 0
+            continue
+        height += 1
+    return sketch
+
+def build_sketch(values, k=None):
+    """
+    Build a KLL quantile sketch from an array of values
+
+    Parameters:
+    - values: array-like of numbers (missing values are ignored)
+    - k: int, accuracy parameter (None uses k_for_error(DEFAULT_ERROR))
+
+    Returns:
+    - dict sketch with 'k', 'n', 'min', 'max' and 'levels'
+    """
+    values = np.asarray(values, dtype=float)
+    values = values[~np.isnan(values)]
+
+    sketch = {
+        'k': k or k_for_error(DEFAULT_ERROR),
+        'n': int(len(values)),
+        'min': float(values.min()) if len(values) else np.nan,
+        'max': float(values.max()) if len(values) else np.nan,
+        'levels': [values]
+    }
+    return _compress(sketch)
+
+def merge_sketches(left, right):
+    """
+    Merge two sketches into one covering both inputs
+
+    Parameters:
+    - left: dict sketch
+    - right: dict sketch
+
+    Returns:
+    - dict sketch
+    """
+    n_levels = max(len(left['levels']), len(right['levels']))
+    levels = []
+    for height in range(n_levels):
+        parts = [s['levels'][height] for s in (left, right) if height < len(s['levels'])]
+        levels.append(np.concatenate(parts))
+
+    merged = {
+        'k': min(left['k'], right['k']),
+        'n': left['n'] + right['n'],
+        'min': float(np.fmin(left['min'], right['min'])),
+        'max': float(np.fmax(left['max'], right['max'])),
+        'levels': levels
+    }
+    return _compress(merged)
+
+def sketch_quantiles(sketch, quantiles):
+    """
+    Estimate quantiles from a sketch
+
+    Parameters:
+    - sketch: dict sketch
+    - quantiles: list of floats in [0, 1]
+
+    Returns:
+    - numpy array of estimated quantile values
+    """
+    quantiles = np.asarray(quantiles, dtype=float)
+    if sketch['n'] == 0:
+        return np.full(len(quantiles), np.nan)
+
+    items = np.concatenate(sketch['levels'])
+    weights = np.concatenate([np.full(len(level), 2.0 ** h) for h, level in enumerate(sketch['levels'])])
+    order = np.argsort(items, kind='stable')
+    items = items[order]
+    cumulative = np.cumsum(weights[order])
+
+    # Exact sketches (no compaction yet) interpolate like pandas' default quantile
+    if len(sketch['levels']) == 1:
+        return np.interp(quantiles * (len(items) - 1), np.arange(len(items)), items)
+
+    positions = np.searchsorted(cumulative, quantiles * cumulative[-1], side='left')
+    estimates = items[np.clip(positions, 0, len(items) - 1)]
+    estimates = np.where(quantiles <= 0, sketch['min'], estimates)
+    estimates = np.where(quantiles >= 1, sketch['max'], estimates)
+    return estimates
+
+def sketch_column(df, column, error=DEFAULT_ERROR, chunksize=None):
+    """
+    Build a sketch for one column, one chunk at a time
+
+    Parameters:
+    - df: pandas DataFrame or OutOfCoreFrame
+    - column: str, numeric column
+    - error: float, target normalized rank error
+    - chunksize: int, rows per chunk (None uses the streaming default)
+
+    Returns:
+    - dict sketch
+    """
+    k = k_for_error(error)
+    chunks = iter_frame_chunks(df, chunksize, columns=[column]) if chunksize else iter_frame_chunks(df, columns=[column])
+
+    sketch = build_sketch([], k)
+    for chunk in chunks:
+        sketch = merge_sketches(sketch, build_sketch(chunk[column].to_numpy(dtype=float, na_value=np.nan), k))
+    return sketch
+
+@cache_data(max_entries=256)
+def _cached_column_sketch(version, column, error, _df):
+    appended = split_append(version, _df)
+    if appended is not None:
+        base_version, base, delta = appended
+        return merge_sketches(_cached_column_sketch(base_version, column, error, base), sketch_column(delta, column, error))
+    return sketch_column(_df, column, error)
+
+def get_column_sketch(df, column, error=DEFAULT_ERROR):
+    """
+    Get the sketch of a column, cached per dataset version
+
+    Parameters:
+    - df: pandas DataFrame
+    - column: str, numeric column
+    - error: float, target normalized rank error
+
+    Returns:
+    - dict sketch
+    """
+    return _cached_column_sketch(get_dataset_version(df), column, error, df)
+
+def approximate_quantiles(df, columns, quantiles, error=DEFAULT_ERROR):
+    """
+    Estimate quantiles for several columns from their cached sketches
+
+    Parameters:
+    - df: pandas DataFrame
+    - columns: list of numeric columns
+    - quantiles: list of floats in [0, 1]
+    - error: float, target normalized rank error
+
+    Returns:
+    - DataFrame indexed by column with one column per quantile
+    """
+    return pd.DataFrame(
+        [sketch_quantiles(get_column_sketch(df, col, error), quantiles) for col in columns],
+        index=pd.Index(columns),
+        columns=quantiles
+    )
+
+def approximate_median(df, column, error=DEFAULT_ERROR):
+    """
+    Estimate the median of a column from its cached sketch
+
+    Parameters:
+    - df: pandas DataFrame
+    - column: str, numeric column
+    - error: float, target normalized rank error
+
+    Returns:
+    - float, estimated median
+    """
+    return float(sketch_quantiles(get_column_sketch(df, column, error), [0.5])[0])
+
+def get_box_statistics(df, column, error=DEFAULT_ERROR, whis=1.5):
+    """
+    Compute box plot statistics and IQR outlier bounds from a column's sketch
+
+    Parameters:
+    - df: pandas DataFrame
+    - column: str, numeric column
+    - error: float, target normalized rank error
+    - whis: float, IQR multiplier for the outlier bounds
+
+    Returns:
+    - dict with q1, median, q3, iqr, lower_bound, upper_bound,
+      whisker_low, whisker_high, min and max
+    """
+    sketch = get_column_sketch(df, column, error)
+    q1, median, q3 = sketch_quantiles(sketch, [0.25, 0.5, 0.75])
+    iqr = q3 - q1
+    lower_bound = q1 - whis * iqr
+    upper_bound = q3 + whis * iqr
+
+    # Whiskers reach the most extreme sketch items inside the bounds
+    items = np.concatenate(sketch['levels']) if sketch['n'] else np.array([np.nan])
+    inside = items[(items >= lower_bound) & (items <= upper_bound)]
+    whisker_low = sketch['min'] if sketch['min'] >= lower_bound else (inside.min() if len(inside) else q1)
+    whisker_high = sketch['max'] if sketch['max'] <= upper_bound else (inside.max() if len(inside) else q3)
+
+    return {
+        'q1': q1,
+        'median': median,
+        'q3': q3,
+        'iqr': iqr,
+        'lower_bound': lower_bound,
+        'upper_bound': upper_bound,
+        'whisker_low': whisker_low,
+        'whisker_high': whisker_high,
+        'min': sketch['min'],
+        'max': sketch['max']
+    }
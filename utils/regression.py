@@ -0,0 +1,145 @@
+import pandas as pd
+import numpy as np
+from scipy import stats
+from utils.caching import cache_data
+from utils.dataset_cache import get_dataset_version
+
+@cache_data()
+def _cached_sufficient_statistics(version, x_column, y_column, group_column, _df):
+    columns = [x_column, y_column] + ([group_column] if group_column else [])
+    data = _df[columns].dropna(subset=[x_column, y_column])
+
+    if group_column:
+        keys = data[group_column]
+    else:
+        keys = pd.Series('All', index=data.index)
+
+    grouped = data.groupby(keys, sort=False, dropna=False)
+    n = grouped[x_column].count()
+    mean_x = grouped[x_column].mean()
+    mean_y = grouped[y_column].mean()
+
+    # Centered cross-products, accumulated per group in one vectorized pass
+    dx = data[x_column] - grouped[x_column].transform('mean')
+    dy = data[y_column] - grouped[y_column].transform('mean')
+    products = pd.DataFrame({'sxx': dx * dx, 'syy': dy * dy, 'sxy': dx * dy}).groupby(keys, sort=False, dropna=False).sum()
+
+    return pd.DataFrame({
+        'n': n,
+        'mean_x': mean_x,
+        'mean_y': mean_y,
+        'min_x': grouped[x_column].min(),
+        'max_x': grouped[x_column].max(),
+        'sxx': products['sxx'],
+        'syy': products['syy'],
+        'sxy': products['sxy']
+    })
+
+def get_sufficient_statistics(df, x_column, y_column, group_column=None):
+    """
+    Get the sufficient statistics for a simple linear regression of y on x
+
+    Results are cached per dataset version, so reruns do not touch the data.
+
+    Parameters:
+    - df: pandas DataFrame
+    - x_column: str, predictor column
+    - y_column: str, response column
+    - group_column: str, fit one line per value of this column (optional)
+
+    Returns:
+    - DataFrame indexed by group ('All' without grouping) with columns
+      n, mean_x, mean_y, min_x, max_x, sxx, syy, sxy (centered sums of
+      squares and cross-products)
+    """
+    return _cached_sufficient_statistics(get_dataset_version(df), x_column, y_column, group_column, df)
+
+def fit_ols(suff_stats, confidence=0.95):
+    """
+    Fit a simple OLS regression from sufficient statistics in closed form
+
+    Parameters:
+    - suff_stats: Series/dict with n, mean_x, mean_y, sxx, syy, sxy
+    - confidence: float, confidence level for coefficient intervals
+
+    Returns:
+    - dict with coefficients, standard errors, t and p values, intervals and R²
+    """
+    n = int(suff_stats['n'])
+    mean_x, mean_y = suff_stats['mean_x'], suff_stats['mean_y']
+    sxx, syy, sxy = suff_stats['sxx'], suff_stats['syy'], suff_stats['sxy']
+
+    if n < 3 or sxx <= 0:
+        return None
+
+    slope = sxy / sxx
+    intercept = mean_y - slope * mean_x
+
+    dof = n - 2
+    sse = max(syy - slope * sxy, 0.0)
+    sigma2 = sse / dof
+
+    se_slope = np.sqrt(sigma2 / sxx)
+    se_intercept = np.sqrt(sigma2 * (1.0 / n + mean_x ** 2 / sxx))
+
+    coef = np.array([intercept, slope])
+    se = np.array([se_intercept, se_slope])
+    with np.errstate(divide='ignore', invalid='ignore'):
+        t_values = coef / se
+    p_values = 2 * stats.t.sf(np.abs(t_values), dof)
+    t_crit = stats.t.ppf(0.5 + confidence / 2, dof)
+
+    r_squared = 1 - sse / syy if syy > 0 else np.nan
+
+    return {
+        'n': n,
+        'x_range': (suff_stats.get('min_x', mean_x), suff_stats.get('max_x', mean_x)),
+        'intercept': intercept,
+        'slope': slope,
+        'std_err': se,
+        't_values': t_values,
+        'p_values': p_values,
+        'ci_low': coef - t_crit * se,
+        'ci_high': coef + t_crit * se,
+        'r_squared': r_squared,
+        'adj_r_squared': 1 - (1 - r_squared) * (n - 1) / dof if syy > 0 else np.nan,
+        'residual_std': np.sqrt(sigma2)
+    }
+
+def get_coefficient_table(fit, x_column, confidence=0.95):
+    """
+    Build a coefficient table in the layout of a statsmodels summary
+
+    Parameters:
+    - fit: dict returned by fit_ols
+    - x_column: str, name of the predictor
+    - confidence: float, confidence level used for the fit
+
+    Returns:
+    - DataFrame with one row per coefficient
+    """
+    lower = (1 - confidence) / 2
+    return pd.DataFrame({
+        'coef': [fit['intercept'], fit['slope']],
+        'std err': fit['std_err'],
+        't': fit['t_values'],
+        'P>|t|': fit['p_values'],
+        f'[{lower:.3f}': fit['ci_low'],
+        f'{1 - lower:.3f}]': fit['ci_high']
+    }, index=['const', x_column])
+
+def fit_ols_by_group(df, x_column, y_column, group_column=None):
+    """
+    Fit one OLS line per group from cached sufficient statistics
+
+    Parameters:
+    - df: pandas DataFrame
+    - x_column: str, predictor column
+    - y_column: str, response column
+    - group_column: str, grouping column (optional)
+
+    Returns:
+    - dict mapping group value ('All' without grouping) to the fit_ols result
+    """
+    suff_stats = get_sufficient_statistics(df, x_column, y_column, group_column)
+    return {group: fit_ols(row) for group, row in suff_stats.iterrows()}
@@ -0,0 +1,185 @@
+import os
+from concurrent.futures import ThreadPoolExecutor
+import pandas as pd
+import numpy as np
+
+# Default memory budget shared by the batches of resamples in flight (index matrices, gathered values
+# and the statistic's temporaries)
+DEFAULT_BATCH_MEMORY_MB = 256
+
+def _skew_along_rows(samples):
+    """Bias-adjusted sample skewness (as in pandas) of every row"""
+    n = samples.shape[1]
+    deviations = samples - samples.mean(axis=1, keepdims=True)
+    squared = deviations * deviations
+    m2 = squared.mean(axis=1)
+    m3 = (squared * deviations).mean(axis=1)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        skew = np.sqrt(n * (n - 1)) / (n - 2) * m3 / m2 ** 1.5
+    return np.where(m2 > 0, skew, 0.0)
+
+def _corr_along_rows(samples):
+    """Pearson correlation of the two variables in every resample (shape: resamples x n x 2)"""
+    x = samples[..., 0]
+    y = samples[..., 1]
+    dx = x - x.mean(axis=1, keepdims=True)
+    dy = y - y.mean(axis=1, keepdims=True)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        return (dx * dy).sum(axis=1) / np.sqrt((dx * dx).sum(axis=1) * (dy * dy).sum(axis=1))
+
+# Statistics evaluated across the resample axis (each row of the input is one resample)
+BOOTSTRAP_STATISTICS = {
+    'mean': lambda samples: samples.mean(axis=1),
+    'median': lambda samples: np.median(samples, axis=1),
+    'std': lambda samples: samples.std(axis=1, ddof=1),
+    'skew': _skew_along_rows,
+    'correlation': _corr_along_rows
+}
+
+# Full-size float arrays (one per gathered resample array) each statistic allocates while it runs
+_STATISTIC_TEMPORARIES = {'mean': 0, 'median': 1, 'std': 1, 'skew': 3, 'correlation': 1.5}
+
+def _batch_size(n, row_width, memory_budget_mb, temporaries=0, in_flight=1):
+    """Number of resamples per batch so that in_flight batches together fit the memory budget"""
+    index_bytes = 4 if n < 2 ** 31 else 8
+    bytes_per_resample = n * (index_bytes + 8 * row_width * (1 + temporaries))
+    return max(1, int(memory_budget_mb * 1024 ** 2 / in_flight // bytes_per_resample))
+
+def bootstrap_distribution(values, statistic='mean', n_resamples=10000, memory_budget_mb=DEFAULT_BATCH_MEMORY_MB,
+                           max_workers=None, random_state=42):
+    """
+    Draw the bootstrap distribution of a statistic with vectorized batches
+
+    Each batch draws an index matrix of shape (batch, n) and evaluates the
+    statistic across the resample axis with NumPy. Batches are spread over a
+    thread pool, each with its own seed, and sized so that the batches running
+    at once (one per worker, with the statistic's temporaries) fit the memory
+    budget together.
+
+    Parameters:
+    - values: 1-D array for univariate statistics, (n, 2) array for 'correlation'
+    - statistic: str, one of BOOTSTRAP_STATISTICS
+    - n_resamples: int, number of bootstrap resamples
+    - memory_budget_mb: float, memory budget shared by the batches in flight
+    - max_workers: int, number of worker threads (None uses all CPUs)
+    - random_state: int, random seed for reproducibility
+
+    Returns:
+    - numpy array with one statistic value per resample
+    """
+    stat_func = BOOTSTRAP_STATISTICS[statistic]
+    values = np.asarray(values, dtype=float)
+    n = len(values)
+    row_width = values.shape[1] if values.ndim == 2 else 1
+
+    if max_workers is None:
+        max_workers = os.cpu_count() or 1
+
+    batch = min(n_resamples, _batch_size(n, row_width, memory_budget_mb, _STATISTIC_TEMPORARIES[statistic], max_workers))
+    sizes = [batch] * (n_resamples // batch)
+    if n_resamples % batch:
+        sizes.append(n_resamples % batch)
+
+    seeds = np.random.SeedSequence(random_state).spawn(len(sizes))
+    index_dtype = np.int32 if n < 2 ** 31 else np.int64
+
+    def run_batch(args):
+        seed, size = args
+        rng = np.random.default_rng(seed)
+        idx = rng.integers(0, n, size=(size, n), dtype=index_dtype)
+        return stat_func(values[idx])
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        results = list(executor.map(run_batch, zip(seeds, sizes)))
+
+    return np.concatenate(results)
+
+def bootstrap_ci(values, statistic='mean', n_resamples=10000, confidence=0.95,
+                 memory_budget_mb=DEFAULT_BATCH_MEMORY_MB, max_workers=None, random_state=42):
+    """
+    Calculate a percentile bootstrap confidence interval
+
+    Parameters:
+    - values: 1-D array for univariate statistics, (n, 2) array for 'correlation'
+    - statistic: str, one of BOOTSTRAP_STATISTICS
+    - n_resamples: int, number of bootstrap resamples
+    - confidence: float, confidence level
+    - memory_budget_mb: float, memory budget shared by the batches in flight
+    - max_workers: int, number of worker threads (None uses all CPUs)
+    - random_state: int, random seed for reproducibility
+
+    Returns:
+    - dict with 'estimate', 'ci_low', 'ci_high' and 'std_error'
+    """
+    values = np.asarray(values, dtype=float)
+    values = values[~np.isnan(values).any(axis=1)] if values.ndim == 2 else values[~np.isnan(values)]
+
+    if len(values) < 3:
+        return {'estimate': np.nan, 'ci_low': np.nan, 'ci_high': np.nan, 'std_error': np.nan}
+
+    estimate = float(BOOTSTRAP_STATISTICS[statistic](values[None, ...])[0])
+    distribution = bootstrap_distribution(
+        values, statistic, n_resamples, memory_budget_mb, max_workers, random_state
+    )
+    alpha = 1 - confidence
+    ci_low, ci_high = np.nanpercentile(distribution, [100 * alpha / 2, 100 * (1 - alpha / 2)])
+
+    return {
+        'estimate': estimate,
+        'ci_low': float(ci_low),
+        'ci_high': float(ci_high),
+        'std_error': float(np.nanstd(distribution, ddof=1))
+    }
+
+def bootstrap_summary(df, columns, statistics=('mean', 'median', 'std', 'skew'), n_resamples=10000,
+                      confidence=0.95, memory_budget_mb=DEFAULT_BATCH_MEMORY_MB, random_state=42):
+    """
+    Bootstrap confidence intervals for several statistics of several columns
+
+    Parameters:
+    - df: pandas DataFrame
+    - columns: list of numeric columns
+    - statistics: list of univariate statistic names
+    - n_resamples: int, number of bootstrap resamples
+    - confidence: float, confidence level
+    - memory_budget_mb: float, memory budget shared by the batches in flight
+    - random_state: int, random seed for reproducibility
+
+    Returns:
+    - DataFrame with one row per (column, statistic)
+    """
+    rows = []
+    for col in columns:
+        values = df[col].to_numpy(dtype=float, na_value=np.nan)
+        for statistic in statistics:
+            result = bootstrap_ci(
+                values, statistic, n_resamples, confidence, memory_budget_mb, random_state=random_state
+            )
+            rows.append({'Column': col, 'Statistic': statistic, **result})
+
+    return pd.DataFrame(rows).rename(columns={
+        'estimate': 'Estimate',
+        'ci_low': 'CI Lower',
+        'ci_high': 'CI Upper',
+        'std_error': 'Std. Error'
+    })
+
+def bootstrap_correlation_ci(df, x_column, y_column, n_resamples=10000, confidence=0.95,
+                             memory_budget_mb=DEFAULT_BATCH_MEMORY_MB, random_state=42):
+    """
+    Bootstrap a confidence interval for the Pearson correlation of two columns
+
+    Parameters:
+    - df: pandas DataFrame
+    - x_column: str, first column
+    - y_column: str, second column
+    - n_resamples: int, number of bootstrap resamples
+    - confidence: float, confidence level
+    - memory_budget_mb: float, memory budget shared by the batches in flight
+    - random_state: int, random seed for reproducibility
+
+    Returns:
+    - dict with 'estimate', 'ci_low', 'ci_high' and 'std_error'
+    """
+    values = df[[x_column, y_column]].to_numpy(dtype=float, na_value=np.nan)
+    return bootstrap_ci(values, 'correlation', n_resamples, confidence, memory_budget_mb, random_state=random_state)
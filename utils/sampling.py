@@ -0,0 +1,208 @@
+import streamlit as st
+import pandas as pd
+import numpy as np
+from utils.dataset_cache import get_dataset_version
+from utils.streaming_stats import iter_frame_chunks
+from utils.out_of_core import is_out_of_core
+
+# Sampling methods available in the global sampling mode
+SAMPLING_METHODS = ['reservoir', 'stratified']
+
+# Default number of rows pages explore when sampling mode is on
+DEFAULT_SAMPLE_SIZE = 50_000
+
+def init_sampling():
+    """Create the session's sampling settings if they do not exist yet"""
+    if 'sampling' not in st.session_state:
+        st.session_state.sampling = {
+            'enabled': False,
+            'method': 'reservoir',
+            'size': DEFAULT_SAMPLE_SIZE,
+            'strata_column': None
+        }
+
+def reservoir_sample(df, n, random_state=42):
+    """
+    Draw a uniform random sample of n rows in one pass over the data
+
+    Every row gets a random key and the n smallest keys are kept, which
+    merges chunk by chunk like a reservoir: rows whose key cannot beat the
+    current reservoir are skipped without being copied.
+
+    Parameters:
+    - df: pandas DataFrame or OutOfCoreFrame
+    - n: int, sample size
+    - random_state: int, random seed for reproducibility
+
+    Returns:
+    - DataFrame with the sampled rows in their original order
+    """
+    if not is_out_of_core(df):
+        return df.sample(min(n, len(df)), random_state=random_state).sort_index()
+
+    rng = np.random.default_rng(random_state)
+    rows = df.head(0)
+    keys = np.empty(0)
+
+    for chunk in iter_frame_chunks(df):
+        chunk_keys = rng.random(len(chunk))
+        if len(keys) >= n:
+            # Only rows with a key below the current maximum can enter the reservoir
+            candidates = chunk_keys < keys.max()
+            chunk, chunk_keys = chunk[candidates], chunk_keys[candidates]
+
+        rows = pd.concat([rows, chunk])
+        keys = np.concatenate([keys, chunk_keys])
+        if len(keys) > n:
+            keep = np.argpartition(keys, n - 1)[:n]
+            rows, keys = rows.iloc[keep], keys[keep]
+
+    return rows.sort_index()
+
+def _allocate(sizes, n):
+    """
+    Split n sample rows across strata in proportion to their sizes
+
+    Uses largest remainders, gives every stratum at least one row when n
+    allows it, and never allocates more rows than a stratum holds.
+    """
+    sizes = np.asarray(sizes, dtype=np.int64)
+    total = sizes.sum()
+    if n >= total:
+        return sizes
+
+    exact = sizes * n / total
+    allocation = np.floor(exact).astype(np.int64)
+    if n >= len(sizes):
+        allocation = np.maximum(allocation, np.minimum(sizes, 1))
+
+    remaining = n - allocation.sum()
+    while remaining > 0:
+        # Most under-allocated strata with rows to spare get one more
+        open_strata = np.flatnonzero(allocation < sizes)
+        chosen = open_strata[np.argsort(allocation[open_strata] - exact[open_strata])][:remaining]
+        allocation[chosen] += 1
+        remaining -= len(chosen)
+    while remaining < 0:
+        # Most over-allocated strata above one row give one back
+        full_strata = np.flatnonzero(allocation > 1)
+        chosen = full_strata[np.argsort(exact[full_strata] - allocation[full_strata])][:-remaining]
+        allocation[chosen] -= 1
+        remaining += len(chosen)
+
+    return allocation
+
+def stratified_sample(df, n, strata_column, random_state=42):
+    """
+    Draw a sample of n rows with each stratum represented in proportion to its size
+
+    Stratum sizes are counted in a first pass; the second pass keeps, per
+    stratum, the rows with the smallest random keys, so memory stays bounded
+    by the sample size plus one chunk.
+
+    Parameters:
+    - df: pandas DataFrame or OutOfCoreFrame
+    - n: int, sample size
+    - strata_column: str, column defining the strata (missing values form their own stratum)
+    - random_state: int, random seed for reproducibility
+
+    Returns:
+    - DataFrame with the sampled rows in their original order
+    """
+    sizes = None
+    for chunk in iter_frame_chunks(df, columns=[strata_column]):
+        counts = chunk[strata_column].value_counts(dropna=False)
+        sizes = counts if sizes is None else sizes.add(counts, fill_value=0)
+
+    if sizes is None:
+        return df.head(0)
+
+    strata = sizes.index
+    allocation = _allocate(sizes.to_numpy(), n)
+
+    rng = np.random.default_rng(random_state)
+    rows = df.head(0)
+    keys = np.empty(0)
+    codes = np.empty(0, dtype=np.int64)
+
+    for chunk in iter_frame_chunks(df):
+        rows = pd.concat([rows, chunk])
+        keys = np.concatenate([keys, rng.random(len(chunk))])
+        codes = np.concatenate([codes, strata.get_indexer(chunk[strata_column])])
+
+        # Rank rows within their stratum by key and keep each stratum's allocation
+        order = np.lexsort((keys, codes))
+        sorted_codes = codes[order]
+        rank = np.arange(len(order)) - np.searchsorted(sorted_codes, sorted_codes, side='left')
+        keep = np.sort(order[rank < allocation[sorted_codes]])
+        rows, keys, codes = rows.iloc[keep], keys[keep], codes[keep]
+
+    return rows.sort_index()
+
+@st.cache_data(show_spinner=False, max_entries=4)
+def _cached_sample(version, method, n, strata_column, random_state, _df):
+    if method == 'stratified' and strata_column is not None:
+        return stratified_sample(_df, n, strata_column, random_state)
+    return reservoir_sample(_df, n, random_state)
+
+def get_sample(df, method='reservoir', n=DEFAULT_SAMPLE_SIZE, strata_column=None, random_state=42):
+    """
+    Get a sample of a dataset, cached per dataset version and sampling settings
+
+    Parameters:
+    - df: pandas DataFrame or OutOfCoreFrame
+    - method: str, one of SAMPLING_METHODS
+    - n: int, sample size
+    - strata_column: str, column defining the strata for stratified sampling
+    - random_state: int, random seed for reproducibility
+
+    Returns:
+    - in-memory DataFrame with the sampled rows
+    """
+    return _cached_sample(get_dataset_version(df), method, n, strata_column, random_state, df)
+
+def get_exploration_data(df):
+    """
+    Get the data interactive pages should explore under the global sampling settings
+
+    Parameters:
+    - df: pandas DataFrame or OutOfCoreFrame, the full dataset
+
+    Returns:
+    - the configured sample when sampling mode is on and the dataset is larger
+      than the sample size, otherwise df itself
+    """
+    init_sampling()
+    settings = st.session_state.sampling
+
+    if df is None or not settings['enabled'] or len(df) <= settings['size']:
+        return df
+
+    strata_column = settings['strata_column'] if settings['strata_column'] in df.columns else None
+    return get_sample(df, settings['method'], settings['size'], strata_column)
+
+def sampling_badge(df, data):
+    """
+    Describe the sample a page is working on
+
+    Parameters:
+    - df: the full dataset
+    - data: the data returned by get_exploration_data
+
+    Returns:
+    - str markdown badge, or None when the page works on the full dataset
+    """
+    if data is None or data is df:
+        return None
+
+    settings = st.session_state.sampling
+    method = settings['method']
+    if method == 'stratified' and settings['strata_column'] in df.columns:
+        method = f"stratified by {settings['strata_column']}"
+    else:
+        method = 'reservoir'
+
+    return (
+        f":orange-background[🔬 **Sampling mode:** exploring {len(data):,} of {len(df):,} rows "
+        f"({method}); saved changes, exports and model training use the full data]"
+    )
@@ -0,0 +1,249 @@
+import hashlib
+import json
+import os
+import threading
+import uuid
+import warnings
+from datetime import datetime
+import pandas as pd
+from pandas.tseries.api import guess_datetime_format
+
+# File holding the pinned schemas, kept across sessions and restarts
+REGISTRY_PATH = os.environ.get(
+    'DATAVIZPRO_SCHEMA_REGISTRY',
+    os.path.join(os.path.expanduser('~'), '.datavizpro', 'schema_registry.json')
+)
+
+# Rows of raw text kept from an upload to recognize datetime formats when pinning
+HEADER_SAMPLE_ROWS = 100
+
+# Reads and writes of the registry file take turns
+_registry_lock = threading.Lock()
+
+def header_fingerprint(columns):
+    """
+    Fingerprint a file header by its column names in order
+
+    Parameters:
+    - columns: sequence of column names
+
+    Returns:
+    - str hex digest
+    """
+    header = '\x1f'.join(str(col) for col in columns)
+    return hashlib.sha1(header.encode('utf-8')).hexdigest()[:16]
+
+def _load_registry():
+    if not os.path.exists(REGISTRY_PATH):
+        return {}
+    try:
+        with open(REGISTRY_PATH, encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+def _save_registry(registry):
+    os.makedirs(os.path.dirname(REGISTRY_PATH), exist_ok=True)
+    partial_path = f"{REGISTRY_PATH}.{uuid.uuid4().hex}.partial"
+    with open(partial_path, 'w', encoding='utf-8') as f:
+        json.dump(registry, f, indent=2)
+    os.replace(partial_path, REGISTRY_PATH)
+
+def registry_stamp():
+    """
+    Stamp that changes whenever a schema is pinned or forgotten
+
+    Returns:
+    - int modification time of the registry file, or None when nothing was pinned yet
+    """
+    try:
+        return os.stat(REGISTRY_PATH).st_mtime_ns
+    except OSError:
+        return None
+
+def get_pinned_schema(fingerprint):
+    """
+    Look up the schema pinned for a header
+
+    Parameters:
+    - fingerprint: str, as returned by header_fingerprint
+
+    Returns:
+    - dict with 'name', 'pinned_at', 'dtypes' (column -> dtype name),
+      'categories' (column -> list) and 'datetime_formats' (column -> format
+      or None), or None when no schema is pinned for the header
+    """
+    with _registry_lock:
+        return _load_registry().get(fingerprint)
+
+def _json_categories(categories):
+    """Categories as a JSON list, or None when they are not plain strings, numbers or booleans"""
+    values = categories.tolist()
+    if all(isinstance(value, (str, int, float, bool)) for value in values):
+        return values
+    return None
+
+def _guess_format(raw, parsed=None):
+    """
+    Datetime format of a column's raw text sample, or None when none parses it
+
+    Formats are guessed from the values month-first and day-first. Ambiguous
+    dates (01/02/2024) are settled by the cleaned values of the same rows
+    when they are given, otherwise by later unambiguous values (13/02/2024).
+    """
+    raw = raw.dropna().astype(str).str.strip()
+    raw = raw[raw != '']
+
+    candidates = []
+    for value in raw.unique():
+        for dayfirst in (False, True):
+            # Both readings are tried on purpose, so the day-first warning does not apply
+            with warnings.catch_warnings():
+                warnings.simplefilter('ignore', UserWarning)
+                fmt = guess_datetime_format(value, dayfirst=dayfirst)
+            if fmt and fmt not in candidates:
+                candidates.append(fmt)
+
+    best, best_matches = None, -1
+    for fmt in candidates:
+        try:
+            values = pd.to_datetime(raw, format=fmt)
+            matches = int((values == parsed.reindex(raw.index)).sum()) if parsed is not None else 0
+        except (ValueError, TypeError):
+            continue
+        if matches > best_matches:
+            best, best_matches = fmt, matches
+    return best
+
+def pin_schema(fingerprint, df, raw_sample=None, name=None):
+    """
+    Pin the column types of a (cleaned) dataset for uploads with the same header
+
+    Only columns of the original header are pinned; columns created during
+    cleaning are left out, and dropped ones are inferred as usual.
+
+    Parameters:
+    - fingerprint: str, header fingerprint of the original upload
+    - df: pandas DataFrame or OutOfCoreFrame with the column types to pin
+    - raw_sample: DataFrame with the first rows of the upload as text, used to
+      recognize datetime formats (None to let pandas infer them)
+    - name: str, label stored with the schema (e.g. the file name)
+
+    Returns:
+    - dict, the pinned schema
+    """
+    header = list(raw_sample.columns) if raw_sample is not None else list(df.columns)
+    dtypes, categories, datetime_formats = {}, {}, {}
+
+    for col in header:
+        if col not in df.columns:
+            continue
+        dtype = df.dtypes[col]
+
+        if pd.api.types.is_datetime64_any_dtype(dtype):
+            dtypes[col] = 'datetime'
+            datetime_formats[col] = None
+            if raw_sample is not None:
+                # Rows still at their original labels show how the raw text was read
+                parsed = df[col] if isinstance(df, pd.DataFrame) else df.head(len(raw_sample))[col]
+                datetime_formats[col] = _guess_format(raw_sample[col], parsed)
+        elif isinstance(dtype, pd.CategoricalDtype):
+            dtypes[col] = 'category'
+            # Out-of-core proxies carry no category values in their metadata
+            if isinstance(df, pd.DataFrame):
+                pinned = _json_categories(df[col].cat.categories)
+                if pinned is not None:
+                    categories[col] = pinned
+        else:
+            dtypes[col] = str(dtype)
+
+    schema = {
+        'name': name,
+        'pinned_at': datetime.now().isoformat(timespec='seconds'),
+        'dtypes': dtypes,
+        'categories': categories,
+        'datetime_formats': datetime_formats
+    }
+
+    with _registry_lock:
+        registry = _load_registry()
+        registry[fingerprint] = schema
+        _save_registry(registry)
+    return schema
+
+def forget_schema(fingerprint):
+    """
+    Remove the schema pinned for a header
+
+    Parameters:
+    - fingerprint: str, header fingerprint
+    """
+    with _registry_lock:
+        registry = _load_registry()
+        if registry.pop(fingerprint, None) is not None:
+            _save_registry(registry)
+
+def csv_read_options(schema):
+    """
+    Translate a pinned schema into pandas.read_csv arguments
+
+    Parameters:
+    - schema: dict, as returned by get_pinned_schema
+
+    Returns:
+    - dict with 'dtype', 'parse_dates' and 'date_format'
+    """
+    dtype = {col: kind for col, kind in schema['dtypes'].items() if kind != 'datetime'}
+    parse_dates = [col for col, kind in schema['dtypes'].items() if kind == 'datetime']
+    date_format = {col: fmt for col, fmt in schema['datetime_formats'].items() if fmt}
+    return {'dtype': dtype, 'parse_dates': parse_dates, 'date_format': date_format or None}
+
+def apply_pinned_categories(df, schema):
+    """
+    Give categorical columns the pinned categories (in pinned order), followed by new ones
+
+    Parameters:
+    - df: pandas DataFrame parsed with csv_read_options
+    - schema: dict, the pinned schema
+
+    Returns:
+    - DataFrame with the categories set (df itself when nothing changes)
+    """
+    columns = {}
+    for col, pinned in schema['categories'].items():
+        if col not in df.columns or not isinstance(df[col].dtype, pd.CategoricalDtype):
+            continue
+        values = df[col]
+
+        # read_csv parses categories as text; bring them back to the pinned type (e.g. numbers)
+        pinned_type = pd.Index(pinned).dtype
+        if values.cat.categories.dtype != pinned_type:
+            try:
+                values = values.cat.rename_categories(values.cat.categories.astype(pinned_type))
+            except (ValueError, TypeError):
+                continue
+
+        known = set(pinned)
+        new = [value for value in values.cat.categories if value not in known]
+        columns[col] = values.cat.set_categories(pinned + new)
+    return df.assign(**columns) if columns else df
+
+def matches_schema(df, schema):
+    """
+    Whether a frame parsed with csv_read_options holds the pinned types
+
+    Datetime columns whose values did not match the pinned format come back
+    as text, so they are the ones checked.
+
+    Parameters:
+    - df: pandas DataFrame (or one chunk)
+    - schema: dict, the pinned schema
+
+    Returns:
+    - bool
+    """
+    return all(
+        pd.api.types.is_datetime64_any_dtype(df[col])
+        for col, kind in schema['dtypes'].items()
+        if kind == 'datetime' and col in df.columns
+    )
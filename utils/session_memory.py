@@ -0,0 +1,248 @@
+import os
+import pickle
+import sys
+import uuid
+import weakref
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.ipc as ipc
+import streamlit as st
+from utils.dataset_cache import carry_version
+from utils.out_of_core import PROCESS_STORAGE_DIR, is_out_of_core
+
+# Session memory past which cold objects are moved to disk
+SESSION_MEMORY_LIMIT_MB = int(os.environ.get('DATAVIZPRO_SESSION_MEMORY_MB', 1024))
+
+# Objects smaller than this are not worth moving to disk
+MIN_SPILL_MB = 16
+
+# Session state keys that may be moved to disk besides the workspace datasets
+SPILLABLE_KEYS = ['X_train', 'X_test', 'y_train', 'y_test']
+
+# Session state keys of the manager's own bookkeeping
+_BOOKKEEPING_KEYS = ('memory_runs', 'memory_changed')
+
+# Directory holding the memory-mapped files of spilled session objects
+SPILL_DIR = os.path.join(PROCESS_STORAGE_DIR, 'session')
+
+# id(object) -> (weak reference, deep size in bytes)
+_sizes = {}
+
+# id(object) -> (weak reference, file) of memory-mapped objects; the file goes with the object
+_mapped = {}
+
+def _remove_file(path):
+    if os.path.exists(path):
+        os.remove(path)
+
+def deep_size(obj):
+    """
+    Estimate the memory held by an object, including everything it references
+
+    Frames and arrays are measured directly; other objects (models, figures)
+    by the size of their pickle. Sizes are memoized per object, so this is
+    cheap to call on every rerun.
+
+    Parameters:
+    - obj: any object
+
+    Returns:
+    - int bytes (0 for out-of-core datasets, which live on disk)
+    """
+    if obj is None or is_out_of_core(obj):
+        return 0
+    if isinstance(obj, dict):
+        return sys.getsizeof(obj) + sum(deep_size(value) for value in obj.values())
+    if isinstance(obj, (list, tuple, set)):
+        return sys.getsizeof(obj) + sum(deep_size(value) for value in obj)
+    if isinstance(obj, (str, bytes, int, float, bool)):
+        return sys.getsizeof(obj)
+
+    key = id(obj)
+    entry = _sizes.get(key)
+    if entry is not None and entry[0]() is obj:
+        return entry[1]
+
+    if isinstance(obj, pd.DataFrame):
+        size = int(obj.memory_usage(deep=True).sum())
+    elif isinstance(obj, (pd.Series, pd.Index)):
+        size = int(obj.memory_usage(deep=True))
+    elif isinstance(obj, np.ndarray):
+        size = obj.nbytes
+    else:
+        try:
+            size = len(pickle.dumps(obj, protocol=pickle.HIGHEST_PROTOCOL))
+        except Exception:
+            size = sys.getsizeof(obj)
+
+    try:
+        _sizes[key] = (weakref.ref(obj, lambda _, key=key: _sizes.pop(key, None)), size)
+    except TypeError:
+        pass
+    return size
+
+def is_mapped(obj):
+    """Whether an object was moved to disk and is read back through a memory map"""
+    entry = _mapped.get(id(obj))
+    return entry is not None and entry[0]() is obj
+
+def _map_to_disk(obj):
+    """
+    Write a frame, series or array to disk and read it back memory-mapped
+
+    Returns:
+    - the memory-mapped equivalent, or None when the object cannot be stored
+      without changing it (e.g. mixed-type text columns)
+    """
+    os.makedirs(SPILL_DIR, exist_ok=True)
+    path = os.path.join(SPILL_DIR, uuid.uuid4().hex)
+
+    try:
+        if isinstance(obj, np.ndarray):
+            if obj.dtype.hasobject:
+                return None
+            path += '.npy'
+            np.save(path, obj)
+            mapped = np.load(path, mmap_mode='r')
+        else:
+            frame = obj.to_frame() if isinstance(obj, pd.Series) else obj
+            table = pa.Table.from_pandas(frame)
+            path += '.arrow'
+            with ipc.new_file(path, table.schema) as writer:
+                writer.write_table(table)
+            del table
+
+            # Columns without missing values come back as views of the mapped file
+            mapped = ipc.open_file(pa.memory_map(path)).read_all().to_pandas(split_blocks=True)
+            if not (mapped.columns.equals(frame.columns) and mapped.dtypes.equals(frame.dtypes) and mapped.index.equals(frame.index)):
+                _remove_file(path)
+                return None
+            if isinstance(obj, pd.Series):
+                mapped = mapped.iloc[:, 0].rename(obj.name)
+            else:
+                carry_version(obj, mapped)
+    except (pa.ArrowException, ValueError, TypeError, OSError):
+        _remove_file(path)
+        return None
+
+    key = id(mapped)
+    _mapped[key] = (weakref.ref(mapped, lambda _, key=key, path=path: (_mapped.pop(key, None), _remove_file(path))), path)
+    return mapped
+
+def _session_objects():
+    """
+    The objects held in the session state, each once
+
+    Returns:
+    - list of (labels, object) with the session state keys referencing the object
+    """
+    objects = {}
+    for key, value in st.session_state.items():
+        if key in _BOOKKEEPING_KEYS:
+            continue
+        items = [(f"datasets[{name}]", data) for name, data in value.items()] if key == 'datasets' else [(key, value)]
+        for label, obj in items:
+            if obj is None:
+                continue
+            labels, _ = objects.setdefault(id(obj), ([], obj))
+            labels.append(label)
+    return list(objects.values())
+
+def get_session_memory():
+    """
+    Summarize the memory held by the session state, largest objects first
+
+    Datasets shared with other sessions (copy-on-write copies of one upload)
+    are counted in full.
+
+    Returns:
+    - DataFrame with one row per object: keys, type, size and location
+    """
+    rows = [
+        {
+            'Object': ', '.join(labels),
+            'Type': type(obj).__name__,
+            'Size (MB)': round(deep_size(obj) / 1024 ** 2, 2),
+            'Location': 'disk (memory-mapped)' if is_mapped(obj) else ('disk (out of core)' if is_out_of_core(obj) else 'memory')
+        }
+        for labels, obj in _session_objects()
+    ]
+    usage = pd.DataFrame(rows, columns=['Object', 'Type', 'Size (MB)', 'Location'])
+    return usage.sort_values('Size (MB)', ascending=False, ignore_index=True)
+
+def spill_cold_objects(limit_mb=SESSION_MEMORY_LIMIT_MB):
+    """
+    Move cold objects to disk while the session holds more than the limit
+
+    Candidates are workspace datasets other than the active one (earlier
+    versions and other uploads) and the train/test splits, coldest first:
+    the ones left unchanged for the most reruns, then the largest. They are
+    replaced in the session state by memory-mapped equivalents, so pages
+    keep using them as before while the operating system pages their data
+    in from disk on demand.
+
+    Parameters:
+    - limit_mb: float, session memory limit in MB
+
+    Returns:
+    - list of session state keys moved to disk
+    """
+    # Rerun counter and, per key, the object it held and the rerun it last changed
+    st.session_state.memory_runs = st.session_state.get('memory_runs', 0) + 1
+    changed = st.session_state.setdefault('memory_changed', {})
+
+    candidates = []
+    total = 0
+    active = st.session_state.get('data')
+    for labels, obj in _session_objects():
+        if is_mapped(obj):
+            continue
+        size = deep_size(obj)
+        total += size
+
+        for label in labels:
+            if changed.get(label, (None,))[0] != id(obj):
+                changed[label] = (id(obj), st.session_state.memory_runs)
+
+        spillable = all(label.startswith('datasets[') or label in SPILLABLE_KEYS for label in labels)
+        if spillable and obj is not active and size >= MIN_SPILL_MB * 1024 ** 2 and isinstance(obj, (pd.DataFrame, pd.Series, np.ndarray)):
+            last_changed = max(changed[label][1] for label in labels)
+            candidates.append((last_changed, -size, labels, obj))
+
+    spilled = []
+    for _, neg_size, labels, obj in sorted(candidates, key=lambda candidate: candidate[:2]):
+        if total <= limit_mb * 1024 ** 2:
+            break
+        mapped = _map_to_disk(obj)
+        if mapped is None:
+            continue
+
+        for label in labels:
+            if label.startswith('datasets['):
+                st.session_state.datasets[label[len('datasets['):-1]] = mapped
+            else:
+                st.session_state[label] = mapped
+            changed[label] = (id(mapped), changed[label][1])
+        total += neg_size
+        spilled.extend(labels)
+    return spilled
+
+def show_session_memory():
+    """
+    Keep the session under its memory limit and show what it holds in a sidebar panel
+
+    Called on every page, so cold objects are moved to disk wherever the user is working.
+    """
+    spilled = spill_cold_objects()
+    usage = get_session_memory()
+    in_memory = usage.loc[usage['Location'] == 'memory', 'Size (MB)'].sum()
+
+    with st.sidebar.expander(f"🧠 Session memory: {in_memory:,.0f} MB"):
+        st.dataframe(usage, hide_index=True, use_container_width=True)
+        st.caption(
+            f"Past {SESSION_MEMORY_LIMIT_MB:,} MB, earlier datasets and train/test splits are moved to disk "
+            "and read back on demand through memory maps."
+        )
+        if spilled:
+            st.caption(f"Moved to disk on this run: {', '.join(spilled)}")
@@ -0,0 +1,233 @@
+import hashlib
+import os
+import threading
+import time
+from collections import OrderedDict
+import pandas as pd
+import pyarrow as pa
+import streamlit as st
+from utils.dataset_cache import get_dataset_version, set_dataset_version, lazy_copy
+from utils.out_of_core import PROCESS_STORAGE_DIR, is_out_of_core
+
+# Memory the shared datasets may take before the least recently used are spilled to disk
+SHARED_MEMORY_BUDGET_MB = int(os.environ.get('DATAVIZPRO_SHARED_MEMORY_MB', 2048))
+
+# Sources remembered at most; the least recently used beyond are forgotten
+MAX_SHARED_SOURCES = 64
+
+# Directory holding the Parquet files of spilled shared datasets
+SPILL_DIR = os.path.join(PROCESS_STORAGE_DIR, 'shared')
+
+def content_key(content, *options):
+    """
+    Key a source by the hash of its bytes and the options it is loaded with
+
+    Parameters:
+    - content: bytes of the uploaded file
+    - options: anything else that changes the parsed result (sheets, storage mode, ...)
+
+    Returns:
+    - str hex digest
+    """
+    digest = hashlib.sha1(content)
+    digest.update(repr(options).encode('utf-8'))
+    return digest.hexdigest()[:16]
+
+def _memory_bytes(df):
+    return 0 if is_out_of_core(df) else int(df.memory_usage(deep=True).sum())
+
+class SharedDatasets:
+    """
+    Parsed datasets shared by every session of the server, keyed by the content hash of their source
+
+    Sessions uploading the same file get lazy copies of one parsed frame
+    instead of parsing it again. The shared frames themselves are never
+    handed out, so they stay read-only; a session's copy shares their data
+    until the session changes it (see lazy_copy).
+
+    When the in-memory datasets exceed the memory budget, the least recently
+    used are written to Parquet and dropped, and read back (instead of parsed
+    again) the next time they are asked for. Their memory is freed once no
+    session still holds a copy. Out-of-core datasets live on disk already
+    and never count against the budget.
+    """
+
+    def __init__(self, budget_bytes):
+        self.budget_bytes = budget_bytes
+        # Key -> {'frames': name -> frame (None once spilled), 'names', 'bytes', 'paths',
+        # 'versions', 'dtypes', 'last_used'}, least recently used first
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        # Key -> lock held while the source is parsed, so sessions loading it at the same time parse it once
+        self._loading = {}
+
+    @property
+    def memory_bytes(self):
+        """Memory taken by the shared datasets held in memory"""
+        return sum(entry['bytes'] for entry in self._entries.values() if entry['frames'] is not None)
+
+    def get(self, key):
+        """
+        Get this session's copies of the datasets loaded from a source
+
+        Parameters:
+        - key: str, as returned by content_key
+
+        Returns:
+        - dict of dataset name -> lazy copy, or None when the source was not loaded yet
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+
+            if entry['frames'] is None:
+                frames = self._reload(entry)
+                if frames is None:
+                    self._forget(key)
+                    return None
+                entry['frames'] = frames
+
+            self._touch(key)
+            self._evict(keep=key)
+            return {name: lazy_copy(data) for name, data in entry['frames'].items()}
+
+    def put(self, key, datasets):
+        """
+        Share the datasets loaded from a source
+
+        Parameters:
+        - key: str, as returned by content_key
+        - datasets: dict of dataset name -> DataFrame or OutOfCoreFrame
+
+        Returns:
+        - dict of dataset name -> lazy copy for the session that loaded them
+        """
+        # Fingerprinted once here, so the sessions' copies share the version and its cached results
+        for data in datasets.values():
+            get_dataset_version(data)
+
+        entry = {
+            'frames': dict(datasets),
+            'names': list(datasets),
+            'bytes': sum(_memory_bytes(data) for data in datasets.values()),
+            'paths': None,
+            'versions': None,
+            'dtypes': None,
+            'last_used': None
+        }
+        with self._lock:
+            self._entries[key] = entry
+            self._touch(key)
+            self._evict(keep=key)
+        return {name: lazy_copy(data) for name, data in datasets.items()}
+
+    def get_or_load(self, key, load):
+        """
+        Get this session's copies of a source's datasets, loading and sharing them if needed
+
+        Parameters:
+        - key: str, as returned by content_key
+        - load: callable returning a dict of dataset name -> DataFrame or OutOfCoreFrame
+
+        Returns:
+        - dict of dataset name -> lazy copy
+        """
+        with self._lock:
+            key_lock = self._loading.setdefault(key, threading.Lock())
+
+        try:
+            with key_lock:
+                datasets = self.get(key)
+                if datasets is None:
+                    datasets = self.put(key, load())
+                return datasets
+        finally:
+            with self._lock:
+                if not key_lock.locked() and self._loading.get(key) is key_lock:
+                    del self._loading[key]
+
+    def summary(self):
+        """
+        Summarize the shared datasets
+
+        Returns:
+        - dict with 'sources', 'spilled' (sources on disk), 'memory_bytes' and 'budget_bytes'
+        """
+        with self._lock:
+            return {
+                'sources': len(self._entries),
+                'spilled': sum(entry['frames'] is None for entry in self._entries.values()),
+                'memory_bytes': self.memory_bytes,
+                'budget_bytes': self.budget_bytes
+            }
+
+    def _touch(self, key):
+        self._entries.move_to_end(key)
+        self._entries[key]['last_used'] = time.time()
+
+    def _evict(self, keep):
+        """Spill the least recently used datasets until the memory budget is met (never the one just used)"""
+        while len(self._entries) > MAX_SHARED_SOURCES:
+            self._forget(next(iter(self._entries)))
+
+        for key in list(self._entries):
+            if self.memory_bytes <= self.budget_bytes:
+                return
+            entry = self._entries[key]
+            if key == keep or entry['frames'] is None or not entry['bytes']:
+                continue
+            if not self._spill(key, entry):
+                # Data Parquet cannot hold (e.g. mixed-type text columns) is parsed again when needed
+                self._forget(key)
+
+    def _forget(self, key):
+        entry = self._entries.pop(key)
+        for path in (entry['paths'] or {}).values():
+            if os.path.exists(path):
+                os.remove(path)
+
+    def _spill(self, key, entry):
+        """Write an entry's frames to Parquet and drop them from memory"""
+        if entry['paths'] is None:
+            os.makedirs(SPILL_DIR, exist_ok=True)
+            paths, versions, dtypes = {}, {}, {}
+            try:
+                for i, (name, data) in enumerate(entry['frames'].items()):
+                    paths[name] = os.path.join(SPILL_DIR, f"{key}-{i}.parquet")
+                    data.to_parquet(paths[name])
+                    versions[name] = get_dataset_version(data)
+                    dtypes[name] = data.dtypes.astype(str).tolist()
+            except (pa.ArrowException, ValueError, TypeError, OSError):
+                for path in paths.values():
+                    if os.path.exists(path):
+                        os.remove(path)
+                return False
+            entry['paths'], entry['versions'], entry['dtypes'] = paths, versions, dtypes
+
+        entry['frames'] = None
+        return True
+
+    def _reload(self, entry):
+        """Read a spilled entry's frames back, or None when its files are gone"""
+        frames = {}
+        try:
+            for name in entry['names']:
+                data = pd.read_parquet(entry['paths'][name])
+                # A frame that reads back with the same types holds the same data, so it keeps its cached results
+                if data.dtypes.astype(str).tolist() == entry['dtypes'][name]:
+                    set_dataset_version(data, entry['versions'][name])
+                frames[name] = data
+        except (pa.ArrowException, OSError):
+            return None
+        return frames
+
+@st.cache_resource(show_spinner=False)
+def get_shared_datasets():
+    """
+    Get the server's shared dataset store
+
+    Returns:
+    - SharedDatasets, one per server process
+    """
+    return SharedDatasets(SHARED_MEMORY_BUDGET_MB * 1024 ** 2)
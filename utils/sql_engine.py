@@ -0,0 +1,221 @@
+import os
+import sqlite3
+import tempfile
+import threading
+import weakref
+import streamlit as st
+import pandas as pd
+import numpy as np
+from utils.dataset_cache import get_dataset_version
+from utils.streaming_stats import iter_frame_chunks
+
+# Name of the table holding the active dataset
+TABLE_NAME = 'data'
+
+# Rows per executemany batch when loading, and per fetchmany batch when querying
+SQL_BATCH_SIZE = 50_000
+
+# Upper bound on the rows kept from one query for the viewer
+MAX_RESULT_ROWS = 1_000_000
+
+# Authorizer actions a read-only query may perform
+_READ_ONLY_ACTIONS = {sqlite3.SQLITE_SELECT, sqlite3.SQLITE_READ, sqlite3.SQLITE_FUNCTION, sqlite3.SQLITE_RECURSIVE}
+
+# Cached connections are shared across reruns and sessions, so queries take turns
+_query_lock = threading.Lock()
+
+class _Connection(sqlite3.Connection):
+    """SQLite connection that can be weakly referenced, so its database file can follow it"""
+
+def _remove_database(path):
+    try:
+        os.remove(path)
+    except OSError:
+        pass
+
+def _quote(name):
+    """Quote an identifier for SQLite"""
+    return '"' + str(name).replace('"', '""') + '"'
+
+def _sqlite_type(dtype):
+    """Map a pandas dtype to a SQLite column type"""
+    if pd.api.types.is_bool_dtype(dtype) or pd.api.types.is_integer_dtype(dtype):
+        return 'INTEGER'
+    if pd.api.types.is_float_dtype(dtype):
+        return 'REAL'
+    return 'TEXT'
+
+def _sql_values(series):
+    """Convert a column to Python values SQLite can bind (None for missing values)"""
+    if pd.api.types.is_datetime64_any_dtype(series):
+        series = series.dt.strftime('%Y-%m-%d %H:%M:%S')
+    elif not (pd.api.types.is_numeric_dtype(series) or pd.api.types.is_bool_dtype(series)):
+        series = series.astype(str).where(series.notnull())
+    return series.to_numpy(dtype=object, na_value=None)
+
+def build_database(df, table_name=TABLE_NAME, path=None, batch_size=SQL_BATCH_SIZE):
+    """
+    Bulk-load a DataFrame into a SQLite database with executemany batches
+
+    Parameters:
+    - df: pandas DataFrame or OutOfCoreFrame (loaded one chunk at a time)
+    - table_name: str, name of the table to create
+    - path: str, database file (None for an in-memory database)
+    - batch_size: int, rows per executemany batch
+
+    Returns:
+    - sqlite3 connection
+    """
+    connection = sqlite3.connect(path or ':memory:', check_same_thread=False, factory=_Connection)
+
+    # The database is a disposable copy, so skip durability work while loading
+    connection.execute('PRAGMA journal_mode = OFF')
+    connection.execute('PRAGMA synchronous = OFF')
+
+    columns = ', '.join(f"{_quote(col)} {_sqlite_type(dtype)}" for col, dtype in df.dtypes.items())
+    connection.execute(f"CREATE TABLE {_quote(table_name)} ({columns})")
+
+    placeholders = ', '.join(['?'] * len(df.columns))
+    insert = f"INSERT INTO {_quote(table_name)} VALUES ({placeholders})"
+
+    with connection:
+        for chunk in iter_frame_chunks(df, batch_size):
+            connection.executemany(insert, zip(*(_sql_values(chunk[col]) for col in chunk.columns)))
+
+    connection.execute('ANALYZE')
+    return connection
+
+@st.cache_resource(show_spinner=False, max_entries=4)
+def _cached_database(version, on_disk, _df):
+    if not on_disk:
+        return build_database(_df, TABLE_NAME)
+
+    handle, path = tempfile.mkstemp(prefix='datavizpro_', suffix='.sqlite')
+    os.close(handle)
+    try:
+        connection = build_database(_df, TABLE_NAME, path)
+    except BaseException:
+        _remove_database(path)
+        raise
+
+    # The file goes once the connection is evicted from the cache and no session still uses it
+    weakref.finalize(connection, _remove_database, path)
+    return connection
+
+def get_database(df, on_disk=False):
+    """
+    Get a SQLite database holding the dataset, cached per dataset version
+
+    Parameters:
+    - df: pandas DataFrame
+    - on_disk: bool, store the database in a temporary file instead of memory
+
+    Returns:
+    - sqlite3 connection with the dataset in the TABLE_NAME table
+    """
+    return _cached_database(get_dataset_version(df), on_disk, df)
+
+def ensure_indexes(connection, columns, table_name=TABLE_NAME):
+    """
+    Create single-column indexes that do not exist yet
+
+    Parameters:
+    - connection: sqlite3 connection
+    - columns: list of column names
+    - table_name: str, indexed table
+    """
+    with _query_lock, connection:
+        for col in columns:
+            index_name = _quote(f"idx_{table_name}_{col}")
+            connection.execute(f"CREATE INDEX IF NOT EXISTS {index_name} ON {_quote(table_name)} ({_quote(col)})")
+
+def get_indexes(connection, table_name=TABLE_NAME):
+    """
+    List the indexed columns of a table
+
+    Parameters:
+    - connection: sqlite3 connection
+    - table_name: str, table name
+
+    Returns:
+    - list of column names with an index
+    """
+    with _query_lock:
+        indexes = connection.execute(f"PRAGMA index_list({_quote(table_name)})").fetchall()
+        return [
+            connection.execute(f"PRAGMA index_info({_quote(index[1])})").fetchone()[2]
+            for index in indexes
+        ]
+
+def _read_only_authorizer(action, *args):
+    return sqlite3.SQLITE_OK if action in _READ_ONLY_ACTIONS else sqlite3.SQLITE_DENY
+
+def iter_query_batches(connection, query, batch_size=SQL_BATCH_SIZE):
+    """
+    Run a read-only query and yield its result in column batches
+
+    Parameters:
+    - connection: sqlite3 connection
+    - query: str, a SELECT statement
+    - batch_size: int, rows per batch
+
+    Yields:
+    - DataFrame batches of the result
+
+    Raises:
+    - sqlite3.DatabaseError for invalid queries or statements that modify data
+    """
+    with _query_lock:
+        connection.set_authorizer(_read_only_authorizer)
+        try:
+            cursor = connection.execute(query)
+            names = [description[0] for description in cursor.description or []]
+
+            yielded = False
+            while True:
+                rows = cursor.fetchmany(batch_size)
+                if not rows:
+                    if not yielded:
+                        # Keep the column names of an empty result
+                        yield pd.DataFrame(columns=names)
+                    break
+                yielded = True
+                # Transpose the row tuples into one NumPy array per column
+                arrays = zip(*rows)
+                yield pd.DataFrame(
+                    {name: np.array(values) for name, values in zip(names, arrays)},
+                    columns=names
+                ).infer_objects()
+        finally:
+            connection.set_authorizer(None)
+
+def run_query(connection, query, max_rows=MAX_RESULT_ROWS):
+    """
+    Run a read-only query and collect its result
+
+    Parameters:
+    - connection: sqlite3 connection
+    - query: str, a SELECT statement
+    - max_rows: int, stop after this many rows
+
+    Returns:
+    - (DataFrame result, bool whether the query returned more than max_rows rows)
+    """
+    batches = []
+    n_rows = 0
+    truncated = False
+
+    query_batches = iter_query_batches(connection, query)
+    for batch in query_batches:
+        batches.append(batch)
+        n_rows += len(batch)
+        # One row past the limit tells a cut-off result from one of exactly max_rows rows
+        if n_rows > max_rows:
+            truncated = True
+            break
+
+    # Release the query lock right away if the limit stopped the loop early
+    query_batches.close()
+
+    result = pd.concat(batches, ignore_index=True)
+    return result.iloc[:max_rows], truncated
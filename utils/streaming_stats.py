@@ -0,0 +1,229 @@
+import os
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+import pandas as pd
+import numpy as np
+from utils.out_of_core import is_out_of_core
+
+# Columns of a moment accumulator (one row per data column)
+MOMENT_FIELDS = ['count', 'mean', 'M2', 'M3', 'M4', 'min', 'max', 'nulls']
+
+# Default number of rows per chunk when splitting an in-memory frame
+DEFAULT_CHUNKSIZE = 100_000
+
+def empty_moments(columns):
+    """
+    Create an empty moment accumulator
+
+    Parameters:
+    - columns: list of column names
+
+    Returns:
+    - DataFrame indexed by column with the MOMENT_FIELDS columns
+    """
+    moments = pd.DataFrame(0.0, index=pd.Index(columns), columns=MOMENT_FIELDS)
+    moments['min'] = np.nan
+    moments['max'] = np.nan
+    return moments
+
+def compute_moments(df, columns=None):
+    """
+    Compute count, mean, central moment sums, min, max and nulls in one pass over a chunk
+
+    Parameters:
+    - df: pandas DataFrame (a chunk of the data)
+    - columns: list, numeric columns to include (None for all numeric columns)
+
+    Returns:
+    - DataFrame moment accumulator indexed by column
+    """
+    if columns is None:
+        columns = df.select_dtypes(include=np.number).columns.tolist()
+
+    if len(df) == 0 or not columns:
+        return empty_moments(columns)
+
+    values = df[columns].to_numpy(dtype=float, na_value=np.nan)
+    present = ~np.isnan(values)
+    count = present.sum(axis=0)
+
+    with np.errstate(invalid='ignore', divide='ignore'):
+        mean = np.where(count > 0, np.nansum(values, axis=0) / np.maximum(count, 1), 0.0)
+        deviations = np.where(present, values - mean, 0.0)
+        squared = deviations ** 2
+
+        moments = pd.DataFrame({
+            'count': count.astype(float),
+            'mean': mean,
+            'M2': squared.sum(axis=0),
+            'M3': (squared * deviations).sum(axis=0),
+            'M4': (squared ** 2).sum(axis=0),
+            'min': np.where(count > 0, np.nanmin(np.where(present, values, np.inf), axis=0), np.nan),
+            'max': np.where(count > 0, np.nanmax(np.where(present, values, -np.inf), axis=0), np.nan),
+            'nulls': (~present).sum(axis=0).astype(float)
+        }, index=pd.Index(columns))
+
+    return moments
+
+def merge_moments(left, right):
+    """
+    Merge two moment accumulators with the pairwise update formulas (Chan/Pébay)
+
+    Parameters:
+    - left: DataFrame moment accumulator
+    - right: DataFrame moment accumulator (columns missing on one side count as empty)
+
+    Returns:
+    - DataFrame moment accumulator covering both inputs
+    """
+    columns = left.index.union(right.index, sort=False)
+    a = left.reindex(columns)
+    b = right.reindex(columns)
+    a[['count', 'mean', 'M2', 'M3', 'M4', 'nulls']] = a[['count', 'mean', 'M2', 'M3', 'M4', 'nulls']].fillna(0.0)
+    b[['count', 'mean', 'M2', 'M3', 'M4', 'nulls']] = b[['count', 'mean', 'M2', 'M3', 'M4', 'nulls']].fillna(0.0)
+
+    na, nb = a['count'], b['count']
+    n = na + nb
+    safe_n = n.where(n > 0, 1.0)
+    delta = b['mean'] - a['mean']
+
+    merged = pd.DataFrame(index=columns)
+    merged['count'] = n
+    merged['mean'] = a['mean'] + delta * nb / safe_n
+    merged['M2'] = a['M2'] + b['M2'] + delta ** 2 * na * nb / safe_n
+    merged['M3'] = (
+        a['M3'] + b['M3']
+        + delta ** 3 * na * nb * (na - nb) / safe_n ** 2
+        + 3 * delta * (na * b['M2'] - nb * a['M2']) / safe_n
+    )
+    merged['M4'] = (
+        a['M4'] + b['M4']
+        + delta ** 4 * na * nb * (na ** 2 - na * nb + nb ** 2) / safe_n ** 3
+        + 6 * delta ** 2 * (na ** 2 * b['M2'] + nb ** 2 * a['M2']) / safe_n ** 2
+        + 4 * delta * (na * b['M3'] - nb * a['M3']) / safe_n
+    )
+    merged['min'] = np.fmin(a['min'], b['min'])
+    merged['max'] = np.fmax(a['max'], b['max'])
+    merged['nulls'] = a['nulls'] + b['nulls']
+
+    return merged[MOMENT_FIELDS]
+
+def update_moments(moments, new_rows):
+    """
+    Update an accumulator with appended rows without revisiting earlier data
+
+    Parameters:
+    - moments: DataFrame moment accumulator for the existing rows
+    - new_rows: pandas DataFrame with the appended rows
+
+    Returns:
+    - DataFrame moment accumulator covering old and new rows
+    """
+    return merge_moments(moments, compute_moments(new_rows, moments.index.tolist()))
+
+def iter_frame_chunks(df, chunksize=DEFAULT_CHUNKSIZE, columns=None):
+    """
+    Split a DataFrame into row chunks (views, no copies)
+
+    Out-of-core datasets are read one stored row group at a time instead.
+
+    Parameters:
+    - df: pandas DataFrame or OutOfCoreFrame
+    - chunksize: int, rows per chunk (in-memory frames only)
+    - columns: list, columns to include (None for all)
+
+    Yields:
+    - DataFrame chunks
+    """
+    if is_out_of_core(df):
+        yield from df.iter_chunks(columns)
+        return
+
+    if columns is not None:
+        df = df[columns]
+    for start in range(0, len(df), chunksize):
+        yield df.iloc[start:start + chunksize]
+
+def compute_moments_chunked(chunks, columns=None, max_workers=None):
+    """
+    Compute a moment accumulator over an iterable of chunks in parallel
+
+    Chunks are consumed lazily with a bounded number in flight, so an iterator
+    such as pd.read_csv(..., chunksize=...) never has to fit in memory.
+
+    Parameters:
+    - chunks: iterable of DataFrames (e.g. iter_frame_chunks or a chunked reader)
+    - columns: list, numeric columns to include (None detects them from the first chunk)
+    - max_workers: int, number of worker threads (None uses all CPUs)
+
+    Returns:
+    - DataFrame moment accumulator
+    """
+    if max_workers is None:
+        max_workers = os.cpu_count() or 1
+
+    result = None
+    pending = set()
+
+    def collect(done):
+        nonlocal result
+        for future in done:
+            partial = future.result()
+            result = partial if result is None else merge_moments(result, partial)
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        for chunk in chunks:
+            if columns is None:
+                columns = chunk.select_dtypes(include=np.number).columns.tolist()
+
+            pending.add(executor.submit(compute_moments, chunk, columns))
+
+            if len(pending) >= max_workers * 2:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                collect(done)
+
+        collect(pending)
+
+    if result is None:
+        return empty_moments(columns or [])
+    return result
+
+def moments_to_statistics(moments):
+    """
+    Derive summary statistics from a moment accumulator
+
+    Skewness and kurtosis use the same bias-adjusted estimators as pandas.
+
+    Parameters:
+    - moments: DataFrame moment accumulator
+
+    Returns:
+    - DataFrame with count, mean, std, min, max, skew, kurtosis, missing_count and missing_pct
+    """
+    n = moments['count']
+    total = n + moments['nulls']
+
+    with np.errstate(invalid='ignore', divide='ignore'):
+        m2 = moments['M2'] / n
+        m3 = moments['M3'] / n
+        m4 = moments['M4'] / n
+
+        variance = (moments['M2'] / (n - 1)).where(n > 1)
+        skew = (np.sqrt(n * (n - 1)) / (n - 2) * m3 / m2 ** 1.5).where(n > 2)
+        kurtosis = (((n + 1) * (m4 / m2 ** 2 - 3) + 6) * (n - 1) / ((n - 2) * (n - 3))).where(n > 3)
+
+    # Constant columns have zero skew and kurtosis, as in pandas
+    constant = moments['M2'] <= 1e-14 * moments['mean'].abs().clip(lower=1) ** 2 * n
+    skew = skew.mask(constant & (n > 2), 0.0)
+    kurtosis = kurtosis.mask(constant & (n > 3), 0.0)
+
+    return pd.DataFrame({
+        'count': n,
+        'mean': moments['mean'].where(n > 0),
+        'std': np.sqrt(variance),
+        'min': moments['min'],
+        'max': moments['max'],
+        'skew': skew,
+        'kurtosis': kurtosis,
+        'missing_count': moments['nulls'].astype(int),
+        'missing_pct': (moments['nulls'] / total.where(total > 0) * 100).fillna(0.0)
+    })
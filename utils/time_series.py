@@ -0,0 +1,301 @@
+import pandas as pd
+import numpy as np
+from utils.caching import cache_data
+from utils.dataset_cache import get_dataset_version, split_append
+
+# Resampling frequencies offered in the UI (label -> pandas offset alias)
+RESAMPLE_FREQUENCIES = {
+    'Minute': 'min',
+    'Hour': 'h',
+    'Day': 'D',
+    'Week': 'W',
+    'Month': 'MS',
+    'Quarter': 'QS',
+    'Year': 'YS'
+}
+
+# Aggregations supported by resample_series
+RESAMPLE_AGGREGATIONS = ['mean', 'sum', 'min', 'max', 'median', 'count', 'first', 'last']
+
+# Statistics computed from cached prefix sums by rolling_window
+WINDOW_STATISTICS = ['mean', 'sum', 'std', 'count']
+
+def _time_order(df, datetime_column):
+    times = pd.DatetimeIndex(df[datetime_column])
+    positions = np.flatnonzero(~times.isna())
+    order = positions[np.argsort(times.asi8[positions], kind='stable')]
+    return order, times[order]
+
+@cache_data(max_entries=32)
+def _cached_time_index(version, datetime_column, _df):
+    appended = split_append(version, _df)
+    if appended is not None:
+        # Sort only the new rows, then merge the two sorted runs (a stable sort merges runs in linear time)
+        base_version, base, delta = appended
+        base_order, base_times = _cached_time_index(base_version, datetime_column, base)
+        delta_order, delta_times = _time_order(delta, datetime_column)
+        order = np.concatenate([base_order, delta_order + len(base)])
+        times = base_times.append(delta_times)
+        merged = np.argsort(times.asi8, kind='stable')
+        return order[merged], times[merged]
+    return _time_order(_df, datetime_column)
+
+def get_time_index(df, datetime_column):
+    """
+    Get the row order that sorts a frame by a datetime column, cached per dataset version
+
+    Rows with a missing timestamp are left out.
+
+    Parameters:
+    - df: pandas DataFrame
+    - datetime_column: str, datetime column
+
+    Returns:
+    - (numpy array of row positions in time order, sorted DatetimeIndex)
+    """
+    return _cached_time_index(get_dataset_version(df), datetime_column, df)
+
+def get_sorted_values(df, datetime_column, column):
+    """
+    Get the values of a column in time order
+
+    Parameters:
+    - df: pandas DataFrame
+    - datetime_column: str, datetime column
+    - column: str, numeric column
+
+    Returns:
+    - pandas Series indexed by the sorted timestamps
+    """
+    order, times = get_time_index(df, datetime_column)
+    values = df[column].to_numpy(dtype=float, na_value=np.nan)[order]
+    return pd.Series(values, index=times, name=column)
+
+def _prefix_sums(values, shift=None, start=None):
+    """Running count, sum and sum of squares of values shifted by shift, continuing from the last entries of start"""
+    present = ~np.isnan(values)
+
+    # Shift by the mean so the running sum of squares keeps its precision
+    if shift is None:
+        shift = float(values[present].mean()) if present.any() else 0.0
+    centered = np.where(present, values - shift, 0.0)
+
+    sums = {
+        'shift': shift,
+        'count': np.concatenate([[0], np.cumsum(present)]),
+        'sum': np.concatenate([[0.0], np.cumsum(centered)]),
+        'sum_sq': np.concatenate([[0.0], np.cumsum(centered * centered)])
+    }
+    if start is not None:
+        for key in ['count', 'sum', 'sum_sq']:
+            sums[key] = np.concatenate([start[key], sums[key][1:] + start[key][-1]])
+    return sums
+
+@cache_data(max_entries=64)
+def _cached_prefix_sums(version, datetime_column, column, _df):
+    appended = split_append(version, _df)
+    if appended is not None:
+        base_version, base, delta = appended
+        _, base_times = _cached_time_index(base_version, datetime_column, base)
+        delta_order, delta_times = _time_order(delta, datetime_column)
+
+        # New rows that all come after the history only extend the running sums
+        if not len(base_times) or not len(delta_times) or delta_times[0] >= base_times[-1]:
+            base_sums = _cached_prefix_sums(base_version, datetime_column, column, base)
+            values = delta[column].to_numpy(dtype=float, na_value=np.nan)[delta_order]
+            return _prefix_sums(values, base_sums['shift'], base_sums)
+
+    return _prefix_sums(get_sorted_values(_df, datetime_column, column).to_numpy())
+
+def get_prefix_sums(df, datetime_column, column):
+    """
+    Get running count, sum and sum of squares of a column in time order, cached per dataset version
+
+    Any window aggregate is a difference of two prefix entries, so changing
+    the window length never rescans the data.
+
+    Parameters:
+    - df: pandas DataFrame
+    - datetime_column: str, datetime column
+    - column: str, numeric column
+
+    Returns:
+    - dict with 'shift' and the 'count', 'sum' and 'sum_sq' prefix arrays (length n + 1)
+    """
+    return _cached_prefix_sums(get_dataset_version(df), datetime_column, column, df)
+
+def rolling_window(df, datetime_column, column, window=None, statistic='mean', min_periods=None):
+    """
+    Compute a rolling or expanding window statistic from cached prefix sums
+
+    Parameters:
+    - df: pandas DataFrame
+    - datetime_column: str, datetime column
+    - column: str, numeric column
+    - window: int for a window of rows, str offset (e.g. '7D') for a time window,
+      None for an expanding window
+    - statistic: str, one of WINDOW_STATISTICS
+    - min_periods: int, minimum non-missing values per window (defaults as in pandas)
+
+    Returns:
+    - pandas Series indexed by the sorted timestamps
+    """
+    _, times = get_time_index(df, datetime_column)
+    prefix = get_prefix_sums(df, datetime_column, column)
+    n = len(times)
+    hi = np.arange(1, n + 1)
+
+    if window is None:
+        lo = np.zeros(n, dtype=np.int64)
+        default_periods = 1
+    elif isinstance(window, str):
+        # Time windows cover (t - window, t], like pandas rolling('7D')
+        lo = np.searchsorted(times.asi8, (times - pd.Timedelta(window)).asi8, side='right')
+        default_periods = 1
+    else:
+        lo = np.maximum(hi - int(window), 0)
+        default_periods = int(window)
+
+    if min_periods is None:
+        min_periods = default_periods
+
+    count = prefix['count'][hi] - prefix['count'][lo]
+    total = prefix['sum'][hi] - prefix['sum'][lo]
+
+    with np.errstate(invalid='ignore', divide='ignore'):
+        if statistic == 'mean':
+            result = total / count + prefix['shift']
+        elif statistic == 'sum':
+            result = total + prefix['shift'] * count
+        elif statistic == 'std':
+            squares = prefix['sum_sq'][hi] - prefix['sum_sq'][lo]
+            variance = (squares - total * total / count) / (count - 1)
+            result = np.sqrt(np.clip(variance, 0.0, None))
+            result = np.where(count > 1, result, np.nan)
+        elif statistic == 'count':
+            result = count.astype(float)
+        else:
+            raise ValueError(f"Unsupported window statistic: {statistic}")
+
+    # As in pandas, counts need enough rows in the window, other statistics enough values
+    filled = hi - lo if statistic == 'count' else count
+    result = np.where(filled >= max(min_periods, 1), result, np.nan)
+    return pd.Series(result, index=times, name=f"{column} ({statistic})")
+
+def resample_series(df, datetime_column, columns, frequency='D', agg='mean'):
+    """
+    Resample columns to a regular frequency in one vectorized pass
+
+    Parameters:
+    - df: pandas DataFrame
+    - datetime_column: str, datetime column
+    - columns: list of numeric columns
+    - frequency: str, pandas offset alias (e.g. 'h', 'D', 'MS')
+    - agg: str, one of RESAMPLE_AGGREGATIONS
+
+    Returns:
+    - DataFrame indexed by period start with one column per input column
+    """
+    order, times = get_time_index(df, datetime_column)
+    frame = pd.DataFrame(
+        {col: df[col].to_numpy(dtype=float, na_value=np.nan)[order] for col in columns},
+        index=times
+    )
+    return frame.resample(frequency).agg(agg)
+
+def lag_features(series, lags):
+    """
+    Build lagged copies of a series
+
+    Parameters:
+    - series: pandas Series in time order
+    - lags: list of positive ints (number of periods)
+
+    Returns:
+    - DataFrame with the series and one 'lag_<k>' column per lag
+    """
+    values = series.to_numpy(dtype=float)
+    columns = {series.name: values}
+    for lag in lags:
+        shifted = np.full(len(values), np.nan)
+        if lag < len(values):
+            shifted[lag:] = values[:len(values) - lag]
+        columns[f"lag_{lag}"] = shifted
+
+    return pd.DataFrame(columns, index=series.index)
+
+def autocorrelation(series, max_lag=24):
+    """
+    Compute the sample autocorrelation function of a series
+
+    Parameters:
+    - series: pandas Series in time order (missing values are ignored)
+    - max_lag: int, largest lag
+
+    Returns:
+    - DataFrame with 'Lag' and 'Autocorrelation' columns
+    """
+    values = series.to_numpy(dtype=float)
+    deviations = values - np.nanmean(values)
+    present = ~np.isnan(deviations)
+    deviations = np.where(present, deviations, 0.0)
+    denominator = (deviations * deviations).sum()
+
+    lags = np.arange(1, max(1, min(max_lag, len(values) - 1)) + 1)
+    acf = [(deviations[lag:] * deviations[:-lag]).sum() / denominator if denominator > 0 else np.nan for lag in lags]
+    return pd.DataFrame({'Lag': lags, 'Autocorrelation': acf})
+
+def seasonal_decompose(series, period, model='additive'):
+    """
+    Classical seasonal decomposition with a centered moving-average trend
+
+    Parameters:
+    - series: pandas Series on a regular time grid
+    - period: int, number of observations per seasonal cycle
+    - model: str, 'additive' or 'multiplicative'
+
+    Returns:
+    - DataFrame with 'observed', 'trend', 'seasonal' and 'resid' columns
+    """
+    observed = series.interpolate(limit_direction='both').to_numpy(dtype=float)
+    n = len(observed)
+
+    if period < 2 or n < 2 * period:
+        raise ValueError(f"Need at least two full cycles ({2 * period} observations) for period {period}")
+
+    if model == 'multiplicative' and (observed <= 0).any():
+        raise ValueError("Multiplicative decomposition requires strictly positive values")
+
+    # Centered moving average; even periods use a 2 x period average
+    if period % 2 == 0:
+        weights = np.r_[0.5, np.ones(period - 1), 0.5] / period
+    else:
+        weights = np.ones(period) / period
+    half = len(weights) // 2
+    trend = np.full(n, np.nan)
+    trend[half:n - half] = np.convolve(observed, weights, mode='valid')
+
+    detrended = observed / trend if model == 'multiplicative' else observed - trend
+
+    # Average each phase of the cycle, then center the seasonal figure
+    phases = np.arange(n) % period
+    present = ~np.isnan(detrended)
+    phase_means = (
+        np.bincount(phases[present], weights=detrended[present], minlength=period)
+        / np.bincount(phases[present], minlength=period)
+    )
+    if model == 'multiplicative':
+        phase_means = phase_means / phase_means.mean()
+        seasonal = phase_means[phases]
+        resid = observed / (trend * seasonal)
+    else:
+        phase_means = phase_means - phase_means.mean()
+        seasonal = phase_means[phases]
+        resid = observed - trend - seasonal
+
+    return pd.DataFrame({
+        'observed': observed,
+        'trend': trend,
+        'seasonal': seasonal,
+        'resid': resid
+    }, index=series.index)
@@ -1,4 +1,3 @@
-import streamlit as st
 import pandas as pd
 import numpy as np
 import matplotlib.pyplot as plt
@@ -6,6 +5,10 @@ import seaborn as sns
 import plotly.express as px
 import plotly.graph_objects as go
 from plotly.subplots import make_subplots
+from utils.correlation import compute_correlation_matrix
+from utils.regression import fit_ols_by_group
+from utils.quantile_sketch import DEFAULT_ERROR, get_box_statistics
+from utils.messages import report_error, report_warning
 
 def set_plot_style(plot_style="darkgrid"):
     """Set the style for matplotlib/seaborn plots"""
@@ -29,7 +32,7 @@ def create_histogram(df, column, bins=30, kde=True, title=None, color="#4CAF50")
     - matplotlib figure
     """
     if df is None or column not in df.columns:
-        st.error(f"Column {column} not found in the dataframe")
+        report_error(f"Column {column} not found in the dataframe")
         return None
     
     fig, ax = plt.subplots()
@@ -46,25 +49,47 @@ def create_histogram(df, column, bins=30, kde=True, title=None, color="#4CAF50")
     plt.tight_layout()
     return fig
 
-def create_boxplot(df, column, title=None, color="#4CAF50"):
+def create_boxplot(df, column, title=None, color="#4CAF50", error=DEFAULT_ERROR):
     """
     Create a boxplot for a numerical column
     
+    Box and whiskers come from the column's cached quantile sketch, so the
+    column is never sorted; only the outliers are drawn as points.
+    
     Parameters:
     - df: pandas DataFrame
     - column: str, the column to visualize
     - title: str, plot title
     - color: str, color for the boxplot
+    - error: float, normalized rank error of the quantile sketch
     
     Returns:
     - matplotlib figure
     """
     if df is None or column not in df.columns:
-        st.error(f"Column {column} not found in the dataframe")
+        report_error(f"Column {column} not found in the dataframe")
         return None
     
+    box_stats = get_box_statistics(df, column, error)
+    values = df[column]
+    outliers = values[(values < box_stats['lower_bound']) | (values > box_stats['upper_bound'])]
+    
     fig, ax = plt.subplots()
-    sns.boxplot(data=df, x=column, color=color, ax=ax)
+    ax.bxp(
+        [{
+            'med': box_stats['median'],
+            'q1': box_stats['q1'],
+            'q3': box_stats['q3'],
+            'whislo': box_stats['whisker_low'],
+            'whishi': box_stats['whisker_high'],
+            'fliers': outliers.to_numpy()
+        }],
+        orientation='horizontal',
+        patch_artist=True,
+        boxprops=dict(facecolor=color),
+        medianprops=dict(color="black")
+    )
+    ax.set_yticks([])
     
     if title:
         ax.set_title(title)
@@ -91,11 +116,11 @@ def create_scatter_plot(df, x_column, y_column, hue=None, title=None):
     - matplotlib figure
     """
     if df is None or x_column not in df.columns or y_column not in df.columns:
-        st.error(f"Columns {x_column} or {y_column} not found in the dataframe")
+        report_error(f"Columns {x_column} or {y_column} not found in the dataframe")
         return None
     
     if hue and hue not in df.columns:
-        st.error(f"Hue column {hue} not found in the dataframe")
+        report_error(f"Hue column {hue} not found in the dataframe")
         hue = None
     
     fig, ax = plt.subplots()
@@ -128,11 +153,11 @@ def create_bar_chart(df, x_column, y_column=None, title=None, color="#4CAF50", o
     - matplotlib figure
     """
     if df is None or x_column not in df.columns:
-        st.error(f"Column {x_column} not found in the dataframe")
+        report_error(f"Column {x_column} not found in the dataframe")
         return None
     
     if y_column and y_column not in df.columns:
-        st.error(f"Column {y_column} not found in the dataframe")
+        report_error(f"Column {y_column} not found in the dataframe")
         return None
     
     fig, ax = plt.subplots()
@@ -178,7 +203,7 @@ def create_pie_chart(df, column, title=None, colors=None):
     - matplotlib figure
     """
     if df is None or column not in df.columns:
-        st.error(f"Column {column} not found in the dataframe")
+        report_error(f"Column {column} not found in the dataframe")
         return None
     
     # Get value counts and prepare data
@@ -186,7 +211,7 @@ def create_pie_chart(df, column, title=None, colors=None):
     
     # Limit to top 10 categories if there are too many
     if len(value_counts) > 10:
-        st.warning(f"Column {column} has more than 10 unique values. Showing top 10.")
+        report_warning(f"Column {column} has more than 10 unique values. Showing top 10.")
         others_sum = value_counts[10:].sum()
         value_counts = value_counts[:10]
         if others_sum > 0:
@@ -228,7 +253,7 @@ def create_correlation_heatmap(df, columns=None, method='pearson', title=None, c
     - matplotlib figure
     """
     if df is None:
-        st.error("No dataframe provided")
+        report_error("No dataframe provided")
         return None
     
     # Select numeric columns
@@ -239,11 +264,11 @@ def create_correlation_heatmap(df, columns=None, method='pearson', title=None, c
         numeric_df = df[available_columns].select_dtypes(include=np.number)
     
     if numeric_df.empty:
-        st.error("No numeric columns available for correlation analysis")
+        report_error("No numeric columns available for correlation analysis")
         return None
     
     # Calculate correlation matrix
-    corr_matrix = numeric_df.corr(method=method)
+    corr_matrix = compute_correlation_matrix(numeric_df, method=method)
     
     # Create the heatmap
     fig, ax = plt.subplots(figsize=(10, 8))
@@ -279,7 +304,7 @@ def create_line_chart(df, x_column, y_columns, title=None):
     - matplotlib figure
     """
     if df is None or x_column not in df.columns:
-        st.error(f"Column {x_column} not found in the dataframe")
+        report_error(f"Column {x_column} not found in the dataframe")
         return None
     
     # Ensure y_columns is a list
@@ -290,7 +315,7 @@ def create_line_chart(df, x_column, y_columns, title=None):
     available_y_columns = [col for col in y_columns if col in df.columns]
     
     if not available_y_columns:
-        st.error(f"None of the y-columns {y_columns} found in the dataframe")
+        report_error(f"None of the y-columns {y_columns} found in the dataframe")
         return None
     
     fig, ax = plt.subplots()
@@ -330,7 +355,7 @@ def create_plotly_histogram(df, column, bins=30, title=None):
     - plotly figure
     """
     if df is None or column not in df.columns:
-        st.error(f"Column {column} not found in the dataframe")
+        report_error(f"Column {column} not found in the dataframe")
         return None
     
     if title is None:
@@ -369,18 +394,18 @@ def create_plotly_scatter(df, x_column, y_column, color=None, size=None, title=N
     - plotly figure
     """
     if df is None or x_column not in df.columns or y_column not in df.columns:
-        st.error(f"Columns {x_column} or {y_column} not found in the dataframe")
+        report_error(f"Columns {x_column} or {y_column} not found in the dataframe")
         return None
     
     if title is None:
         title = f"Scatter Plot: {x_column} vs {y_column}"
     
     if color and color not in df.columns:
-        st.warning(f"Color column {color} not found in the dataframe. Ignoring.")
+        report_warning(f"Color column {color} not found in the dataframe. Ignoring.")
         color = None
     
     if size and size not in df.columns:
-        st.warning(f"Size column {size} not found in the dataframe. Ignoring.")
+        report_warning(f"Size column {size} not found in the dataframe. Ignoring.")
         size = None
     
     fig = px.scatter(
@@ -402,6 +427,55 @@ def create_plotly_scatter(df, x_column, y_column, color=None, size=None, title=N
     
     return fig
 
+def create_plotly_scatter_with_trendline(df, x_column, y_column, color=None, size=None, title=None):
+    """
+    Create an interactive Plotly scatter plot with closed-form OLS trend lines
+    
+    Parameters:
+    - df: pandas DataFrame
+    - x_column: str, column for x-axis
+    - y_column: str, column for y-axis
+    - color: str, column name for color encoding (one trend line per group of a categorical column)
+    - size: str, column name for size encoding
+    - title: str, plot title
+    
+    Returns:
+    - plotly figure
+    """
+    fig = create_plotly_scatter(df, x_column, y_column, color=color, size=size, title=title)
+    
+    if fig is None:
+        return None
+    
+    # Lines come from the cached sufficient statistics, not from another fit; numeric colors
+    # are drawn as a continuous scale without per-group traces, so they get the single overall line
+    continuous = color in df.columns and pd.api.types.is_numeric_dtype(df[color]) and not pd.api.types.is_bool_dtype(df[color])
+    group_column = color if color in df.columns and not continuous else None
+    fits = fit_ols_by_group(df, x_column, y_column, group_column)
+    fits_by_name = {str(group): fit for group, fit in fits.items()}
+    
+    for trace in list(fig.data):
+        fit = fits_by_name.get(trace.name) if group_column else fits.get('All')
+        if fit is None:
+            continue
+        
+        x_line = np.array(fit['x_range'], dtype=float)
+        fig.add_trace(
+            go.Scatter(
+                x=x_line,
+                y=fit['intercept'] + fit['slope'] * x_line,
+                mode='lines',
+                name=f"OLS {trace.name}".strip() if group_column else "OLS trend",
+                line=dict(color=trace.marker.color if group_column else 'red'),
+                hovertemplate=(
+                    f"y = {fit['intercept']:.4g} + {fit['slope']:.4g}x<br>"
+                    f"R² = {fit['r_squared']:.4f}<extra></extra>"
+                )
+            )
+        )
+    
+    return fig
+
 def create_plotly_bar(df, x_column, y_column=None, color=None, title=None):
     """
     Create an interactive Plotly bar chart
@@ -417,15 +491,15 @@ def create_plotly_bar(df, x_column, y_column=None, color=None, title=None):
     - plotly figure
     """
     if df is None or x_column not in df.columns:
-        st.error(f"Column {x_column} not found in the dataframe")
+        report_error(f"Column {x_column} not found in the dataframe")
         return None
     
     if y_column and y_column not in df.columns:
-        st.error(f"Column {y_column} not found in the dataframe")
+        report_error(f"Column {y_column} not found in the dataframe")
         return None
     
     if color and color not in df.columns:
-        st.warning(f"Color column {color} not found in the dataframe. Ignoring.")
+        report_warning(f"Color column {color} not found in the dataframe. Ignoring.")
         color = None
     
     if y_column:
@@ -481,7 +555,7 @@ def create_plotly_pie(df, column, title=None):
     - plotly figure
     """
     if df is None or column not in df.columns:
-        st.error(f"Column {column} not found in the dataframe")
+        report_error(f"Column {column} not found in the dataframe")
         return None
     
     if title is None:
@@ -493,7 +567,7 @@ def create_plotly_pie(df, column, title=None):
     
     # Limit to top 10 categories if there are too many
     if len(value_counts) > 10:
-        st.warning(f"Column {column} has more than 10 unique values. Showing top 10.")
+        report_warning(f"Column {column} has more than 10 unique values. Showing top 10.")
         others_count = value_counts['count'][10:].sum()
         value_counts = value_counts.iloc[:10]
         if others_count > 0:
@@ -530,7 +604,7 @@ def create_plotly_line(df, x_column, y_columns, title=None):
     - plotly figure
     """
     if df is None or x_column not in df.columns:
-        st.error(f"Column {x_column} not found in the dataframe")
+        report_error(f"Column {x_column} not found in the dataframe")
         return None
     
     # Ensure y_columns is a list
@@ -541,7 +615,7 @@ def create_plotly_line(df, x_column, y_columns, title=None):
     available_y_columns = [col for col in y_columns if col in df.columns]
     
     if not available_y_columns:
-        st.error(f"None of the y-columns {y_columns} found in the dataframe")
+        report_error(f"None of the y-columns {y_columns} found in the dataframe")
         return None
     
     if title is None:
@@ -582,7 +656,7 @@ def create_plotly_heatmap(df, columns=None, method='pearson', title=None):
     - plotly figure
     """
     if df is None:
-        st.error("No dataframe provided")
+        report_error("No dataframe provided")
         return None
     
     # Select numeric columns
@@ -593,11 +667,11 @@ def create_plotly_heatmap(df, columns=None, method='pearson', title=None):
         numeric_df = df[available_columns].select_dtypes(include=np.number)
     
     if numeric_df.empty:
-        st.error("No numeric columns available for correlation analysis")
+        report_error("No numeric columns available for correlation analysis")
         return None
     
     # Calculate correlation matrix
-    corr_matrix = numeric_df.corr(method=method)
+    corr_matrix = compute_correlation_matrix(numeric_df, method=method)
     
     if title is None:
         title = f"Correlation Heatmap ({method})"
@@ -617,6 +691,60 @@ def create_plotly_heatmap(df, columns=None, method='pearson', title=None):
     
     return fig
 
+def create_plotly_sketch_box(df, y_column, title=None, error=DEFAULT_ERROR):
+    """
+    Create an interactive Plotly box plot from a column's cached quantile sketch
+    
+    Parameters:
+    - df: pandas DataFrame
+    - y_column: str, numerical column for y-axis
+    - title: str, plot title
+    - error: float, normalized rank error of the quantile sketch
+    
+    Returns:
+    - plotly figure
+    """
+    if df is None or y_column not in df.columns:
+        report_error(f"Column {y_column} not found in the dataframe")
+        return None
+    
+    if title is None:
+        title = f"Box Plot of {y_column}"
+    
+    box_stats = get_box_statistics(df, y_column, error)
+    values = df[y_column]
+    outliers = values[(values < box_stats['lower_bound']) | (values > box_stats['upper_bound'])]
+    
+    fig = go.Figure()
+    fig.add_trace(
+        go.Box(
+            name=y_column,
+            q1=[box_stats['q1']],
+            median=[box_stats['median']],
+            q3=[box_stats['q3']],
+            lowerfence=[box_stats['whisker_low']],
+            upperfence=[box_stats['whisker_high']],
+            boxpoints=False
+        )
+    )
+    
+    if len(outliers) > 0:
+        fig.add_trace(
+            go.Scatter(
+                x=[y_column] * len(outliers),
+                y=outliers,
+                mode='markers',
+                name='Outliers'
+            )
+        )
+    
+    fig.update_layout(
+        title=title,
+        yaxis_title=y_column
+    )
+    
+    return fig
+
 def create_plotly_box(df, x_column=None, y_column=None, color=None, title=None):
     """
     Create an interactive Plotly box plot
@@ -632,19 +760,19 @@ def create_plotly_box(df, x_column=None, y_column=None, color=None, title=None):
     - plotly figure
     """
     if df is None:
-        st.error("No dataframe provided")
+        report_error("No dataframe provided")
         return None
     
     if y_column and y_column not in df.columns:
-        st.error(f"Column {y_column} not found in the dataframe")
+        report_error(f"Column {y_column} not found in the dataframe")
         return None
     
     if x_column and x_column not in df.columns:
-        st.warning(f"Column {x_column} not found in the dataframe. Ignoring.")
+        report_warning(f"Column {x_column} not found in the dataframe. Ignoring.")
         x_column = None
     
     if color and color not in df.columns:
-        st.warning(f"Color column {color} not found in the dataframe. Ignoring.")
+        report_warning(f"Color column {color} not found in the dataframe. Ignoring.")
         color = None
     
     if title is None:
@@ -670,3 +798,46 @@ def create_plotly_box(df, x_column=None, y_column=None, color=None, title=None):
     )
     
     return fig
+
+def create_plotly_decomposition(decomposition, title=None):
+    """
+    Create stacked Plotly line charts of a seasonal decomposition
+    
+    Parameters:
+    - decomposition: DataFrame with 'observed', 'trend', 'seasonal' and 'resid' columns
+    - title: str, plot title
+    
+    Returns:
+    - plotly figure
+    """
+    components = ['observed', 'trend', 'seasonal', 'resid']
+    
+    if title is None:
+        title = "Seasonal Decomposition"
+    
+    fig = make_subplots(
+        rows=len(components),
+        cols=1,
+        shared_xaxes=True,
+        subplot_titles=[component.capitalize() for component in components]
+    )
+    
+    for i, component in enumerate(components, start=1):
+        fig.add_trace(
+            go.Scatter(
+                x=decomposition.index,
+                y=decomposition[component],
+                mode='lines',
+                name=component
+            ),
+            row=i,
+            col=1
+        )
+    
+    fig.update_layout(
+        title=title,
+        height=200 * len(components),
+        showlegend=False
+    )
+    
+    return fig
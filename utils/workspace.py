@@ -0,0 +1,422 @@
+import streamlit as st
+import pandas as pd
+import numpy as np
+from utils.caching import cache_data
+from utils.dataset_cache import get_dataset_version, record_append, record_stack
+from utils.out_of_core import is_out_of_core, write_partitioned, concat_partitioned
+
+# Join types supported by hash_join
+JOIN_TYPES = ['inner', 'left', 'outer']
+
+def init_workspace():
+    """Create the session's dataset registry if it does not exist yet"""
+    if 'datasets' not in st.session_state:
+        st.session_state.datasets = {}
+
+def add_dataset(name, df):
+    """
+    Add or replace a named dataset in the workspace
+
+    Parameters:
+    - name: str, dataset name
+    - df: pandas DataFrame
+    """
+    init_workspace()
+    st.session_state.datasets[name] = df
+
+def remove_dataset(name):
+    """
+    Remove a named dataset from the workspace
+
+    Parameters:
+    - name: str, dataset name
+    """
+    init_workspace()
+    st.session_state.datasets.pop(name, None)
+
+def get_workspace_summary():
+    """
+    Summarize the datasets held in the workspace
+
+    Returns:
+    - DataFrame with one row per dataset: name, rows, columns and memory usage
+      (0 for out-of-core datasets, which live on disk)
+    """
+    init_workspace()
+    rows = [
+        {
+            'Dataset': name,
+            'Rows': len(df),
+            'Columns': len(df.columns),
+            'Memory (MB)': 0.0 if is_out_of_core(df) else round(df.memory_usage(deep=True).sum() / 1024 ** 2, 2)
+        }
+        for name, df in st.session_state.datasets.items()
+    ]
+    return pd.DataFrame(rows, columns=['Dataset', 'Rows', 'Columns', 'Memory (MB)'])
+
+def _factorize_keys(left, right, left_on, right_on):
+    """
+    Map the join keys of both frames onto shared integer codes
+
+    Each key column pair is factorized over both frames together, and
+    multi-column keys are folded into one code column by column. Missing
+    keys get a code of their own, so they match each other as in pandas.
+
+    Returns:
+    - (left codes, right codes, number of distinct keys)
+    """
+    n_left = len(left)
+    codes = None
+
+    for left_col, right_col in zip(left_on, right_on):
+        combined = pd.concat([left[left_col], right[right_col]], ignore_index=True)
+        column_codes, uniques = pd.factorize(combined, use_na_sentinel=False)
+        if codes is None:
+            codes, n_keys = column_codes, len(uniques)
+        else:
+            codes, folded = pd.factorize(codes * len(uniques) + column_codes)
+            n_keys = len(folded)
+
+    return codes[:n_left], codes[n_left:], n_keys
+
+def join_cardinality(left, right, left_on, right_on):
+    """
+    Count the rows a join would produce without building it
+
+    Parameters:
+    - left: pandas DataFrame
+    - right: pandas DataFrame
+    - left_on: list of key columns in left
+    - right_on: list of key columns in right
+
+    Returns:
+    - dict with input sizes, matched keys, result rows per join type
+      and the key relationship (e.g. 'one-to-many')
+    """
+    left_codes, right_codes, n_keys = _factorize_keys(left, right, left_on, right_on)
+    left_counts = np.bincount(left_codes, minlength=n_keys)
+    right_counts = np.bincount(right_codes, minlength=n_keys)
+
+    matched = (left_counts > 0) & (right_counts > 0)
+    inner_rows = int((left_counts * right_counts).sum())
+    left_only = int(left_counts[right_counts == 0].sum())
+    right_only = int(right_counts[left_counts == 0].sum())
+
+    left_side = 'many' if matched.any() and left_counts[matched].max() > 1 else 'one'
+    right_side = 'many' if matched.any() and right_counts[matched].max() > 1 else 'one'
+
+    return {
+        'left_rows': len(left),
+        'right_rows': len(right),
+        'matched_keys': int(matched.sum()),
+        'inner': inner_rows,
+        'left': inner_rows + left_only,
+        'outer': inner_rows + left_only + right_only,
+        'relationship': f"{left_side}-to-{right_side}"
+    }
+
+def _take(series, indexer):
+    """Take values by position, with -1 giving a missing value"""
+    return pd.api.extensions.take(series.array, indexer, allow_fill=True)
+
+def hash_join(left, right, left_on, right_on, how='inner', suffixes=('_x', '_y')):
+    """
+    Join two DataFrames on key columns with a factorized hash join
+
+    Inner and left joins keep the order of the left rows (as pandas does);
+    outer joins append the unmatched right rows at the end.
+
+    Parameters:
+    - left: pandas DataFrame
+    - right: pandas DataFrame
+    - left_on: list of key columns in left
+    - right_on: list of key columns in right (same length as left_on)
+    - how: str, one of JOIN_TYPES
+    - suffixes: tuple, suffixes for overlapping non-key column names
+
+    Returns:
+    - joined DataFrame
+    """
+    if len(left_on) != len(right_on) or not left_on:
+        raise ValueError("Select the same number of key columns on both sides")
+    if how not in JOIN_TYPES:
+        raise ValueError(f"Unsupported join type: {how}")
+
+    left_codes, right_codes, n_keys = _factorize_keys(left, right, left_on, right_on)
+    left_counts = np.bincount(left_codes, minlength=n_keys)
+    right_counts = np.bincount(right_codes, minlength=n_keys)
+
+    # Right rows grouped by key, with the start of each key's block
+    right_starts = np.cumsum(right_counts) - right_counts
+    if len(right) and right_counts.max() > 1:
+        right_order = np.argsort(right_codes, kind='stable')
+    else:
+        # Unique right keys: every block has one row, so scatter instead of sorting
+        right_order = np.empty(len(right), dtype=np.int64)
+        right_order[right_starts[right_codes]] = np.arange(len(right))
+
+    # Every left row repeats once per matching right row (once with no match, except for inner joins)
+    matches = right_counts[left_codes]
+    repeats = matches if how == 'inner' else np.maximum(matches, 1)
+    total = int(repeats.sum())
+
+    left_indexer = np.repeat(np.arange(len(left)), repeats)
+    within_block = np.arange(total) - np.repeat(np.cumsum(repeats) - repeats, repeats)
+    right_positions = np.repeat(right_starts[left_codes], repeats) + within_block
+
+    if len(right):
+        right_indexer = np.where(
+            np.repeat(matches, repeats) > 0,
+            right_order[np.minimum(right_positions, len(right) - 1)],
+            -1
+        )
+    else:
+        right_indexer = np.full(total, -1)
+
+    if how == 'outer':
+        right_only = np.flatnonzero(left_counts[right_codes] == 0)
+        left_indexer = np.concatenate([left_indexer, np.full(len(right_only), -1)])
+        right_indexer = np.concatenate([right_indexer, right_only])
+
+    # Keys with the same name on both sides become one column
+    shared_keys = [l for l, r in zip(left_on, right_on) if l == r]
+    right_columns = [col for col in right.columns if col not in shared_keys]
+    overlap = set(left.columns) & set(right_columns)
+
+    columns = {}
+    for col in left.columns:
+        name = f"{col}{suffixes[0]}" if col in overlap else col
+        if col in shared_keys:
+            # Rows without a left match take the key from the right side
+            combined = pd.concat([left[col], right[col]], ignore_index=True)
+            columns[name] = _take(combined, np.where(left_indexer >= 0, left_indexer, len(left) + right_indexer))
+        else:
+            columns[name] = _take(left[col], left_indexer)
+
+    for col in right_columns:
+        name = f"{col}{suffixes[1]}" if col in overlap else col
+        columns[name] = _take(right[col], right_indexer)
+
+    return pd.DataFrame(columns)
+
+@cache_data(max_entries=16)
+def _cached_join(left_version, right_version, left_on, right_on, how, _left, _right):
+    return hash_join(_left, _right, list(left_on), list(right_on), how)
+
+@cache_data(max_entries=64)
+def _cached_cardinality(left_version, right_version, left_on, right_on, _left, _right):
+    return join_cardinality(_left, _right, list(left_on), list(right_on))
+
+def get_join(left, right, left_on, right_on, how='inner'):
+    """
+    Join two datasets, cached per pair of dataset versions
+
+    Parameters:
+    - left: pandas DataFrame
+    - right: pandas DataFrame
+    - left_on: list of key columns in left
+    - right_on: list of key columns in right
+    - how: str, one of JOIN_TYPES
+
+    Returns:
+    - joined DataFrame
+    """
+    return _cached_join(
+        get_dataset_version(left), get_dataset_version(right),
+        tuple(left_on), tuple(right_on), how, left, right
+    )
+
+def get_join_cardinality(left, right, left_on, right_on):
+    """
+    Get the cardinality report of a join, cached per pair of dataset versions
+
+    Parameters:
+    - left: pandas DataFrame
+    - right: pandas DataFrame
+    - left_on: list of key columns in left
+    - right_on: list of key columns in right
+
+    Returns:
+    - dict as returned by join_cardinality
+    """
+    return _cached_cardinality(
+        get_dataset_version(left), get_dataset_version(right),
+        tuple(left_on), tuple(right_on), left, right
+    )
+
+def schema_differences(frames):
+    """
+    Compare the column sets of several DataFrames with the first one
+
+    Parameters:
+    - frames: dict of name -> DataFrame
+
+    Returns:
+    - list of str describing each mismatch (empty when all schemas match)
+    """
+    names = list(frames.keys())
+    reference = set(frames[names[0]].columns)
+    differences = []
+
+    for name in names[1:]:
+        columns = set(frames[name].columns)
+        missing = sorted(map(str, reference - columns))
+        extra = sorted(map(str, columns - reference))
+        if missing:
+            differences.append(f"'{name}' is missing columns: {', '.join(missing)}")
+        if extra:
+            differences.append(f"'{name}' has extra columns: {', '.join(extra)}")
+
+    return differences
+
+@cache_data(max_entries=16)
+def _cached_concat(versions, names, source_column, _frames):
+    columns = _frames[0].columns
+    parts = []
+    for name, frame in zip(names, _frames):
+        part = frame[columns]
+        if source_column:
+            part = part.assign(**{source_column: name})
+        parts.append(part)
+    return pd.concat(parts, ignore_index=True)
+
+def concat_datasets(frames, source_column=None):
+    """
+    Stack datasets with the same columns, cached per combination of dataset versions
+
+    Parameters:
+    - frames: dict of name -> DataFrame (columns are aligned to the first one)
+    - source_column: str, name of a column recording each row's dataset (None to skip)
+
+    Returns:
+    - concatenated DataFrame
+
+    Raises:
+    - ValueError if the schemas differ
+    """
+    differences = schema_differences(frames)
+    if differences:
+        raise ValueError("; ".join(differences))
+
+    names = tuple(frames.keys())
+    versions = tuple(get_dataset_version(frame) for frame in frames.values())
+    return _cached_concat(versions, names, source_column, list(frames.values()))
+
+def _align_appended(df, delta):
+    """
+    Give appended rows the dataset's column order and types
+
+    Categorical columns take the new values as extra categories, on both
+    sides, so existing codes and category order are kept.
+
+    Returns:
+    - (dataset, aligned rows)
+    """
+    delta = delta[df.columns]
+    extended = {}
+    for col in df.columns:
+        dtype = df[col].dtype
+        if isinstance(dtype, pd.CategoricalDtype):
+            values = pd.Index(delta[col].dropna().unique())
+            new = values[~values.isin(dtype.categories)]
+            if len(new):
+                dtype = pd.CategoricalDtype(dtype.categories.append(new), ordered=dtype.ordered)
+                extended[col] = df[col].astype(dtype)
+        if delta[col].dtype != dtype:
+            delta = delta.assign(**{col: delta[col].astype(dtype)})
+
+    return (df.assign(**extended) if extended else df), delta
+
+def append_rows(df, delta):
+    """
+    Append new rows (e.g. an hourly extract of the same table) to a dataset as a new version
+
+    The new version records what it was appended to, so its profiles,
+    statistics, duplicate hashes and indexes are derived from the earlier
+    version's cached results and the new rows only.
+
+    Parameters:
+    - df: pandas DataFrame or OutOfCoreFrame, the current version
+    - delta: pandas DataFrame or OutOfCoreFrame with the same columns
+
+    Returns:
+    - the new version (out of core when df is)
+
+    Raises:
+    - ValueError if the columns differ or the new values do not fit the column types
+    """
+    differences = schema_differences({'dataset': df, 'new rows': delta})
+    if differences:
+        raise ValueError("; ".join(differences))
+
+    if is_out_of_core(df):
+        if not is_out_of_core(delta):
+            try:
+                _, delta = _align_appended(df.head(0), delta)
+            except (ValueError, TypeError) as e:
+                raise ValueError(f"The new rows do not fit the dataset's column types: {e}")
+            delta = write_partitioned([delta])
+        combined = concat_partitioned([df, delta])
+    else:
+        if is_out_of_core(delta):
+            delta = delta.to_pandas()
+        try:
+            base, delta = _align_appended(df, delta)
+        except (ValueError, TypeError) as e:
+            raise ValueError(f"The new rows do not fit the dataset's column types: {e}")
+        combined = pd.concat([base, delta], ignore_index=True)
+
+    record_append(combined, df, delta)
+    return combined
+
+def stack_rows(frames):
+    """
+    Stack datasets with the same columns into one new dataset, as if appended one by one
+
+    In memory, every prefix of the stack is recorded as an appended version
+    (see record_stack), so when a part is replaced, cached results of the
+    parts before it are reused.
+
+    Parameters:
+    - frames: list of pandas DataFrame or OutOfCoreFrame (the result is out of
+      core when the first one is)
+
+    Returns:
+    - the stacked dataset
+
+    Raises:
+    - ValueError if the columns differ or values do not fit the first part's column types
+    """
+    if len(frames) == 1:
+        return frames[0]
+
+    differences = schema_differences({f"part {i + 1}": frame for i, frame in enumerate(frames)})
+    if differences:
+        raise ValueError("; ".join(differences))
+
+    first = frames[0]
+    try:
+        if is_out_of_core(first):
+            meta = first.head(0)
+            parts = [frame if is_out_of_core(frame) else write_partitioned([_align_appended(meta, frame)[1]]) for frame in frames]
+            return concat_partitioned(parts)
+
+        frames = [frame.to_pandas() if is_out_of_core(frame) else frame[first.columns] for frame in frames]
+
+        # Categorical columns take the values of all parts as categories, in order of appearance
+        dtypes = first.dtypes.to_dict()
+        for col, dtype in dtypes.items():
+            if isinstance(dtype, pd.CategoricalDtype):
+                categories = dtype.categories
+                for frame in frames[1:]:
+                    values = pd.Index(frame[col].dropna().unique())
+                    categories = categories.append(values[~values.isin(categories)])
+                dtypes[col] = pd.CategoricalDtype(categories, ordered=dtype.ordered)
+
+        parts = [frame.astype(dtypes) for frame in frames]
+    except (ValueError, TypeError) as e:
+        raise ValueError(f"The datasets do not fit the first one's column types: {e}")
+
+    combined = pd.concat(parts, ignore_index=True)
+    record_stack(combined, [len(part) for part in parts])
+    return combined